@@ -0,0 +1,230 @@
+"""
+HTTP Response Cache
+
+Results for a settled (stock, start_date, end_date, engine) range are
+deterministic: fixed historical data and a fixed model seed. This module keys
+responses on the normalized request plus a data-version hash, keeps recent
+responses in memory (optionally backed by the host-wide shared cache tier),
+and provides the ETag / Last-Modified helpers used for conditional requests.
+"""
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from datetime import date
+from email.utils import formatdate, parsedate_to_datetime
+from data.news import news_version
+from model.tuning import load_best_params
+from utils.cache import CACHE_ERRORS
+from utils.dates import is_settled as trading_range_settled
+
+
+# Bump whenever a pipeline change alters results for the same inputs
+PIPELINE_VERSION = "2"
+
+# Cache-Control max-age for settled and still-open ranges
+SETTLED_MAX_AGE = 86400
+OPEN_MAX_AGE = 300
+
+
+def is_settled(end_date: str) -> bool:
+    """
+    Whether a range's inputs no longer change: every trading session up to
+    its end date has closed (see utils.dates.is_settled).
+
+    Args:
+        end_date: End date in YYYY-MM-DD format
+
+    Returns:
+        True if the range is settled
+    """
+    return trading_range_settled(end_date)
+
+
+def data_version(stock: str, start_date: str, end_date: str, engine: str) -> str:
+    """
+    Hash of everything besides the request that determines a result.
+
+    Covers the pipeline version, the tuned hyperparameters stored for the
+    ticker, the state of the news archive over the range (see
+    data.news.news_version) and, for ranges that are not settled yet, the
+    current day.
+
+    Args:
+        stock: Normalized ticker
+        start_date: Normalized start date
+        end_date: Normalized end date
+        engine: Resolved engine name
+
+    Returns:
+        Hex digest identifying the data version
+    """
+    try:
+        params = load_best_params(stock, engine)
+    except ValueError:
+        params = None
+
+    parts = {
+        'pipeline': PIPELINE_VERSION,
+        'params': params,
+        'news': news_version(stock, start_date, end_date),
+        'as_of': None if is_settled(end_date) else date.today().isoformat()
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def make_etag(*parts) -> str:
+    """
+    Build a strong ETag from key parts.
+
+    Args:
+        *parts: JSON-serializable values identifying the representation
+
+    Returns:
+        Quoted ETag string
+    """
+    digest = hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Evaluate an If-None-Match header against an ETag (weak comparison).
+
+    Args:
+        if_none_match: Header value (may be None, '*', or a list of tags)
+        etag: Current ETag
+
+    Returns:
+        True if the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+
+    def strip_weak(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith('W/') else tag
+
+    return strip_weak(etag) in {strip_weak(tag) for tag in if_none_match.split(',')}
+
+
+def not_modified_since(if_modified_since: str, last_modified_ts: float) -> bool:
+    """
+    Evaluate an If-Modified-Since header.
+
+    Args:
+        if_modified_since: Header value (may be None)
+        last_modified_ts: Resource modification time (POSIX seconds)
+
+    Returns:
+        True if the resource has not changed since the given date
+    """
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return int(last_modified_ts) <= since
+
+
+def http_date(timestamp: float) -> str:
+    """Format a POSIX timestamp as an HTTP date."""
+    return formatdate(timestamp, usegmt=True)
+
+
+class ResponseCache:
+    """
+    Thread-safe in-memory LRU cache of response bodies.
+
+    With a shared tier (see utils.cache), entries are also written to it and
+    memory misses fall back to it, so a response computed by one API worker
+    process is served by every other worker on the host.
+
+    Attributes:
+        max_entries: Maximum cached responses
+        shared: Host-wide cache tier (optional)
+        hits: Number of lookups served from the cache
+        shared_hits: Lookups among hits that came from the shared tier
+        misses: Number of lookups that missed
+    """
+
+    def __init__(self, max_entries: int = None, shared=None):
+        self.max_entries = max_entries or int(os.environ.get('KASSANDRA_RESPONSE_CACHE_SIZE', 256))
+        self.shared = shared
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _shared_key(key) -> str:
+        """Shared-tier key for a response cache key."""
+        return 'response:' + hashlib.sha256(json.dumps(key, default=str).encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Look up a cached entry.
+
+        Args:
+            key: Hashable cache key
+
+        Returns:
+            Cached entry dict, or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self._get_shared(key)
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.shared_hits += 1
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key, entry: dict):
+        """
+        Store an entry, evicting the least recently used beyond max_entries.
+
+        Args:
+            key: Hashable cache key
+            entry: Dict with body, etag and last_modified
+        """
+        self._remember(key, entry)
+        if self.shared is not None:
+            try:
+                self.shared.set(self._shared_key(key), pickle.dumps(entry), SETTLED_MAX_AGE)
+            except CACHE_ERRORS as e:
+                print(f"Response cache: shared tier write failed: {e}")
+
+    def _remember(self, key, entry: dict):
+        """Store an entry in the memory tier only."""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_shared(self, key):
+        """Entry from the shared tier, or None."""
+        if self.shared is None:
+            return None
+        try:
+            data = self.shared.get(self._shared_key(key))
+        except CACHE_ERRORS as e:
+            print(f"Response cache: shared tier read failed: {e}")
+            return None
+        return pickle.loads(data) if data is not None else None
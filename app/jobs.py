@@ -0,0 +1,290 @@
+"""
+Background Job Queue
+
+Runs CPU-heavy pipeline work in a bounded process pool so the API event loop
+never blocks on it. Each submission becomes a job with an id whose status
+and result can be polled, or awaited without blocking the loop.
+
+Submissions carrying a key are coalesced (single-flight): while a job for a
+key is in flight, identical submissions share it instead of running again.
+
+If a worker process dies (killed, out of memory), the pool is broken: every
+job it held fails with WorkerPoolError and the next submission starts a
+fresh pool.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity."""
+    pass
+
+
+class WorkerPoolError(Exception):
+    """Raised when a job is lost because a worker process died."""
+    pass
+
+
+class Job:
+    """
+    One unit of background work.
+
+    Attributes:
+        id: Job identifier
+        created_at: ISO timestamp of submission
+        finished_at: ISO timestamp of completion (None while pending)
+        future: concurrent.futures.Future of the worker call
+    """
+
+    def __init__(self, future):
+        self.id = uuid.uuid4().hex
+        self.created_at = datetime.now().isoformat()
+        self.finished_at = None
+        self.finished_monotonic = None
+        self.future = future
+
+    @property
+    def status(self) -> str:
+        """Job status: queued, running, succeeded or failed."""
+        if not self.future.done():
+            return 'running' if self.future.running() else 'queued'
+        if self.future.cancelled() or self.future.exception() is not None:
+            return 'failed'
+        return 'succeeded'
+
+    @property
+    def result(self):
+        """Worker return value, or None unless succeeded."""
+        if self.status != 'succeeded':
+            return None
+        return self.future.result()
+
+    @property
+    def error(self) -> str:
+        """Error message, or None unless failed."""
+        if self.status != 'failed':
+            return None
+        if self.future.cancelled():
+            return "Job was cancelled"
+        if isinstance(self.future.exception(), BrokenProcessPool):
+            return f"Worker pool failed: {self.future.exception()}"
+        return str(self.future.exception())
+
+    def _mark_finished(self, _future):
+        self.finished_at = datetime.now().isoformat()
+        self.finished_monotonic = time.monotonic()
+
+
+class JobQueue:
+    """
+    Bounded process-pool job queue.
+
+    Attributes:
+        max_workers: Worker processes
+        max_pending: Maximum queued + running jobs before submissions are rejected
+        retention_seconds: How long finished jobs stay queryable
+        initializer: Callable run once in every worker process as it starts (optional)
+    """
+
+    def __init__(self, max_workers: int = None, max_pending: int = None, retention_seconds: float = 3600,
+                 initializer=None):
+        self.max_workers = max_workers or int(os.environ.get('KASSANDRA_WORKERS', os.cpu_count() or 1))
+        self.max_pending = max_pending or int(os.environ.get('KASSANDRA_MAX_PENDING_JOBS', 32))
+        self.retention_seconds = retention_seconds
+        self.initializer = initializer
+        self._executor = None
+        self._manager = None
+        self._jobs = {}
+        self._inflight = {}
+        # Re-entrant: done callbacks run inline when a future is already done
+        self._lock = threading.RLock()
+        self.coalesced_count = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: workers never inherit the server's threads or event loop
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=self.initializer
+            )
+        return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor):
+        """Drop a broken pool so the next submission starts a fresh one."""
+        with self._lock:
+            if self._executor is executor:
+                print("Worker pool broken, restarting it on the next job")
+                self._executor = None
+        # Jobs still held by the broken pool fail with BrokenProcessPool
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _discard_if_broken(self, executor: ProcessPoolExecutor, future):
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._discard_executor(executor)
+
+    def prestart(self):
+        """
+        Start the worker processes now instead of on the first job.
+
+        Each worker runs the initializer as it starts, so the warm-up
+        happens before any request arrives.
+        """
+        with self._lock:
+            executor = self._get_executor()
+            # Workers are spawned on demand, one per submission that finds none idle
+            for _ in range(self.max_workers):
+                executor.submit(os.getpid)
+
+    def progress_channel(self):
+        """
+        Create a queue and cancel event shareable with a worker process.
+
+        Returns:
+            tuple: (event queue, cancel event) proxies
+        """
+        with self._lock:
+            if self._manager is None:
+                self._manager = multiprocessing.get_context('spawn').Manager()
+            return self._manager.Queue(), self._manager.Event()
+
+    def _prune(self):
+        """Drop finished jobs past their retention period."""
+        cutoff = time.monotonic() - self.retention_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_monotonic is not None and job.finished_monotonic < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    @property
+    def pending(self) -> int:
+        """Number of queued + running jobs."""
+        return sum(1 for job in self._jobs.values() if not job.future.done())
+
+    def status_counts(self) -> dict:
+        """
+        Count unfinished jobs by status.
+
+        Returns:
+            Dictionary with 'queued' and 'running' counts
+        """
+        with self._lock:
+            counts = {'queued': 0, 'running': 0}
+            for job in self._jobs.values():
+                if not job.future.done():
+                    counts['running' if job.future.running() else 'queued'] += 1
+            return counts
+
+    def submit(self, fn, *args, key=None, on_complete=None, **kwargs) -> Job:
+        """
+        Enqueue a call to fn in a worker process.
+
+        Args:
+            fn: Picklable top-level function
+            *args, **kwargs: Picklable arguments
+            key: Hashable identity of the call (optional). If a job with the
+                same key is still in flight it is returned instead of
+                starting a new one, so the key must cover every argument the
+                callers could differ on, including limits such as the
+                request deadline.
+            on_complete: Future done-callback attached only when a new job
+                is started, so it runs once per job however many callers
+                share it (optional)
+
+        Returns:
+            Job: The submitted (or shared in-flight) job
+
+        Raises:
+            QueueFullError: If max_pending jobs are already queued or running
+            WorkerPoolError: If the pool broke and a fresh one broke as well
+        """
+        with self._lock:
+            if key is not None:
+                inflight = self._inflight.get(key)
+                if inflight is not None and not inflight.future.done():
+                    self.coalesced_count += 1
+                    return inflight
+
+            self._prune()
+            if self.pending >= self.max_pending:
+                raise QueueFullError(f"Job queue is full ({self.max_pending} pending jobs)")
+
+            # A pool that broke since the last job is replaced once
+            for attempt in range(2):
+                executor = self._get_executor()
+                try:
+                    future = executor.submit(fn, *args, **kwargs)
+                    break
+                except BrokenProcessPool as e:
+                    self._discard_executor(executor)
+                    if attempt:
+                        raise WorkerPoolError(f"Worker pool failed: {e}")
+            job = Job(future)
+            job.future.add_done_callback(job._mark_finished)
+            job.future.add_done_callback(lambda f: self._discard_if_broken(executor, f))
+            if on_complete is not None:
+                job.future.add_done_callback(on_complete)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._inflight[key] = job
+                job.future.add_done_callback(lambda _f: self._release(key, job))
+
+        return job
+
+    def _release(self, key, job: Job):
+        """Forget a finished job as the in-flight job for its key."""
+        with self._lock:
+            if self._inflight.get(key) is job:
+                del self._inflight[key]
+
+    def get(self, job_id: str) -> Job:
+        """
+        Look up a job.
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            Job, or None if unknown or expired
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    async def wait(self, job: Job):
+        """
+        Await a job's result without blocking the event loop.
+
+        Args:
+            job: Submitted job
+
+        Returns:
+            Worker return value
+
+        Raises:
+            WorkerPoolError: If a worker process died while the job was in the pool
+            Exception: Whatever the worker raised
+        """
+        # Shielded: a disconnecting waiter must not cancel a job others share
+        try:
+            return await asyncio.shield(asyncio.wrap_future(job.future))
+        except BrokenProcessPool as e:
+            raise WorkerPoolError(f"Worker pool failed: {e}")
+
+    def shutdown(self):
+        """Stop the worker pool, cancelling jobs that have not started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
@@ -3,13 +3,68 @@ FastAPI Application - Stock Prediction API
 
 Main application entry point for the Kassandra ML prediction service.
 """
+import asyncio
+import json
 import os
+import queue
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
-from fastapi import FastAPI, HTTPException, Query
+from typing import Optional
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from app.schemas import PredictionRequest, PredictionResponse, HealthResponse
-from services.predict_service import run_prediction
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import ValidationError
+from app.schemas import (
+    PredictionRequest, PredictionResponse, BatchPredictionRequest, BatchPredictionResponse,
+    HealthResponse, JobResponse, JobStatusResponse, MAX_DEADLINE_SECONDS
+)
+from app.jobs import JobQueue, QueueFullError, WorkerPoolError
+from app.cache import (
+    ResponseCache, data_version, make_etag, etag_matches,
+    not_modified_since, http_date, is_settled, SETTLED_MAX_AGE, OPEN_MAX_AGE
+)
+from app.scheduler import start_background
+from app.metrics import (
+    registry, job_recorder, http_requests_total, http_request_duration, http_requests_in_flight
+)
+from app.streaming import negotiate_encoding, compress_chunks, parse_byte_range, slice_chunks
+from services.predict_service import run_prediction, run_prediction_with_events, run_prediction_profiled
+from services.profiling import parse_profile_options, trace_path
+from services.batch_service import run_batch_prediction
+from services.warmup import warmup
+from services.artifacts import parse_artifact_name, artifact_path, artifact_info, artifact_csv_chunks
+from utils.cache import get_cache
+
+# Bounded worker pool for pipeline runs (KASSANDRA_WORKERS, KASSANDRA_MAX_PENDING_JOBS);
+# each worker warms up its heavy imports as it starts
+job_queue = JobQueue(initializer=warmup)
+
+# Recent /predict responses (KASSANDRA_RESPONSE_CACHE_SIZE), shared with the other
+# API workers through the host-wide cache tier
+response_cache = ResponseCache(shared=get_cache().shared)
+
+# Seconds between SSE keep-alive comments while no progress event arrives
+STREAM_HEARTBEAT_SECONDS = 15
+STREAM_POLL_SECONDS = 0.5
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Spawn and warm the workers at startup unless KASSANDRA_WARMUP=0
+    if os.environ.get('KASSANDRA_WARMUP', '1') != '0':
+        job_queue.prestart()
+    # Precompute the watchlist after each session if KASSANDRA_PRECOMPUTE_WATCHLIST is set
+    precompute = None
+    if os.environ.get('KASSANDRA_PRECOMPUTE_WATCHLIST'):
+        precompute = start_background(os.environ['KASSANDRA_PRECOMPUTE_WATCHLIST'], response_cache)
+    yield
+    if precompute is not None:
+        precompute[1].set()
+    job_queue.shutdown()
+
 
 # Initialize FastAPI application
 app = FastAPI(
@@ -17,7 +72,8 @@ app = FastAPI(
     description="ML-powered stock prediction service with multi-source sentiment analysis",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configure CORS - Allow all origins for now
@@ -30,9 +86,46 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "X-Cache", "Content-Range", "Accept-Ranges", "X-Kassandra-Trace"],
+)
+
+# Metrics read from live state when /metrics is scraped
+registry.gauge(
+    'kassandra_jobs_in_flight', 'Pipeline jobs queued or running',
+    callback=lambda: {(('status', status),): count for status, count in job_queue.status_counts().items()}
+)
+registry.counter(
+    'kassandra_jobs_coalesced_total', 'Requests that joined an identical in-flight job',
+    callback=lambda: job_queue.coalesced_count
+)
+registry.counter(
+    'kassandra_response_cache_requests_total', 'Response cache lookups by result',
+    callback=lambda: {(('result', 'hit'),): response_cache.hits, (('result', 'miss'),): response_cache.misses}
+)
+registry.gauge(
+    'kassandra_response_cache_hit_ratio', 'Response cache hits / lookups since start',
+    callback=lambda: response_cache.hits / max(1, response_cache.hits + response_cache.misses)
 )
 
 
+@app.middleware("http")
+async def record_http_metrics(request: Request, call_next):
+    """Count requests and time them per route template."""
+    http_requests_in_flight.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        http_requests_in_flight.dec()
+        route = request.scope.get('route')
+        path = route.path if route is not None else 'unmatched'
+        http_request_duration.observe(time.perf_counter() - start, route=path)
+        http_requests_total.inc(route=path, method=request.method, status=str(status))
+
+
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
 async def health_check():
     """
@@ -47,8 +140,175 @@ async def health_check():
     )
 
 
-@app.post("/predict", response_model=PredictionResponse, tags=["Prediction"])
-async def predict(request: PredictionRequest):
+async def _serve_profiled(request: PredictionRequest, options: str, wait: bool) -> Response:
+    """
+    Run a prediction with tracing, bypassing the response cache.
+    
+    Args:
+        request: PredictionRequest containing stock symbol and date range
+        options: X-Kassandra-Profile header value
+        wait: Whether to wait for the result
+    
+    Returns:
+        Response: 200 with trace_id and an X-Kassandra-Trace header, or 202 with a job id
+    """
+    stock, start_date, end_date, engine = request.normalized_key()
+    
+    try:
+        job = job_queue.submit(
+            run_prediction_profiled,
+            stock=stock,
+            start_date=start_date,
+            end_date=end_date,
+            engine=engine,
+            profile=options,
+            export_csv=False,
+            deadline_seconds=request.deadline_seconds,
+            on_complete=job_recorder('single')
+        )
+    except (QueueFullError, WorkerPoolError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    if not wait:
+        return JSONResponse(
+            status_code=202,
+            content=JobResponse(job_id=job.id, status=job.status, status_url=f"/jobs/{job.id}").model_dump()
+        )
+    
+    try:
+        result = await job_queue.wait(job)
+    except WorkerPoolError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        trace_id = getattr(e, 'trace_id', None)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Prediction failed: {str(e)}",
+            headers={'X-Kassandra-Trace': f"/traces/{trace_id}"} if trace_id else None
+        )
+    
+    return JSONResponse(
+        content=PredictionResponse(**result).model_dump(),
+        headers={'X-Kassandra-Trace': f"/traces/{result['trace_id']}", 'Cache-Control': 'no-store'}
+    )
+
+
+def _is_complete(result: dict) -> bool:
+    """Whether every data source delivered fresh data, so the result may be cached."""
+    return not result.get('degraded_sources')
+
+
+async def _serve_prediction(request: PredictionRequest, if_none_match: str, wait: bool,
+                            profile: str = None) -> Response:
+    """
+    Serve a prediction from the response cache, or run it as a job.
+    
+    Args:
+        request: PredictionRequest containing stock symbol and date range
+        if_none_match: If-None-Match header value (optional)
+        wait: Whether to wait for the result
+        profile: X-Kassandra-Profile header value (optional, enables tracing)
+    
+    Returns:
+        Response: 304, cached 200, fresh 200, or 202 with a job id
+    """
+    try:
+        profiling = bool(parse_profile_options(profile))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if profiling:
+        return await _serve_profiled(request, profile, wait)
+    
+    key = request.normalized_key()
+    stock, start_date, end_date, engine = key
+    # Reads the tuning file and the news archive, so it runs off the loop, once per request
+    version = await run_in_threadpool(data_version, *key)
+    etag = make_etag(key, version)
+    cache_headers = {
+        'ETag': etag,
+        'Cache-Control': f"public, max-age={SETTLED_MAX_AGE if is_settled(end_date) else OPEN_MAX_AGE}"
+    }
+    
+    # A matching client copy needs no work, as long as this version was actually computed
+    cached = response_cache.get((key, version))
+    if cached is not None:
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=cache_headers)
+        return JSONResponse(
+            content=cached['body'],
+            headers={**cache_headers, 'Last-Modified': cached['last_modified'], 'X-Cache': 'HIT'}
+        )
+    
+    try:
+        # Enqueue ML prediction pipeline; identical concurrent requests share one job.
+        # The deadline is part of the job key: a caller never gets a run held to another's deadline
+        job = job_queue.submit(
+            run_prediction,
+            stock=stock,
+            start_date=start_date,
+            end_date=end_date,
+            engine=engine,
+            export_csv=False,
+            deadline_seconds=request.deadline_seconds,
+            key=(*key, request.deadline_seconds),
+            on_complete=job_recorder('single')
+        )
+    except (QueueFullError, WorkerPoolError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    # A run whose news poll changes the archive stores under the version it started from,
+    # so the next request (with the new version) computes once more and is cached from then on
+    def remember(future):
+        if not future.cancelled() and future.exception() is None and _is_complete(future.result()):
+            response_cache.put((key, version), {
+                'body': PredictionResponse(**future.result()).model_dump(),
+                'last_modified': http_date(time.time())
+            })
+    job.future.add_done_callback(remember)
+    
+    if not wait:
+        return JSONResponse(
+            status_code=202,
+            content=JobResponse(job_id=job.id, status=job.status, status_url=f"/jobs/{job.id}").model_dump()
+        )
+    
+    try:
+        result = await job_queue.wait(job)
+    except WorkerPoolError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        # Return HTTP 500 with error details
+        raise HTTPException(
+            status_code=500,
+            detail=f"Prediction failed: {str(e)}"
+        )
+    
+    # A degraded result is not the result the ETag names, so it must not be cached anywhere
+    if not _is_complete(result):
+        return JSONResponse(
+            content=PredictionResponse(**result).model_dump(),
+            headers={'Cache-Control': 'no-store', 'X-Cache': 'MISS'}
+        )
+    
+    # Return result as PredictionResponse
+    return JSONResponse(
+        content=PredictionResponse(**result).model_dump(),
+        headers={**cache_headers, 'Last-Modified': http_date(time.time()), 'X-Cache': 'MISS'}
+    )
+
+
+@app.post(
+    "/predict",
+    response_model=PredictionResponse,
+    responses={202: {"model": JobResponse}, 304: {"description": "Not modified"}},
+    tags=["Prediction"]
+)
+async def predict(
+    request: PredictionRequest,
+    wait: bool = Query(True, description="Wait for the result (false: return a job id immediately)"),
+    if_none_match: Optional[str] = Header(None),
+    x_kassandra_profile: Optional[str] = Header(None)
+):
     """
     Stock prediction endpoint.
     
@@ -57,98 +317,584 @@ async def predict(request: PredictionRequest):
     - Technical feature engineering
     - Multi-source sentiment analysis (news, trends, Wikipedia)
     - Model training and prediction
-    - CSV export generation
+    - Feature and prediction artifact storage for CSV downloads
+    
+    The pipeline runs as a job in the background worker pool; concurrent
+    requests with the same normalized stock, dates, engine and deadline
+    share one job and its result. With wait=true (the default) the request
+    awaits the job without blocking the event loop; with wait=false it
+    returns 202 with a job id to poll at /jobs/{job_id}.
+    
+    Responses carry an ETag keyed on the normalized request and data version.
+    Repeated requests are served from the response cache, and a matching
+    If-None-Match answers 304 when that version is cached.
+    
+    An X-Kassandra-Profile header ("1", "all", or any of "spans,cprofile,memory")
+    runs the pipeline uncached with tracing; the stored trace is linked from
+    the X-Kassandra-Trace response header.
     
     Args:
         request: PredictionRequest containing stock symbol and date range
+        wait: Whether to wait for the result
+        if_none_match: If-None-Match header
+        x_kassandra_profile: X-Kassandra-Profile header (optional)
+    
+    Returns:
+        PredictionResponse: Prediction results with sentiment breakdown, or
+        JobResponse (202) when wait=false
+    
+    Raises:
+        HTTPException: 400 for an unknown profile option, 422 for an unknown
+        engine, 503 if the job queue is full or a worker process died, 500 if
+        prediction pipeline fails
+    """
+    return await _serve_prediction(request, if_none_match, wait, x_kassandra_profile)
+
+
+@app.get(
+    "/predict",
+    response_model=PredictionResponse,
+    responses={202: {"model": JobResponse}, 304: {"description": "Not modified"}},
+    tags=["Prediction"]
+)
+async def predict_get(
+    stock: str = Query(..., description="Stock ticker symbol"),
+    start_date: str = Query(..., description="Start date (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="End date (YYYY-MM-DD)"),
+    engine: Optional[str] = Query(None, description="Model engine"),
+    deadline_seconds: Optional[float] = Query(
+        None, gt=0, le=MAX_DEADLINE_SECONDS, description="Seconds allowed for fetching data sources"
+    ),
+    wait: bool = Query(True, description="Wait for the result (false: return a job id immediately)"),
+    if_none_match: Optional[str] = Header(None),
+    x_kassandra_profile: Optional[str] = Header(None)
+):
+    """
+    Cacheable GET form of the prediction endpoint.
+    
+    Identical to POST /predict, but addressable by URL so browsers and CDNs
+    can cache it and revalidate with If-None-Match.
     
     Returns:
         PredictionResponse: Prediction results with sentiment breakdown
     
     Raises:
-        HTTPException: 500 if prediction pipeline fails
+        RequestValidationError: 422 for an invalid parameter, e.g. an unknown engine
+    """
+    request = _query_request(
+        stock=stock, start_date=start_date, end_date=end_date, engine=engine, deadline_seconds=deadline_seconds
+    )
+    return await _serve_prediction(request, if_none_match, wait, x_kassandra_profile)
+
+
+def _query_request(**fields) -> PredictionRequest:
+    """
+    Build a PredictionRequest from query parameters.
+    
+    Raises:
+        RequestValidationError: If a field is invalid (e.g. an unknown
+        engine), answered with 422 like an invalid request body
     """
     try:
-        # Execute ML prediction pipeline
-        result = run_prediction(
-            stock=request.stock,
-            start_date=request.start_date,
-            end_date=request.end_date
+        return PredictionRequest(**fields)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+
+
+@app.post(
+    "/predict/batch",
+    response_model=BatchPredictionResponse,
+    responses={202: {"model": JobResponse}},
+    tags=["Prediction"]
+)
+async def predict_batch(
+    request: BatchPredictionRequest,
+    wait: bool = Query(True, description="Wait for the result (false: return a job id immediately)")
+):
+    """
+    Batch stock prediction endpoint.
+    
+    Runs the pipeline for a list of tickers over one date range as a single
+    job: prices come from one bulk download, sentiment sources are fetched
+    concurrently and the models train in parallel. Each ticker gets its own
+    result or error, so one bad ticker does not fail the batch.
+    
+    With wait=true (the default), tickers already in the response cache are
+    served from it and only the rest are computed; every computed result is
+    cached for later single-ticker requests too.
+    
+    Args:
+        request: BatchPredictionRequest containing tickers and date range
+        wait: Whether to wait for the result
+    
+    Returns:
+        BatchPredictionResponse: Per-ticker results and errors, or
+        JobResponse (202) when wait=false
+    
+    Raises:
+        HTTPException: 422 for an unknown engine, 503 if the job queue is full or
+        a worker process died, 500 if the batch fails as a whole
+    """
+    keys = [ticker_request.normalized_key() for ticker_request in request.ticker_requests()]
+    # One thread pool call for every ticker's version (tuning file and news archive reads)
+    versions = await run_in_threadpool(lambda: [data_version(*key) for key in keys])
+    ticker_keys = {key[0]: (key, version) for key, version in zip(keys, versions)}
+    _, start_date, end_date, engine = next(iter(ticker_keys.values()))[0]
+    
+    cached = {}
+    if wait:
+        for stock, cache_key in ticker_keys.items():
+            entry = response_cache.get(cache_key)
+            if entry is not None:
+                cached[stock] = entry['body']
+    remaining = [stock for stock in ticker_keys if stock not in cached]
+    
+    if not remaining:
+        return BatchPredictionResponse(results=cached, model_engine=engine)
+    
+    try:
+        job = job_queue.submit(
+            run_batch_prediction,
+            stocks=remaining,
+            start_date=start_date,
+            end_date=end_date,
+            engine=engine,
+            export_csv=False,
+            deadline_seconds=request.deadline_seconds,
+            key=('batch', tuple(remaining), start_date, end_date, engine, request.deadline_seconds),
+            on_complete=job_recorder('batch')
         )
-        
-        # Return result as PredictionResponse
-        return PredictionResponse(**result)
+    except (QueueFullError, WorkerPoolError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
     
+    def remember(future):
+        if not future.cancelled() and future.exception() is None:
+            last_modified = http_date(time.time())
+            for stock, result in future.result()['results'].items():
+                if stock in ticker_keys and _is_complete(result):
+                    response_cache.put(ticker_keys[stock], {
+                        'body': PredictionResponse(**result).model_dump(),
+                        'last_modified': last_modified
+                    })
+    job.future.add_done_callback(remember)
+    
+    if not wait:
+        return JSONResponse(
+            status_code=202,
+            content=JobResponse(job_id=job.id, status=job.status, status_url=f"/jobs/{job.id}").model_dump()
+        )
+    
+    try:
+        result = await job_queue.wait(job)
+    except WorkerPoolError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        # Return HTTP 500 with error details
         raise HTTPException(
             status_code=500,
-            detail=f"Prediction failed: {str(e)}"
+            detail=f"Batch prediction failed: {str(e)}"
         )
+    
+    # Merge cached and computed results back into request order
+    computed = BatchPredictionResponse(**result)
+    results = {**cached, **computed.results}
+    return BatchPredictionResponse(
+        results={stock: results[stock] for stock in ticker_keys if stock in results},
+        errors=computed.errors,
+        model_engine=computed.model_engine,
+        stage_timings=computed.stage_timings
+    )
 
 
-@app.get("/download/features", tags=["Download"])
-async def download_features(path: str = Query(..., description="Path to features CSV file")):
+def _job_result_model(result):
+    """Wrap a finished job's return value in its response model."""
+    if result is None:
+        return None
+    if 'results' in result:
+        return BatchPredictionResponse(**result)
+    return PredictionResponse(**result)
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse, tags=["Prediction"])
+async def get_job(job_id: str):
     """
-    Download features CSV file.
+    Prediction job status endpoint.
     
     Args:
-        path: Path to the features CSV file
+        job_id: Job identifier returned by /predict?wait=false
     
     Returns:
-        FileResponse: CSV file download
+        JobStatusResponse: Job status, with the result or error once finished
     
     Raises:
-        HTTPException: 404 if file not found
+        HTTPException: 404 if the job is unknown or expired
     """
-    # Validate file exists
-    if not os.path.exists(path):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Job not found: {job_id}"
+        )
+    
+    result = job.result
+    return JobStatusResponse(
+        job_id=job.id,
+        status=job.status,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        result=_job_result_model(result),
+        error=job.error
+    )
+
+
+def _sse(event: str, data: dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _next_event(event_queue, timeout: float):
+    """Blocking read of the next progress event (None on timeout)."""
+    try:
+        return event_queue.get(timeout=timeout)
+    except queue.Empty:
+        return None
+
+
+@app.get("/predict/stream", tags=["Prediction"])
+async def predict_stream(
+    stock: str = Query(..., description="Stock ticker symbol"),
+    start_date: str = Query(..., description="Start date (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="End date (YYYY-MM-DD)"),
+    engine: Optional[str] = Query(None, description="Model engine"),
+    deadline_seconds: Optional[float] = Query(
+        None, gt=0, le=MAX_DEADLINE_SECONDS, description="Seconds allowed for fetching data sources"
+    )
+):
+    """
+    Server-sent event stream of a prediction run.
+    
+    Emits stage_start / stage_end events (with elapsed_ms) as the pipeline
+    progresses, a partial event with the headline prediction and sentiment
+    breakdown as soon as the model is trained (before the walk-forward
+    backtest), a degraded event for each data source replaced by cached or
+    neutral values, and a final result event with the full PredictionResponse.
+    Failures end the stream with an error event. Disconnecting cancels the
+    run at its next stage or backtest fit. Cached results are streamed as a
+    single result event.
+    
+    Returns:
+        StreamingResponse: text/event-stream
+    
+    Raises:
+        HTTPException: 422 for an unknown engine, 503 if the job queue is full
+        or the worker pool failed
+    """
+    request = _query_request(stock=stock, start_date=start_date, end_date=end_date, engine=engine)
+    key = request.normalized_key()
+    stock, start_date, end_date, engine = key
+    version = await run_in_threadpool(data_version, *key)
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    
+    cached = response_cache.get((key, version))
+    if cached is not None:
+        async def cached_stream():
+            yield _sse('result', cached['body'])
+        return StreamingResponse(cached_stream(), media_type="text/event-stream", headers=headers)
+    
+    # Streamed runs are not coalesced: each stream owns its progress channel
+    event_queue, cancel_event = job_queue.progress_channel()
+    try:
+        job = job_queue.submit(
+            run_prediction_with_events,
+            stock=stock,
+            start_date=start_date,
+            end_date=end_date,
+            engine=engine,
+            event_queue=event_queue,
+            cancel_event=cancel_event,
+            export_csv=False,
+            deadline_seconds=deadline_seconds,
+            on_complete=job_recorder('single')
+        )
+    except (QueueFullError, WorkerPoolError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    # A run whose news poll changes the archive stores under the version it started from,
+    # so the next request (with the new version) computes once more and is cached from then on
+    def remember(future):
+        if not future.cancelled() and future.exception() is None and _is_complete(future.result()):
+            response_cache.put((key, version), {
+                'body': PredictionResponse(**future.result()).model_dump(),
+                'last_modified': http_date(time.time())
+            })
+    job.future.add_done_callback(remember)
+    
+    async def event_stream():
+        loop = asyncio.get_running_loop()
+        yield _sse('job', {'job_id': job.id, 'status_url': f"/jobs/{job.id}"})
+        last_sent = time.monotonic()
+        try:
+            while True:
+                done = job.future.done()
+                event = await loop.run_in_executor(
+                    None, _next_event, event_queue, 0 if done else STREAM_POLL_SECONDS
+                )
+                if event is not None:
+                    yield _sse(event.pop('event'), event)
+                    last_sent = time.monotonic()
+                elif done:
+                    # Job finished and its events are drained
+                    break
+                elif time.monotonic() - last_sent >= STREAM_HEARTBEAT_SECONDS:
+                    yield ": heartbeat\n\n"
+                    last_sent = time.monotonic()
+            
+            if job.status == 'succeeded':
+                yield _sse('result', PredictionResponse(**job.result).model_dump())
+            else:
+                yield _sse('error', {'detail': f"Prediction failed: {job.error}"})
+        finally:
+            # Client went away (or stream ended): stop the run if still going
+            if not job.future.done():
+                cancel_event.set()
+                job.future.cancel()
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=headers)
+
+
+def _csv_download(path: str, kind: str, if_none_match: str, if_modified_since: str,
+                  accept_encoding: str, range_header: str, if_range: str) -> Response:
+    """
+    Stream a CSV rendered on demand from a stored artifact.
+    
+    Headers (ETag, length) come from the artifact's trailer, written with
+    the artifact, so nothing is rendered or hashed per request. Rows are
+    read, rendered and (optionally) gzip/deflate-compressed one stored chunk
+    at a time, so the download starts immediately and memory stays flat. A
+    single byte range of the uncompressed CSV is honoured, reading only the
+    chunks it covers; a request with a Range header is never compressed. This does blocking file I/O, so the endpoints run
+    it in the thread pool.
+    
+    Args:
+        path: CSV name returned by /predict (only the file name is used)
+        kind: Artifact kind, 'features' or 'predictions'
+        if_none_match: If-None-Match header value (optional)
+        if_modified_since: If-Modified-Since header value (optional)
+        accept_encoding: Accept-Encoding header value (optional)
+        range_header: Range header value (optional)
+        if_range: If-Range header value (optional)
+    
+    Returns:
+        Response: 304, 206 with the requested range, or the full CSV stream
+    
+    Raises:
+        HTTPException: 400 for an invalid name, 404 if not found, 416 for an
+        unsatisfiable range
+    """
+    try:
+        name = parse_artifact_name(path, kind)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Validate artifact exists
+    try:
+        stat_result = os.stat(artifact_path(name))
+        info = artifact_info(name)
+    except FileNotFoundError:
+        info = None
+    if info is None:
         raise HTTPException(
             status_code=404,
             detail=f"File not found: {path}"
         )
     
-    # Extract filename from path
-    filename = os.path.basename(path)
+    # Ranges are of the uncompressed CSV, whose length is stored, so a Range
+    # request is served uncompressed whatever Accept-Encoding allows
+    encoding = 'identity' if range_header else negotiate_encoding(accept_encoding)
+    etag = f'"{info["sha256"][:32]}"'
+    if encoding != 'identity':
+        # Each content coding is a different representation
+        etag = f'{etag[:-1]}-{encoding}"'
+    last_modified = http_date(stat_result.st_mtime)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': last_modified,
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding',
+        'Content-Disposition': f'attachment; filename="{name}"'
+    }
+    
+    # If-None-Match takes precedence over If-Modified-Since
+    if if_none_match:
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+    elif not_modified_since(if_modified_since, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
     
-    # Return file as download
-    return FileResponse(
-        path=path,
-        media_type="text/csv",
-        filename=filename
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+        _, chunks = _open_csv_chunks(name, path)
+        return StreamingResponse(compress_chunks(chunks, encoding), media_type="text/csv", headers=headers)
+    
+    headers['Accept-Ranges'] = 'bytes'
+    length = info['csv_bytes']
+    # A stale If-Range validator means the client wants the whole new file
+    if range_header and (not if_range or if_range.strip() in (etag, last_modified)):
+        try:
+            byte_range = parse_byte_range(range_header, length)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=416,
+                detail=str(e),
+                headers={'Content-Range': f"bytes */{length}"}
+            )
+        if byte_range is not None:
+            start, end = byte_range
+            offset, chunks = _open_csv_chunks(name, path, start)
+            headers['Content-Range'] = f"bytes {start}-{end}/{length}"
+            headers['Content-Length'] = str(end - start + 1)
+            return StreamingResponse(
+                slice_chunks(chunks, start - offset, end - offset),
+                status_code=206, media_type="text/csv", headers=headers
+            )
+    
+    headers['Content-Length'] = str(length)
+    _, chunks = _open_csv_chunks(name, path)
+    return StreamingResponse(chunks, media_type="text/csv", headers=headers)
+
+
+def _open_csv_chunks(name: str, path: str, first_byte: int = 0) -> tuple:
+    """Open an artifact's CSV stream, or raise 404 if it vanished since the lookup."""
+    try:
+        return artifact_csv_chunks(name, first_byte)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"File not found: {path}")
+
+
+@app.get("/download/features", tags=["Download"])
+async def download_features(
+    path: str = Query(..., description="Features CSV name returned by /predict"),
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    range: Optional[str] = Header(None),
+    if_range: Optional[str] = Header(None)
+):
+    """
+    Download features CSV file.
+    
+    Args:
+        path: Features CSV name returned by /predict
+        if_none_match: If-None-Match header
+        if_modified_since: If-Modified-Since header
+        accept_encoding: Accept-Encoding header (gzip and deflate supported)
+        range: Range header (single byte range of the uncompressed CSV; disables compression)
+        if_range: If-Range header
+    
+    Returns:
+        StreamingResponse: CSV stream (206 for a range, 304 if the client's copy is current)
+    
+    Raises:
+        HTTPException: 400 for an invalid name, 404 if not found, 416 for an unsatisfiable range
+    """
+    return await run_in_threadpool(
+        _csv_download, path, 'features', if_none_match, if_modified_since, accept_encoding, range, if_range
     )
 
 
 @app.get("/download/predictions", tags=["Download"])
-async def download_predictions(path: str = Query(..., description="Path to predictions CSV file")):
+async def download_predictions(
+    path: str = Query(..., description="Predictions CSV name returned by /predict"),
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    range: Optional[str] = Header(None),
+    if_range: Optional[str] = Header(None)
+):
     """
     Download predictions CSV file.
     
     Args:
-        path: Path to the predictions CSV file
+        path: Predictions CSV name returned by /predict
+        if_none_match: If-None-Match header
+        if_modified_since: If-Modified-Since header
+        accept_encoding: Accept-Encoding header (gzip and deflate supported)
+        range: Range header (single byte range of the uncompressed CSV; disables compression)
+        if_range: If-Range header
+    
+    Returns:
+        StreamingResponse: CSV stream (206 for a range, 304 if the client's copy is current)
+    
+    Raises:
+        HTTPException: 400 for an invalid name, 404 if not found, 416 for an unsatisfiable range
+    """
+    return await run_in_threadpool(
+        _csv_download, path, 'predictions', if_none_match, if_modified_since, accept_encoding, range, if_range
+    )
+
+
+@app.get("/traces/{trace_id}", tags=["Profiling"])
+async def get_trace(trace_id: str):
+    """
+    Stored profiling trace endpoint.
+    
+    Args:
+        trace_id: Trace identifier from the X-Kassandra-Trace header
     
     Returns:
-        FileResponse: CSV file download
+        FileResponse: Trace JSON (spans, and cProfile / tracemalloc tables when collected)
     
     Raises:
-        HTTPException: 404 if file not found
+        HTTPException: 400 for a malformed id, 404 if the trace does not exist
+    """
+    return _trace_file(trace_id, '.json', "application/json")
+
+
+@app.get("/traces/{trace_id}/profile", tags=["Profiling"])
+async def get_trace_profile(trace_id: str):
     """
-    # Validate file exists
+    Raw cProfile stats of a trace, loadable with pstats or snakeviz.
+    
+    Args:
+        trace_id: Trace identifier
+    
+    Returns:
+        FileResponse: .prof file download
+    
+    Raises:
+        HTTPException: 400 for a malformed id, 404 if no cProfile stats were collected
+    """
+    return _trace_file(trace_id, '.prof', "application/octet-stream")
+
+
+def _trace_file(trace_id: str, suffix: str, media_type: str) -> FileResponse:
+    """Serve a stored trace file."""
+    try:
+        path = trace_path(trace_id, suffix)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     if not os.path.exists(path):
         raise HTTPException(
             status_code=404,
-            detail=f"File not found: {path}"
+            detail=f"Trace not found: {trace_id}"
         )
     
-    # Extract filename from path
-    filename = os.path.basename(path)
+    return FileResponse(path=path, media_type=media_type, filename=os.path.basename(path))
+
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Health"])
+async def metrics():
+    """
+    Prometheus metrics endpoint.
     
-    # Return file as download
-    return FileResponse(
-        path=path,
-        media_type="text/csv",
-        filename=filename
-    )
+    Exposes pipeline stage latency histograms, upstream source outcomes
+    (ok / empty / error), response cache hit ratio, in-flight jobs and HTTP
+    request metrics in the Prometheus text format.
+    
+    Returns:
+        PlainTextResponse: Metrics exposition
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 @app.get("/", tags=["Root"])
@@ -165,7 +911,11 @@ async def root():
         "status": "operational",
         "endpoints": {
             "health": "/health",
+            "metrics": "/metrics",
             "predict": "/predict",
+            "predict_stream": "/predict/stream",
+            "predict_batch": "/predict/batch",
+            "jobs": "/jobs/{job_id}",
             "download_features": "/download/features",
             "download_predictions": "/download/predictions",
             "docs": "/docs",
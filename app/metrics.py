@@ -0,0 +1,301 @@
+"""
+API Metrics
+
+Minimal in-process metric registry rendered in the Prometheus text
+exposition format at /metrics. Pipeline stages run in worker processes, so
+their timings travel back with each job result and are recorded here when the
+job finishes.
+"""
+import threading
+from services.tracking import PipelineCancelled
+from utils.admission import admission_snapshot
+
+
+# Histogram buckets (seconds) for pipeline stages and HTTP requests
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# Pipeline stage -> upstream data source it fetches
+STAGE_SOURCES = {
+    'fetch_prices': 'prices',
+    'fetch_news': 'news',
+    'fetch_trends': 'trends',
+    'fetch_wiki': 'wiki',
+}
+
+
+def _escape(value) -> str:
+    """Escape a label value."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: tuple) -> str:
+    """Render a sorted (name, value) label tuple."""
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value."""
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """
+    Base class for labelled metrics.
+
+    A metric built with a callback reads its values at render time instead:
+    the callback returns either a value or a {labels tuple: value} dict.
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, help_text: str, callback=None):
+        self.name = name
+        self.help_text = help_text
+        self.callback = callback
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def render(self) -> list:
+        """Exposition lines for this metric."""
+        if self.callback is not None:
+            value = self.callback()
+            values = value if isinstance(value, dict) else {(): value}
+            with self._lock:
+                self._values = dict(values)
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket distribution of observations."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][i] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for labels, state in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, state['counts']):
+                    bucket_labels = labels + (('le', _format_value(bound)),)
+                    lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {state['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(state['sum'])}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {state['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, callback=None) -> Counter:
+        return self.register(Counter(name, help_text, callback))
+
+    def gauge(self, name: str, help_text: str, callback=None) -> Gauge:
+        return self.register(Gauge(name, help_text, callback))
+
+    def histogram(self, name: str, help_text: str, buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, buckets))
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            Exposition text
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+stage_duration = registry.histogram(
+    'kassandra_stage_duration_seconds', 'Pipeline stage latency'
+)
+predictions_total = registry.counter(
+    'kassandra_predictions_total', 'Finished pipeline jobs by kind and outcome'
+)
+upstream_results_total = registry.counter(
+    'kassandra_upstream_results_total', 'Upstream data source fetches by outcome (ok, empty, error, timeout)'
+)
+degraded_sources_total = registry.counter(
+    'kassandra_degraded_sources_total', 'Sources replaced by cached or neutral values, by source and reason'
+)
+http_requests_total = registry.counter(
+    'kassandra_http_requests_total', 'HTTP requests by route and status code'
+)
+http_request_duration = registry.histogram(
+    'kassandra_http_request_duration_seconds', 'HTTP request latency by route'
+)
+http_requests_in_flight = registry.gauge(
+    'kassandra_http_requests_in_flight', 'HTTP requests currently being served'
+)
+
+
+def _admission_values(field: str):
+    """Callback reading one admission field per upstream from the shared state."""
+    def read():
+        return {(('source', source),): stats[field] for source, stats in admission_snapshot().items()}
+    return read
+
+
+# Upstream admission state is shared by every worker process, so it is read at scrape time
+registry.gauge(
+    'kassandra_upstream_in_flight', 'Upstream calls currently admitted, by source',
+    callback=_admission_values('in_flight')
+)
+registry.gauge(
+    'kassandra_upstream_waiting', 'Upstream calls queued for admission (queue depth), by source',
+    callback=_admission_values('waiting')
+)
+registry.counter(
+    'kassandra_upstream_admitted_total', 'Upstream calls admitted, by source',
+    callback=_admission_values('calls')
+)
+registry.counter(
+    'kassandra_upstream_admission_wait_seconds_total', 'Seconds spent waiting for upstream admission, by source',
+    callback=_admission_values('wait_seconds')
+)
+registry.counter(
+    'kassandra_upstream_admission_timeouts_total', 'Upstream calls refused after waiting too long, by source',
+    callback=_admission_values('timeouts')
+)
+
+
+def record_pipeline_result(result: dict, kind: str = 'single') -> None:
+    """
+    Record stage timings and upstream outcomes of a finished pipeline run.
+
+    Args:
+        result: run_prediction result, or run_batch_prediction result
+        kind: 'single' or 'batch'
+    """
+    predictions_total.inc(kind=kind, outcome='succeeded')
+
+    for stage, seconds in result.get('stage_timings', {}).items():
+        stage_duration.observe(seconds, stage=stage)
+    _record_sources(result)
+
+    # Batch results nest one run_prediction result per ticker
+    for ticker_result in result.get('results', {}).values():
+        for stage, seconds in ticker_result.get('stage_timings', {}).items():
+            stage_duration.observe(seconds, stage=stage)
+        _record_sources(ticker_result)
+
+    for _ in result.get('errors', {}):
+        predictions_total.inc(kind='batch_ticker', outcome='failed')
+
+
+def _record_sources(result: dict) -> None:
+    """Record upstream outcomes and degraded sources of one ticker's result."""
+    degraded = result.get('degraded_sources', {})
+
+    for source, reason in degraded.items():
+        # Reasons look like 'timeout' or 'error, using cached data'
+        outcome = reason.split(',')[0]
+        degraded_sources_total.inc(source=source, reason=outcome)
+        if outcome != 'empty':
+            upstream_results_total.inc(source=source, outcome=outcome)
+
+    for source, rows in result.get('source_rows', {}).items():
+        if degraded.get(source, 'empty').split(',')[0] == 'empty':
+            upstream_results_total.inc(source=source, outcome='ok' if rows else 'empty')
+
+
+def record_pipeline_failure(error: BaseException, kind: str = 'single') -> None:
+    """
+    Record a failed pipeline run, attributing it to an upstream source when a
+    fetch stage raised.
+
+    Args:
+        error: Exception raised by the run
+        kind: 'single' or 'batch'
+    """
+    predictions_total.inc(kind=kind, outcome='failed')
+
+    source = STAGE_SOURCES.get(getattr(error, 'failed_stage', None))
+    if source is not None:
+        upstream_results_total.inc(source=source, outcome='error')
+
+
+def job_recorder(kind: str = 'single'):
+    """
+    Build a future done-callback that records a job's metrics once.
+
+    Args:
+        kind: 'single' or 'batch'
+
+    Returns:
+        Callable taking a concurrent.futures.Future
+    """
+    def record(future):
+        if future.cancelled() or isinstance(future.exception(), PipelineCancelled):
+            predictions_total.inc(kind=kind, outcome='cancelled')
+        elif future.exception() is not None:
+            record_pipeline_failure(future.exception(), kind)
+        else:
+            record_pipeline_result(future.result(), kind)
+    return record
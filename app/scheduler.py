@@ -0,0 +1,252 @@
+"""
+Precompute Scheduler
+
+Prices, news and the other sources only change once per trading session, so
+the predictions for a watchlist can be computed before anyone asks for them.
+After every session settles (see utils.dates), the scheduler runs the
+pipeline for each watched ticker and lookback window ending on that session.
+The run fills the shared data cache, the headline model cache and the stored
+artifacts, and writes the finished responses to the shared response tier,
+where every API worker finds them; requests for those ranges are then cache
+hits, until news for the ticker changes.
+
+Each response is stored under the data version (app.cache.data_version) as it
+stands after the run. That version includes the news archive's headlines for
+the range and the 30 days after it, which the sentiment features read, so it
+changes whenever a later poll archives a new headline for the ticker. A poll
+happens on any cache miss for the ticker once KASSANDRA_NEWS_REFRESH (15
+minutes by default) has passed, for example a request for another range. The
+precomputed response then stops matching, and the next request for its range
+is computed (and cached) again. Precomputed ranges therefore stay hits all day
+only for tickers whose news is not polled again in between.
+
+Configuration:
+    KASSANDRA_PRECOMPUTE_WATCHLIST  watchlist file (also starts the scheduler
+                                    inside the API process when set)
+    KASSANDRA_PRECOMPUTE_WINDOWS    comma-separated lookbacks in calendar days (default 365)
+    KASSANDRA_PRECOMPUTE_DELAY      seconds to wait after a settlement before running (default 0)
+    KASSANDRA_PRECOMPUTE_WORKERS    worker processes per run (default 1 inside the API,
+                                    KASSANDRA_WORKERS or the CPU count otherwise)
+
+Usage:
+    python -m app.scheduler --watchlist tickers.txt [--windows 90,365] [--once]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+from app.cache import ResponseCache, data_version, http_date
+from app.schemas import PredictionResponse
+from services.watchlist import read_watchlist, run_watchlist
+from utils.cache import get_cache
+from utils.dates import MARKET_TZ, last_settled_trading_day, next_settlement
+
+
+# Lookback windows (calendar days) precomputed when none are configured
+DEFAULT_WINDOWS = (365,)
+
+# Longest single sleep, so clock changes and stop requests are noticed
+MAX_SLEEP_SECONDS = 3600
+
+
+def parse_windows(value: str) -> list:
+    """
+    Parse a comma-separated list of lookback windows.
+
+    Args:
+        value: Windows in calendar days, e.g. "90,365"
+
+    Returns:
+        Sorted list of distinct positive day counts
+
+    Raises:
+        ValueError: If a window is not a positive integer or none is given
+    """
+    windows = set()
+    for token in value.split(','):
+        token = token.strip()
+        if not token:
+            continue
+        if not token.isdigit() or int(token) <= 0:
+            raise ValueError(f"Invalid precompute window '{token}': use a positive number of days")
+        windows.add(int(token))
+    if not windows:
+        raise ValueError("No precompute windows given")
+    return sorted(windows)
+
+
+def configured_windows() -> list:
+    """Lookback windows from KASSANDRA_PRECOMPUTE_WINDOWS, or DEFAULT_WINDOWS."""
+    value = os.environ.get('KASSANDRA_PRECOMPUTE_WINDOWS')
+    return parse_windows(value) if value else list(DEFAULT_WINDOWS)
+
+
+def precompute(stocks: list, windows: list = None, engine: str = None, workers: int = None,
+               as_of: str = None, response_cache: ResponseCache = None) -> dict:
+    """
+    Run the pipeline for every ticker and window ending on a settled session.
+
+    Args:
+        stocks: Ticker symbols
+        windows: Lookbacks in calendar days (defaults to configured_windows())
+        engine: Model engine name (optional)
+        workers: Worker processes (optional, see services.watchlist)
+        as_of: Last day of every range (defaults to the last settled trading day)
+        response_cache: Cache the responses are stored in (defaults to one
+            backed by the shared tier)
+
+    Returns:
+        dict containing:
+            - as_of: Last day of every range
+            - ranges: List of (start_date, end_date) tuples run
+            - stored: Number of responses stored (each valid until the
+              ticker's news archive changes, see the module docstring)
+            - degraded: List of (ticker, start_date) runs not stored because a source degraded
+            - errors: Dictionary mapping (ticker, start_date) -> error message
+            - wall_seconds: Time the whole run took
+    """
+    # Step 1: Resolve the ranges
+    windows = windows or configured_windows()
+    as_of = as_of or last_settled_trading_day()
+    end = date.fromisoformat(as_of)
+    ranges = [((end - timedelta(days=window)).isoformat(), as_of) for window in windows]
+
+    if response_cache is None:
+        response_cache = ResponseCache(shared=get_cache().shared)
+    if response_cache.shared is None:
+        print("Precompute: no shared cache tier (KASSANDRA_CACHE), responses stay in this process")
+
+    # Step 2: Run each window over the watchlist and store the complete results
+    stored = 0
+    degraded = []
+    errors = {}
+    start = time.perf_counter()
+    for start_date, end_date in ranges:
+        print(f"Precompute: {len(stocks)} ticker(s) from {start_date} to {end_date}")
+        batch = run_watchlist(stocks, start_date, end_date, engine=engine, workers=workers, export_csv=False)
+        engine = batch['model_engine']
+
+        for stock, result in batch['results'].items():
+            if result.get('degraded_sources'):
+                degraded.append((stock, start_date))
+                continue
+            key = (stock, start_date, end_date, engine)
+            response_cache.put((key, data_version(stock, start_date, end_date, engine)), {
+                'body': PredictionResponse(**result).model_dump(),
+                'last_modified': http_date(time.time())
+            })
+            stored += 1
+        for stock, error in batch['errors'].items():
+            errors[(stock, start_date)] = error
+
+    # Step 3: Report
+    wall = time.perf_counter() - start
+    print(f"Precompute: stored {stored} response(s), {len(degraded)} degraded, "
+          f"{len(errors)} failed in {wall:.1f}s")
+    return {
+        'as_of': as_of,
+        'ranges': ranges,
+        'stored': stored,
+        'degraded': degraded,
+        'errors': errors,
+        'wall_seconds': wall
+    }
+
+
+def run_scheduler(watchlist: str, windows: list = None, engine: str = None, workers: int = None,
+                  stop_event: threading.Event = None, response_cache: ResponseCache = None) -> None:
+    """
+    Precompute now, then again after every trading session settles.
+
+    The watchlist is re-read before each run, so edits take effect at the
+    next session. A failed run is reported and the schedule continues.
+
+    Args:
+        watchlist: Watchlist file path
+        windows: Lookbacks in calendar days (defaults to configured_windows())
+        engine: Model engine name (optional)
+        workers: Worker processes (optional)
+        stop_event: Event that ends the loop when set (optional)
+        response_cache: Cache the responses are stored in (optional)
+    """
+    stop_event = stop_event or threading.Event()
+    delay = float(os.environ.get('KASSANDRA_PRECOMPUTE_DELAY', 0))
+
+    while not stop_event.is_set():
+        try:
+            precompute(read_watchlist(watchlist), windows, engine=engine, workers=workers,
+                       response_cache=response_cache)
+        except Exception as e:
+            print(f"Precompute: run failed: {e}")
+
+        # Sleep until the next session has settled, in bounded steps
+        due = next_settlement() + timedelta(seconds=delay)
+        print(f"Precompute: next run at {due.isoformat()}")
+        while not stop_event.is_set():
+            remaining = (due - datetime.now(MARKET_TZ)).total_seconds()
+            if remaining <= 0:
+                break
+            stop_event.wait(min(remaining, MAX_SLEEP_SECONDS))
+
+
+def start_background(watchlist: str, response_cache: ResponseCache = None) -> tuple:
+    """
+    Run the scheduler in a daemon thread of this process.
+
+    Args:
+        watchlist: Watchlist file path
+        response_cache: Cache the responses are stored in (optional)
+
+    Returns:
+        Tuple of (thread, stop event)
+    """
+    stop_event = threading.Event()
+    workers = int(os.environ.get('KASSANDRA_PRECOMPUTE_WORKERS', 1))
+    thread = threading.Thread(
+        target=run_scheduler,
+        kwargs={'watchlist': watchlist, 'workers': workers, 'stop_event': stop_event,
+                'response_cache': response_cache},
+        name='kassandra-precompute',
+        daemon=True
+    )
+    thread.start()
+    return thread, stop_event
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute watchlist predictions after each trading session")
+    parser.add_argument('--watchlist', default=os.environ.get('KASSANDRA_PRECOMPUTE_WATCHLIST'),
+                        help="Watchlist file (defaults to KASSANDRA_PRECOMPUTE_WATCHLIST)")
+    parser.add_argument('--windows', help="Comma-separated lookbacks in calendar days (default 365)")
+    parser.add_argument('--engine', help="Model engine (see model/engines.py)")
+    parser.add_argument('--workers', type=int,
+                        default=int(os.environ['KASSANDRA_PRECOMPUTE_WORKERS'])
+                        if os.environ.get('KASSANDRA_PRECOMPUTE_WORKERS') else None,
+                        help="Worker processes per run")
+    parser.add_argument('--once', action='store_true', help="Run for the last settled session and exit")
+    args = parser.parse_args()
+
+    if not args.watchlist:
+        parser.error("--watchlist or KASSANDRA_PRECOMPUTE_WATCHLIST is required")
+    try:
+        windows = parse_windows(args.windows) if args.windows else configured_windows()
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.once:
+        summary = precompute(read_watchlist(args.watchlist), windows, engine=args.engine, workers=args.workers)
+        for (stock, start_date), error in summary['errors'].items():
+            print(f"  {stock} from {start_date}: {error}")
+        return 1 if summary['errors'] else 0
+
+    try:
+        run_scheduler(args.watchlist, windows, engine=args.engine, workers=args.workers)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
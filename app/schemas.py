@@ -3,8 +3,22 @@ API Schemas
 
 Pydantic models for request/response validation.
 """
-from pydantic import BaseModel, Field
-from typing import Dict
+from datetime import datetime
+from pydantic import BaseModel, Field, field_validator
+from typing import Dict, List, Optional, Union
+from model.engines import resolve_engine
+from services.batch_service import MAX_BATCH_SIZE
+
+
+# Upper bound on a client-supplied ingestion deadline
+MAX_DEADLINE_SECONDS = 300
+
+
+def _check_engine(engine: Optional[str]) -> Optional[str]:
+    """Reject an unknown engine name at the API edge, before anything is queued."""
+    if engine is None:
+        return None
+    return resolve_engine(engine)
 
 
 class PredictionRequest(BaseModel):
@@ -15,10 +29,16 @@ class PredictionRequest(BaseModel):
         stock: Stock ticker symbol (e.g., "TSLA", "NVDA")
         start_date: Start date in YYYY-MM-DD format
         end_date: End date in YYYY-MM-DD format
+        engine: Model engine name (optional, server default when omitted)
+        deadline_seconds: Time allowed for fetching the data sources (optional)
     """
     stock: str = Field(..., description="Stock ticker symbol", example="TSLA")
     start_date: str = Field(..., description="Start date (YYYY-MM-DD)", example="2025-01-01")
     end_date: str = Field(..., description="End date (YYYY-MM-DD)", example="2025-12-31")
+    engine: Optional[str] = Field(None, description="Model engine (random_forest, hist_gradient_boosting)", example="random_forest")
+    deadline_seconds: Optional[float] = Field(
+        None, gt=0, le=MAX_DEADLINE_SECONDS, description="Seconds allowed for fetching data sources (server default when omitted)"
+    )
     
     class Config:
         json_schema_extra = {
@@ -28,6 +48,36 @@ class PredictionRequest(BaseModel):
                 "end_date": "2025-06-30"
             }
         }
+    
+    @field_validator('engine')
+    @classmethod
+    def check_engine(cls, engine: Optional[str]) -> Optional[str]:
+        """Reject an unknown engine with a validation error (422)."""
+        return _check_engine(engine)
+    
+    def normalized_key(self) -> tuple:
+        """
+        Canonical identity of the request, used to coalesce identical calls.
+        
+        Tickers are upper-cased, dates zero-padded and the engine resolved to
+        its configured default. Dates that fail to parse are kept as sent so
+        the pipeline reports the error.
+        
+        Returns:
+            Tuple of (stock, start_date, end_date, engine)
+        """
+        def normalize_date(value: str) -> str:
+            try:
+                return datetime.strptime(value.strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+            except ValueError:
+                return value
+        
+        return (
+            self.stock.strip().upper(),
+            normalize_date(self.start_date),
+            normalize_date(self.end_date),
+            resolve_engine(self.engine)
+        )
 
 
 class PredictionResponse(BaseModel):
@@ -40,12 +90,24 @@ class PredictionResponse(BaseModel):
         feature_csv_path: Path to exported features CSV
         prediction_csv_path: Path to exported prediction log CSV
         last_updated: ISO timestamp of prediction generation
+        model_engine: Model engine used for training
+        fit_count: Number of model fits performed for the request
+        stage_timings: Seconds spent in each pipeline stage
+        degraded_sources: Sources replaced by cached or neutral values, with the reason
+        trace_id: Stored profiling trace id (profiled requests only)
     """
     predicted_close: float = Field(..., description="Predicted next-day closing price")
     sentiment_breakdown: Dict[str, float] = Field(..., description="Sentiment source breakdown")
     feature_csv_path: str = Field(..., description="Path to features CSV")
     prediction_csv_path: str = Field(..., description="Path to predictions CSV")
     last_updated: str = Field(..., description="ISO timestamp")
+    model_engine: str = Field("random_forest", description="Model engine used for training")
+    fit_count: int = Field(0, description="Number of model fits performed for the request")
+    stage_timings: Dict[str, float] = Field(default_factory=dict, description="Seconds spent in each pipeline stage")
+    degraded_sources: Dict[str, str] = Field(
+        default_factory=dict, description="Sources replaced by cached or neutral values (timeout, error, empty)"
+    )
+    trace_id: Optional[str] = Field(None, description="Stored profiling trace id (profiled requests only)")
     
     class Config:
         json_schema_extra = {
@@ -62,11 +124,80 @@ class PredictionResponse(BaseModel):
                 },
                 "feature_csv_path": "features_NVDA_2025-02-01_to_2025-06-30.csv",
                 "prediction_csv_path": "predictions_NVDA_2025-02-01_to_2025-06-30.csv",
-                "last_updated": "2026-01-09T00:00:06.574844"
+                "last_updated": "2026-01-09T00:00:06.574844",
+                "model_engine": "random_forest",
+                "fit_count": 66
             }
         }
 
 
+class BatchPredictionRequest(BaseModel):
+    """
+    Request model for the batch prediction endpoint.
+    
+    Attributes:
+        stocks: Stock ticker symbols (duplicates are ignored)
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        engine: Model engine name (optional, server default when omitted)
+        deadline_seconds: Time allowed for fetching the data sources (optional)
+    """
+    stocks: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE, description="Stock ticker symbols")
+    start_date: str = Field(..., description="Start date (YYYY-MM-DD)", example="2025-01-01")
+    end_date: str = Field(..., description="End date (YYYY-MM-DD)", example="2025-12-31")
+    engine: Optional[str] = Field(None, description="Model engine (random_forest, hist_gradient_boosting)", example="random_forest")
+    deadline_seconds: Optional[float] = Field(
+        None, gt=0, le=MAX_DEADLINE_SECONDS, description="Seconds allowed for fetching data sources (server default when omitted)"
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "stocks": ["NVDA", "AAPL", "MSFT"],
+                "start_date": "2025-02-01",
+                "end_date": "2025-06-30"
+            }
+        }
+    
+    @field_validator('engine')
+    @classmethod
+    def check_engine(cls, engine: Optional[str]) -> Optional[str]:
+        """Reject an unknown engine with a validation error (422)."""
+        return _check_engine(engine)
+    
+    def ticker_requests(self) -> list:
+        """
+        Split the batch into per-ticker requests.
+        
+        Returns:
+            List of PredictionRequest, one per distinct normalized ticker
+        """
+        requests = {}
+        for stock in self.stocks:
+            request = PredictionRequest(
+                stock=stock, start_date=self.start_date, end_date=self.end_date, engine=self.engine,
+                deadline_seconds=self.deadline_seconds
+            )
+            requests.setdefault(request.normalized_key()[0], request)
+        return list(requests.values())
+
+
+class BatchPredictionResponse(BaseModel):
+    """
+    Response model for the batch prediction endpoint.
+    
+    Attributes:
+        results: Per-ticker prediction results
+        errors: Per-ticker error messages
+        model_engine: Model engine used for training
+        stage_timings: Seconds spent in each shared pipeline stage
+    """
+    results: Dict[str, PredictionResponse] = Field(default_factory=dict, description="Per-ticker prediction results")
+    errors: Dict[str, str] = Field(default_factory=dict, description="Per-ticker error messages")
+    model_engine: str = Field("random_forest", description="Model engine used for training")
+    stage_timings: Dict[str, float] = Field(default_factory=dict, description="Seconds spent in each shared pipeline stage")
+
+
 class HealthResponse(BaseModel):
     """
     Response model for health check endpoint.
@@ -85,3 +216,46 @@ class HealthResponse(BaseModel):
                 "timestamp": "2026-01-09T00:00:00.000000"
             }
         }
+
+
+class JobResponse(BaseModel):
+    """
+    Response model for an enqueued prediction job.
+    
+    Attributes:
+        job_id: Job identifier
+        status: Job status (queued, running, succeeded, failed)
+        status_url: URL to poll for status and result
+    """
+    job_id: str = Field(..., description="Job identifier")
+    status: str = Field(..., description="Job status")
+    status_url: str = Field(..., description="URL to poll for status and result")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "job_id": "3f2b8c1e9a7d4e0f8b6a5c4d3e2f1a0b",
+                "status": "queued",
+                "status_url": "/jobs/3f2b8c1e9a7d4e0f8b6a5c4d3e2f1a0b"
+            }
+        }
+
+
+class JobStatusResponse(BaseModel):
+    """
+    Response model for job status polling.
+    
+    Attributes:
+        job_id: Job identifier
+        status: Job status (queued, running, succeeded, failed)
+        created_at: ISO timestamp of submission
+        finished_at: ISO timestamp of completion
+        result: Prediction result once succeeded
+        error: Error message once failed
+    """
+    job_id: str = Field(..., description="Job identifier")
+    status: str = Field(..., description="Job status")
+    created_at: str = Field(..., description="ISO timestamp of submission")
+    finished_at: Optional[str] = Field(None, description="ISO timestamp of completion")
+    result: Optional[Union[PredictionResponse, BatchPredictionResponse]] = Field(None, description="Prediction result once succeeded")
+    error: Optional[str] = Field(None, description="Error message once failed")
@@ -0,0 +1,144 @@
+"""
+Streaming Download Helpers
+
+Content-encoding negotiation, incremental compression and byte-range slicing
+for responses generated chunk by chunk, so large downloads start immediately
+and never have to be held in memory as a whole.
+"""
+import re
+import zlib
+
+
+# Supported content codings in order of preference, with their zlib wbits
+ENCODINGS = {
+    'gzip': 16 + zlib.MAX_WBITS,
+    'deflate': zlib.MAX_WBITS,
+}
+
+COMPRESSION_LEVEL = 6
+
+_RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def negotiate_encoding(accept_encoding: str) -> str:
+    """
+    Pick a content coding from an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Header value (may be None)
+
+    Returns:
+        'gzip', 'deflate', or 'identity'
+    """
+    if not accept_encoding:
+        return 'identity'
+
+    weights = {}
+    for item in accept_encoding.split(','):
+        parts = [part.strip() for part in item.split(';')]
+        coding = parts[0].lower()
+        weight = 1.0
+        for param in parts[1:]:
+            if param.startswith('q='):
+                try:
+                    weight = float(param[2:])
+                except ValueError:
+                    weight = 0.0
+        weights[coding] = weight
+
+    best = 'identity'
+    best_weight = 0.0
+    for coding in ENCODINGS:
+        weight = weights.get(coding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+
+    return best
+
+
+def compress_chunks(chunks, encoding: str):
+    """
+    Compress a byte stream incrementally.
+
+    Args:
+        chunks: Iterable of bytes
+        encoding: 'gzip' or 'deflate' ('identity' passes chunks through)
+
+    Yields:
+        bytes: Compressed chunks
+    """
+    if encoding not in ENCODINGS:
+        yield from chunks
+        return
+
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, ENCODINGS[encoding])
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def parse_byte_range(range_header: str, length: int):
+    """
+    Parse a single-range Range header.
+
+    Multiple ranges are not supported and are treated as no Range header,
+    which lets the server answer with the full representation.
+
+    Args:
+        range_header: Header value (may be None)
+        length: Total representation length in bytes
+
+    Returns:
+        (start, end) inclusive byte positions, or None for a full response
+
+    Raises:
+        ValueError: If the range is not satisfiable
+    """
+    if not range_header:
+        return None
+
+    match = _RANGE_PATTERN.match(range_header.strip())
+    if match is None:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # Suffix range: the final N bytes
+        suffix = int(last)
+        if suffix == 0:
+            raise ValueError("Empty suffix range")
+        return max(0, length - suffix), length - 1
+
+    start = int(first)
+    end = min(int(last), length - 1) if last else length - 1
+    if start >= length or start > end:
+        raise ValueError(f"Range {range_header} not satisfiable for length {length}")
+
+    return start, end
+
+
+def slice_chunks(chunks, start: int, end: int):
+    """
+    Select an inclusive byte range from a byte stream.
+
+    Args:
+        chunks: Iterable of bytes
+        start: First byte position
+        end: Last byte position (inclusive)
+
+    Yields:
+        bytes: The selected bytes, chunk by chunk
+    """
+    position = 0
+    for chunk in chunks:
+        chunk_end = position + len(chunk)
+        if chunk_end > start:
+            yield chunk[max(0, start - position):end + 1 - position]
+        position = chunk_end
+        if position > end:
+            break
@@ -0,0 +1,6 @@
+"""
+Benchmarks Package
+
+Offline benchmarks for the Kassandra ML pipeline. All inputs are generated
+synthetically so no benchmark touches the network.
+"""
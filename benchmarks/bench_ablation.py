@@ -0,0 +1,43 @@
+"""
+Feature ablation benchmark.
+
+Runs the leave-one-source-out ablation with permutation importances serially
+and concurrently on synthetic data and prints per-source importances.
+
+Usage:
+    python -m benchmarks.bench_ablation [--days 750] [--repeats 5]
+"""
+import argparse
+import time
+from model.ablation import run_ablation, leave_one_source_out_sets
+from benchmarks.synthetic import make_feature_frame, SENTIMENT_FEATURE_COLS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark feature ablation")
+    parser.add_argument('--days', type=int, default=750, help="Trading days of synthetic data")
+    parser.add_argument('--repeats', type=int, default=5, help="Permutation repeats")
+    parser.add_argument('--engine', default=None, help="Model engine")
+    args = parser.parse_args()
+    
+    features = make_feature_frame(args.days)
+    feature_sets = leave_one_source_out_sets(SENTIMENT_FEATURE_COLS)
+    
+    timings = {}
+    for label, workers in [('serial', 1), ('parallel', None)]:
+        t0 = time.perf_counter()
+        results = run_ablation(features, feature_sets, engine=args.engine,
+                               permutation_repeats=args.repeats, max_workers=workers)
+        timings[label] = time.perf_counter() - t0
+    
+    print(f"{'feature_set':<16} {'rmse':>8}  source importance (MAE increase)")
+    for name, metrics in results.items():
+        importance = ', '.join(f"{k}={v:.3f}" for k, v in metrics['source_importance'].items())
+        print(f"{name:<16} {metrics['rmse']:>8.3f}  {importance}")
+    
+    print(f"\nSerial:   {timings['serial']:.2f} s")
+    print(f"Parallel: {timings['parallel']:.2f} s  ({timings['serial'] / timings['parallel']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Batch next-day prediction benchmark.
+
+Compares scoring a watchlist with one predict_next_close call per ticker
+against a single predict_next_close_batch call on a pooled model.
+
+Usage:
+    python -m benchmarks.bench_batch_predict [--tickers 500] [--days 250]
+"""
+import argparse
+import time
+from model.train import train_pooled_model
+from model.predict import predict_next_close, predict_next_close_batch, latest_feature_rows
+from benchmarks.synthetic import make_feature_frame, SENTIMENT_FEATURE_COLS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch next-day prediction")
+    parser.add_argument('--tickers', type=int, default=500, help="Watchlist size")
+    parser.add_argument('--days', type=int, default=250, help="Trading days per ticker")
+    parser.add_argument('--engine', default=None, help="Model engine")
+    args = parser.parse_args()
+    
+    features_by_ticker = {f"T{i:04d}": make_feature_frame(args.days, seed=i) for i in range(args.tickers)}
+    model = train_pooled_model(features_by_ticker, SENTIMENT_FEATURE_COLS, engine=args.engine)
+    
+    t0 = time.perf_counter()
+    single = [predict_next_close(model, df.iloc[-1], SENTIMENT_FEATURE_COLS) for df in features_by_ticker.values()]
+    single_s = time.perf_counter() - t0
+    
+    t0 = time.perf_counter()
+    latest_rows = latest_feature_rows(features_by_ticker)
+    batch = predict_next_close_batch(model, latest_rows, SENTIMENT_FEATURE_COLS)
+    batch_s = time.perf_counter() - t0
+    
+    max_diff = max(abs(a - b) for a, b in zip(single, batch.values))
+    print(f"Tickers:           {args.tickers}")
+    print(f"Per-ticker predict: {single_s * 1000:.1f} ms")
+    print(f"Batch predict:      {batch_s * 1000:.1f} ms  ({single_s / batch_s:.1f}x)")
+    print(f"Max abs difference: {max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Compiled forest inference benchmark.
+
+Measures compile time and predict latency of the compiled forest against
+scikit-learn for single rows and batches, and checks predictions match exactly.
+
+Usage:
+    python -m benchmarks.bench_compiled [--days 1000] [--engine random_forest]
+"""
+import argparse
+import time
+import numpy as np
+from model.engines import available_engines, make_model
+from model.compiled import compile_model, predict_once
+from benchmarks.synthetic import make_feature_frame, SENTIMENT_FEATURE_COLS
+
+
+def _median_ms(fn, repeats: int) -> float:
+    """Median wall time of fn() in milliseconds."""
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return 1000 * float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compiled forest inference")
+    parser.add_argument('--days', type=int, default=1000, help="Trading days of synthetic data")
+    parser.add_argument('--engine', default=None, help="Engine to benchmark (default: all)")
+    parser.add_argument('--repeats', type=int, default=30, help="Timed repetitions")
+    args = parser.parse_args()
+    
+    df = make_feature_frame(args.days)
+    df['target'] = df['Close'].shift(-1)
+    df = df.dropna()
+    X = df[SENTIMENT_FEATURE_COLS].values
+    y = df['target'].values
+    split_idx = int(len(X) * 0.8)
+    
+    engines = [args.engine] if args.engine else available_engines()
+    for engine in engines:
+        model = make_model(engine)
+        model.fit(X[:split_idx], y[:split_idx])
+        
+        compile_ms = _median_ms(lambda: compile_model(model), max(3, args.repeats // 10))
+        compiled = compile_model(model)
+        row, batch = X[-1:], X[split_idx:]
+        
+        exact = (np.array_equal(model.predict(batch), compiled.predict(batch))
+                 and np.array_equal(model.predict(row), predict_once(model, row)))
+        
+        print(f"\n{engine} ({compiled.n_trees} trees, {len(compiled.feature)} nodes, depth {compiled.depth})")
+        print(f"  Exact match:              {exact}")
+        print(f"  Compile:                  {compile_ms:8.2f} ms")
+        print(f"  sklearn 1 row:            {_median_ms(lambda: model.predict(row), args.repeats):8.2f} ms")
+        print(f"  compiled 1 row:           {_median_ms(lambda: compiled.predict(row), args.repeats):8.2f} ms")
+        print(f"  predict_once 1 row:       {_median_ms(lambda: predict_once(model, row), args.repeats):8.2f} ms")
+        print(f"  sklearn {len(batch)} rows:        {_median_ms(lambda: model.predict(batch), args.repeats):8.2f} ms")
+        print(f"  compiled {len(batch)} rows:       {_median_ms(lambda: compiled.predict(batch), args.repeats):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
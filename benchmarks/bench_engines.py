@@ -0,0 +1,100 @@
+"""
+Model engine benchmark.
+
+Compares fit time, single-row predict latency and walk-forward error of every
+registered engine on the same synthetic feature sets.
+
+Usage:
+    python -m benchmarks.bench_engines [--days 500] [--repeats 3] [--step 5]
+"""
+import argparse
+import time
+import numpy as np
+from model.engines import available_engines, make_model
+from benchmarks.synthetic import make_feature_frame, SENTIMENT_FEATURE_COLS, PRICE_FEATURE_COLS
+
+
+def _supervised(features, feature_cols):
+    """Build (X, y) for next-day close prediction."""
+    df = features.copy()
+    df['target'] = df['Close'].shift(-1)
+    df = df.dropna()
+    return df[feature_cols].values, df['target'].values
+
+
+def bench_engine(engine: str, X: np.ndarray, y: np.ndarray, repeats: int, step: int,
+                 min_train_size: int = 30) -> dict:
+    """
+    Time one engine on one feature matrix.
+    
+    Args:
+        engine: Engine name
+        X: Feature matrix
+        y: Next-day close targets
+        repeats: Number of timed full fits / predicts
+        step: Walk-forward stride (1 reproduces the prediction log exactly)
+        min_train_size: Minimum training rows for the walk-forward
+    
+    Returns:
+        Dictionary of timing and error metrics
+    """
+    fit_times = []
+    for _ in range(repeats):
+        model = make_model(engine)
+        t0 = time.perf_counter()
+        model.fit(X, y)
+        fit_times.append(time.perf_counter() - t0)
+    
+    row = X[-1:].copy()
+    predict_times = []
+    for _ in range(repeats * 10):
+        t0 = time.perf_counter()
+        model.predict(row)
+        predict_times.append(time.perf_counter() - t0)
+    
+    errors = []
+    t0 = time.perf_counter()
+    for i in range(min_train_size, len(X), step):
+        model = make_model(engine)
+        model.fit(X[:i], y[:i])
+        errors.append(model.predict(X[i:i + 1])[0] - y[i])
+    walk_forward_time = time.perf_counter() - t0
+    errors = np.asarray(errors)
+    
+    return {
+        'fit_ms': 1000 * float(np.median(fit_times)),
+        'predict_ms': 1000 * float(np.median(predict_times)),
+        'walk_forward_s': walk_forward_time,
+        'walk_forward_mae': float(np.mean(np.abs(errors))),
+        'walk_forward_rmse': float(np.sqrt(np.mean(errors ** 2))),
+        'walk_forward_fits': len(errors)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark model engines")
+    parser.add_argument('--days', type=int, default=500, help="Trading days of synthetic data")
+    parser.add_argument('--repeats', type=int, default=3, help="Timed repetitions")
+    parser.add_argument('--step', type=int, default=5, help="Walk-forward stride")
+    parser.add_argument('--seed', type=int, default=0, help="Synthetic data seed")
+    args = parser.parse_args()
+    
+    features = make_feature_frame(args.days, seed=args.seed)
+    feature_sets = {
+        'price_only': PRICE_FEATURE_COLS,
+        'sentiment_aware': SENTIMENT_FEATURE_COLS
+    }
+    
+    print(f"{'feature_set':<16} {'engine':<24} {'fit_ms':>9} {'predict_ms':>11} "
+          f"{'wf_s':>8} {'wf_mae':>8} {'wf_rmse':>8} {'fits':>5}")
+    for set_name, cols in feature_sets.items():
+        X, y = _supervised(features, cols)
+        for engine in available_engines():
+            r = bench_engine(engine, X, y, args.repeats, args.step)
+            print(f"{set_name:<16} {engine:<24} {r['fit_ms']:>9.1f} {r['predict_ms']:>11.2f} "
+                  f"{r['walk_forward_s']:>8.2f} {r['walk_forward_mae']:>8.3f} "
+                  f"{r['walk_forward_rmse']:>8.3f} {r['walk_forward_fits']:>5}")
+
+
+if __name__ == "__main__":
+    main()
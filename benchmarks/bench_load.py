@@ -0,0 +1,280 @@
+"""
+API load test with stubbed upstreams.
+
+Starts the API (benchmarks.load_app: app.main with synthetic data sources)
+under uvicorn in a scratch directory, drives POST /predict, and optionally
+the CSV downloads, at a fixed concurrency, and probes /health throughout.
+Reports throughput and p50/p95/p99 latency per endpoint, including /health
+latency while predictions run (a slow /health means the event loop is
+blocked). Run it for several worker-pool sizes to see how the service scales.
+
+Usage:
+    python -m benchmarks.bench_load [--workers 1,2,4] [--concurrency 4] [--requests 20]
+        [--days 120] [--tickers 0] [--downloads] [--latency 0.2] [--json results.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+import httpx
+import numpy as np
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Last day of every requested range (settled, so the data version is stable)
+END_DATE = date(2024, 6, 28)
+
+# Seconds between /health probes
+HEALTH_INTERVAL = 0.05
+
+# Seconds to wait for the server to answer /health after starting
+STARTUP_TIMEOUT = 120
+
+
+def latency_summary(latencies: list, errors: int, wall: float) -> dict:
+    """
+    Throughput and latency percentiles of one endpoint.
+
+    Args:
+        latencies: Seconds per successful request
+        errors: Number of failed requests
+        wall: Seconds the load phase lasted
+
+    Returns:
+        Dictionary with count, errors, rps and p50/p95/p99/max in milliseconds
+    """
+    summary = {'count': len(latencies), 'errors': errors, 'rps': len(latencies) / wall if wall else 0.0}
+    if latencies:
+        ms = np.asarray(latencies) * 1000
+        summary.update({
+            'p50_ms': float(np.percentile(ms, 50)),
+            'p95_ms': float(np.percentile(ms, 95)),
+            'p99_ms': float(np.percentile(ms, 99)),
+            'max_ms': float(ms.max())
+        })
+    return summary
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, latency: float, work_dir: str) -> tuple:
+    """
+    Start the stubbed API under uvicorn.
+
+    Args:
+        workers: Job-queue worker processes (KASSANDRA_WORKERS)
+        latency: Simulated seconds per upstream call
+        work_dir: Working directory (caches, artifacts and the server log go here)
+
+    Returns:
+        Tuple of (process, base URL)
+    """
+    port = _free_port()
+    env = dict(os.environ)
+    env.update({
+        'PYTHONPATH': os.pathsep.join(filter(None, [REPO_ROOT, env.get('PYTHONPATH')])),
+        'KASSANDRA_WORKERS': str(workers),
+        'KASSANDRA_STUB_LATENCY': str(latency),
+        'KASSANDRA_MAX_PENDING_JOBS': str(max(1024, workers)),
+    })
+    log = open(os.path.join(work_dir, 'server.log'), 'w')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'benchmarks.load_app:app',
+         '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning'],
+        cwd=work_dir, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    return process, f"http://127.0.0.1:{port}"
+
+
+async def wait_until_healthy(client: httpx.AsyncClient, process: subprocess.Popen) -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}")
+        try:
+            if (await client.get('/health')).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server not healthy after {STARTUP_TIMEOUT}s")
+
+
+async def probe_health(client: httpx.AsyncClient, stop: asyncio.Event, latencies: list) -> int:
+    """Probe /health until stop is set; returns the number of failed probes."""
+    errors = 0
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        try:
+            response = await client.get('/health')
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - t0)
+            else:
+                errors += 1
+        except httpx.HTTPError:
+            errors += 1
+        await asyncio.sleep(HEALTH_INTERVAL)
+    return errors
+
+
+async def run_load(base_url: str, process: subprocess.Popen, args, warmup_requests: int) -> dict:
+    """
+    Drive one running server.
+
+    Args:
+        base_url: Server URL
+        process: Server process (checked while waiting for start-up)
+        args: Parsed command-line arguments
+        warmup_requests: Unrecorded predictions sent before the load
+
+    Returns:
+        Dictionary mapping endpoint -> latency summary
+    """
+    start_date = (END_DATE - timedelta(days=args.days)).isoformat()
+    end_date = END_DATE.isoformat()
+    limits = httpx.Limits(max_connections=args.concurrency + 4)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=600, limits=limits) as client:
+        await wait_until_healthy(client, process)
+
+        # Idle /health latency, for comparison with the latency under load
+        idle = []
+        idle_stop = asyncio.Event()
+        prober = asyncio.create_task(probe_health(client, idle_stop, idle))
+        await asyncio.sleep(20 * HEALTH_INTERVAL)
+        idle_stop.set()
+        idle_errors = await prober
+
+        # Unrecorded requests so every worker has imported and warmed up
+        for i in range(warmup_requests):
+            body = {'stock': f"WARM{i}", 'start_date': start_date, 'end_date': end_date}
+            await client.post('/predict', json=body)
+
+        latencies = {'/predict': [], '/download/features': [], '/download/predictions': []}
+        errors = {endpoint: 0 for endpoint in latencies}
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def timed(endpoint, request):
+            t0 = time.perf_counter()
+            try:
+                response = await request
+                if response.status_code == 200:
+                    latencies[endpoint].append(time.perf_counter() - t0)
+                    return response
+            except httpx.HTTPError:
+                pass
+            errors[endpoint] += 1
+            return None
+
+        async def one(i):
+            ticker = f"LT{(i % args.tickers) if args.tickers else i:04d}"
+            body = {'stock': ticker, 'start_date': start_date, 'end_date': end_date}
+            async with semaphore:
+                response = await timed('/predict', client.post('/predict', json=body))
+                if response is None or not args.downloads:
+                    return
+                result = response.json()
+                await timed('/download/features',
+                            client.get('/download/features', params={'path': result['feature_csv_path']}))
+                await timed('/download/predictions',
+                            client.get('/download/predictions', params={'path': result['prediction_csv_path']}))
+
+        busy = []
+        busy_stop = asyncio.Event()
+        prober = asyncio.create_task(probe_health(client, busy_stop, busy))
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        wall = time.perf_counter() - t0
+        busy_stop.set()
+        busy_errors = await prober
+
+    results = {
+        endpoint: latency_summary(values, errors[endpoint], wall)
+        for endpoint, values in latencies.items() if values or errors[endpoint]
+    }
+    results['/health (idle)'] = latency_summary(idle, idle_errors, 20 * HEALTH_INTERVAL)
+    results['/health (under load)'] = latency_summary(busy, busy_errors, wall)
+    results['wall_s'] = wall
+    return results
+
+
+def print_results(workers: int, results: dict) -> None:
+    print(f"\n{'='*60}")
+    print(f"{workers} worker(s): load phase {results['wall_s']:.1f} s")
+    print(f"{'='*60}")
+    print(f"  {'endpoint':<24} {'count':>6} {'errors':>6} {'req/s':>7} {'p50 ms':>9} "
+          f"{'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for endpoint, summary in results.items():
+        if endpoint == 'wall_s':
+            continue
+        line = f"  {endpoint:<24} {summary['count']:>6} {summary['errors']:>6} {summary['rps']:>7.2f}"
+        if summary['count']:
+            line += (f" {summary['p50_ms']:>9.1f} {summary['p95_ms']:>9.1f} "
+                     f"{summary['p99_ms']:>9.1f} {summary['max_ms']:>9.1f}")
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the API with stubbed upstreams")
+    parser.add_argument('--workers', default='1', help="Comma-separated worker-pool sizes to test")
+    parser.add_argument('--concurrency', type=int, default=4, help="Requests in flight at once")
+    parser.add_argument('--requests', type=int, default=20, help="Predictions per worker-pool size")
+    parser.add_argument('--days', type=int, default=120, help="Calendar days per requested range")
+    parser.add_argument('--tickers', type=int, default=0,
+                        help="Distinct tickers to cycle through (0: a new ticker per request, no cache hits)")
+    parser.add_argument('--downloads', action='store_true', help="Also fetch both CSVs after each prediction")
+    parser.add_argument('--latency', type=float, default=0.0, help="Simulated seconds per upstream call")
+    parser.add_argument('--warmup-requests', type=int, default=None,
+                        help="Unrecorded predictions before the load (default: one per worker)")
+    parser.add_argument('--json', help="Write results to this file")
+    args = parser.parse_args()
+
+    worker_counts = [int(count) for count in args.workers.split(',') if count.strip()]
+    all_results = {}
+
+    for workers in worker_counts:
+        warmup_requests = workers if args.warmup_requests is None else args.warmup_requests
+        with tempfile.TemporaryDirectory(prefix='kassandra-load-') as work_dir:
+            process, base_url = start_server(workers, args.latency, work_dir)
+            try:
+                results = asyncio.run(run_load(base_url, process, args, warmup_requests))
+            except Exception:
+                with open(os.path.join(work_dir, 'server.log')) as f:
+                    print(f.read()[-4000:], file=sys.stderr)
+                raise
+            finally:
+                process.terminate()
+                try:
+                    process.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+        all_results[workers] = results
+        print_results(workers, results)
+
+    if len(worker_counts) > 1:
+        print(f"\n{'workers':>8} {'predict req/s':>14} {'predict p95 ms':>15} {'health p99 ms':>14}")
+        for workers, results in all_results.items():
+            predict = results['/predict']
+            health = results['/health (under load)']
+            print(f"{workers:>8} {predict['rps']:>14.2f} {predict.get('p95_ms', 0):>15.1f} "
+                  f"{health.get('p99_ms', 0):>14.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'arguments': vars(args), 'results': all_results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
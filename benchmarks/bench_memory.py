@@ -0,0 +1,339 @@
+"""
+Pipeline memory benchmark.
+
+Runs the same stages as bench_stages on synthetic data and records, per
+stage, the peak resident set size (sampled from /proc) and the tracemalloc
+peak, net allocation and top allocation sites. Each range runs in a fresh
+interpreter so one range's heap does not inflate the next. The footprint of
+a whole request (peak RSS over all stages above the RSS before the first
+one) is compared with a stored JSON baseline like the stage timings.
+
+Usage:
+    python -m benchmarks.bench_memory [--ranges 60d,1y,5y,20y] [--top 5]
+        [--no-tracemalloc] [--baseline PATH] [--update-baseline] [--json results.json]
+
+tracemalloc adds its own bookkeeping to the RSS figures; run with
+--no-tracemalloc for RSS alone. Tracing slows the walk-forward log's
+once-per-day refits down a lot, so by default it only runs for ranges of
+up to 100 trading days (--walk-forward-max-days).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import tracemalloc
+from datetime import datetime
+from model.engines import resolve_engine
+from benchmarks.bench_stages import RANGES, STAGES, trading_days, stage_runners, environment
+from benchmarks.synthetic import make_sources
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'bench_memory.json')
+
+# Traced runs are slow, so the default skips some of bench_stages' ranges
+DEFAULT_RANGES = '60d,1y,5y,20y'
+
+# Seconds between RSS samples
+SAMPLE_INTERVAL = 0.002
+
+# Footprint increases smaller than this (MB) are allocator noise and never flagged
+MIN_REGRESSION_MB = 5.0
+
+# Frames kept per traced allocation, enough to reach the repo code calling into pandas/sklearn
+TRACE_FRAMES = 25
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MB = 1024 * 1024
+
+
+def current_rss() -> int:
+    """
+    Resident set size of this process in bytes.
+
+    Reads /proc/self/statm; elsewhere falls back to the process's peak RSS
+    from getrusage, so per-stage peaks become cumulative.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class RSSSampler:
+    """
+    Background thread tracking the peak RSS since the last reset.
+
+    Attributes:
+        peak: Highest RSS (bytes) sampled since the last reset()
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak = current_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='rss-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def reset(self) -> int:
+        """Start a new peak window and return the current RSS."""
+        rss = current_rss()
+        self.peak = rss
+        return rss
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _repo_site(traceback: tracemalloc.Traceback) -> str:
+    """Innermost frame of an allocation inside this repo (or the innermost frame)."""
+    for frame in reversed(traceback):
+        if frame.filename.startswith(REPO_ROOT) and '/benchmarks/' not in frame.filename:
+            return f"{os.path.relpath(frame.filename, REPO_ROOT)}:{frame.lineno}"
+    frame = traceback[-1]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+def _top_allocations(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, top: int) -> list:
+    """
+    Repo lines whose allocations grew the most during a stage.
+
+    Allocations made inside pandas, numpy or scikit-learn are attributed to
+    the line of repo code that called into them, e.g. a .copy() in training.
+    """
+    sites = {}
+    for stat in after.compare_to(before, 'traceback'):
+        site = _repo_site(stat.traceback)
+        size, count = sites.get(site, (0, 0))
+        sites[site] = (size + stat.size_diff, count + stat.count_diff)
+
+    ranked = sorted(sites.items(), key=lambda item: -item[1][0])
+    return [
+        {'site': site, 'size_kb': round(size / 1024, 1), 'count': count}
+        for site, (size, count) in ranked[:top] if size > 0
+    ]
+
+
+# Allocations of the measurement itself
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+]
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+
+def measure_range(n_days: int, engine: str, walk_forward: bool, top: int, trace: bool,
+                  seed: int = 0) -> dict:
+    """
+    Measure every stage on one range length in this process.
+
+    Args:
+        n_days: Trading days of synthetic data
+        engine: Model engine name
+        walk_forward: Whether to run the walk-forward log
+        top: Allocation sites kept per stage
+        trace: Also record tracemalloc statistics
+        seed: Synthetic data seed
+
+    Returns:
+        Dictionary with per-stage measurements and the request footprint
+    """
+    # Discarded pass so imports and one-time caches are part of the starting RSS
+    with tempfile.TemporaryDirectory() as out_dir, contextlib.redirect_stdout(io.StringIO()):
+        state = {}
+        for stage, runner in stage_runners(make_sources(trading_days(RANGES['60d'])), engine, out_dir):
+            if stage != 'walk_forward':
+                runner(state)
+
+    sources = make_sources(n_days, seed=seed)
+    stages = {}
+
+    if trace:
+        tracemalloc.start(TRACE_FRAMES)
+
+    with tempfile.TemporaryDirectory() as out_dir, RSSSampler() as sampler:
+        state = {}
+        rss_start = sampler.reset()
+        request_peak = rss_start
+
+        for stage, runner in stage_runners(sources, engine, out_dir):
+            if stage == 'walk_forward' and not walk_forward:
+                stages[stage] = None
+                continue
+
+            if trace:
+                tracemalloc.reset_peak()
+                traced_before = tracemalloc.get_traced_memory()[0]
+                snapshot_before = _snapshot()
+            rss_before = sampler.reset()
+
+            # The training functions print their metrics; keep the report readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                runner(state)
+
+            peak = max(sampler.peak, current_rss())
+            request_peak = max(request_peak, peak)
+            result = {
+                'rss_before_mb': round(rss_before / MB, 2),
+                'peak_rss_mb': round(peak / MB, 2),
+                'rss_growth_mb': round((peak - rss_before) / MB, 2),
+            }
+            if trace:
+                traced, traced_peak = tracemalloc.get_traced_memory()
+                result['traced_peak_mb'] = round((traced_peak - traced_before) / MB, 2)
+                result['traced_net_mb'] = round((traced - traced_before) / MB, 2)
+                result['top_allocations'] = _top_allocations(snapshot_before, _snapshot(), top)
+                del snapshot_before
+            stages[stage] = result
+
+    if trace:
+        tracemalloc.stop()
+
+    return {
+        'trading_days': n_days,
+        'rss_start_mb': round(rss_start / MB, 2),
+        'footprint_mb': round((request_peak - rss_start) / MB, 2),
+        'stages': stages
+    }
+
+
+def run_child(label: str, engine: str, walk_forward: bool, top: int, trace: bool) -> dict:
+    """Measure one range in a fresh interpreter."""
+    command = [
+        sys.executable, '-m', 'benchmarks.bench_memory', '--child', label, '--engine', engine,
+        '--top', str(top), '--walk-forward-max-days', '0' if walk_forward else '-1'
+    ]
+    if not trace:
+        command.append('--no-tracemalloc')
+    proc = subprocess.run(command, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Measuring {label} failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def print_range(label: str, result: dict, baseline: dict) -> None:
+    """Print one range's stage table."""
+    print(f"\n{'='*60}")
+    base = baseline.get(label, {}).get('footprint_mb')
+    change = f" (baseline {base:.1f} MB)" if base is not None else ''
+    print(f"{label}: {result['trading_days']} trading days, request footprint "
+          f"{result['footprint_mb']:.1f} MB{change}")
+    print(f"{'='*60}")
+    print(f"  {'stage':<20} {'peak RSS':>10} {'RSS +':>9} {'traced peak':>12} {'traced net':>11}")
+    for stage in STAGES:
+        measured = result['stages'].get(stage)
+        if measured is None:
+            print(f"  {stage:<20} {'skipped':>10}")
+            continue
+        traced_peak = f"{measured['traced_peak_mb']:9.1f} MB" if 'traced_peak_mb' in measured else f"{'-':>12}"
+        traced_net = f"{measured['traced_net_mb']:8.1f} MB" if 'traced_net_mb' in measured else f"{'-':>11}"
+        print(f"  {stage:<20} {measured['peak_rss_mb']:7.1f} MB {measured['rss_growth_mb']:6.1f} MB "
+              f"{traced_peak} {traced_net}")
+        for allocation in measured.get('top_allocations', []):
+            print(f"      {allocation['size_kb'] / 1024:7.1f} MB  {allocation['site']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark peak memory of every pipeline stage")
+    parser.add_argument('--ranges', default=DEFAULT_RANGES, help="Comma-separated range labels")
+    parser.add_argument('--engine', default=None, help="Model engine")
+    parser.add_argument('--top', type=int, default=5, help="Allocation sites listed per stage")
+    parser.add_argument('--no-tracemalloc', action='store_true', help="Measure RSS only")
+    parser.add_argument('--walk-forward-max-days', type=int, default=100,
+                        help="Longest range (trading days) to run the walk-forward log on (0: all)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON to compare with")
+    parser.add_argument('--update-baseline', action='store_true', help="Write this run as the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed footprint growth before flagging")
+    parser.add_argument('--json', help="Write results to this file")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    engine = resolve_engine(args.engine)
+    trace = not args.no_tracemalloc
+
+    if args.child:
+        n_days = trading_days(RANGES[args.child])
+        walk_forward = args.walk_forward_max_days == 0 or 0 < n_days <= args.walk_forward_max_days
+        print(json.dumps(measure_range(n_days, engine, walk_forward, args.top, trace)))
+        return
+
+    labels = [label.strip() for label in args.ranges.split(',') if label.strip()]
+    unknown = [label for label in labels if label not in RANGES]
+    if unknown:
+        parser.error(f"Unknown ranges: {', '.join(unknown)} (choose from {', '.join(RANGES)})")
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+    results = {}
+    for label in labels:
+        n_days = trading_days(RANGES[label])
+        walk_forward = args.walk_forward_max_days == 0 or n_days <= args.walk_forward_max_days
+        results[label] = run_child(label, engine, walk_forward, args.top, trace)
+        print_range(label, results[label], baseline)
+
+    output = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'engine': engine,
+        'tracemalloc': trace,
+        'environment': environment(),
+        'results': results
+    }
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(output, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(output, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if not baseline:
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to create one")
+        return
+
+    regressions = []
+    for label, result in results.items():
+        base = baseline.get(label, {}).get('footprint_mb')
+        footprint = result['footprint_mb']
+        if base is not None and footprint > base * (1 + args.tolerance) and footprint - base > MIN_REGRESSION_MB:
+            regressions.append((label, base, footprint))
+
+    if regressions:
+        print(f"\n{len(regressions)} range(s) with a footprint above the baseline by more than {args.tolerance:.0%}:")
+        for label, base, footprint in regressions:
+            print(f"  {label:<6} {base:9.1f} MB -> {footprint:9.1f} MB")
+        sys.exit(1)
+    print(f"\nNo footprint above the baseline by more than {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Pipeline stage benchmark.
+
+Times every offline stage of a prediction (technical features, sentiment
+fusion, the step-9 merge, baseline training, ablation training, the
+walk-forward prediction log and the CSV export) on synthetic data across
+range lengths from 60 days to 20 years, and compares the timings with a
+stored JSON baseline so regressions show up.
+
+Usage:
+    python -m benchmarks.bench_stages [--ranges 60d,1y,5y] [--repeats 3]
+        [--baseline PATH] [--update-baseline] [--json results.json]
+
+The walk-forward log refits the model once per day, so by default it only
+runs for ranges of up to --walk-forward-max-days trading days (0 runs it for
+every range). Exits with status 1 if any stage is slower than its baseline
+by more than --tolerance.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from features.technical import build_technical_features
+from sentiment.fusion import compute_combined_sentiment
+from model.engines import resolve_engine
+from model.train import train_baseline_model, train_with_ablation, generate_prediction_log
+from services.predict_service import merge_feature_frames, select_feature_columns
+from benchmarks.synthetic import make_sources
+
+
+# Range lengths in calendar days
+RANGES = {'60d': 60, '1y': 365, '2y': 730, '5y': 1826, '10y': 3652, '20y': 7305}
+
+STAGES = [
+    'technical_features', 'fusion', 'merge', 'train_baseline',
+    'train_with_ablation', 'walk_forward', 'csv_export'
+]
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'bench_stages.json')
+
+# Slowdowns smaller than this (seconds) are timer noise and never flagged
+MIN_REGRESSION_SECONDS = 0.005
+
+
+def trading_days(calendar_days: int, start_date: str = "2005-01-03") -> int:
+    """Number of business days in a range of calendar days."""
+    start = pd.Timestamp(start_date)
+    return len(pd.bdate_range(start, start + pd.Timedelta(days=calendar_days - 1)))
+
+
+def stage_runners(sources: dict, engine: str, out_dir: str) -> list:
+    """
+    Build the pipeline stages over one set of synthetic sources.
+
+    Each runner reads its inputs from and stores its output in a shared
+    state dict, so the stages run in pipeline order on real intermediate
+    frames.
+
+    Args:
+        sources: Synthetic sources from make_sources
+        engine: Model engine name
+        out_dir: Directory for the CSV export
+
+    Returns:
+        List of (stage, runner) pairs in pipeline order
+    """
+    def technical_features(state):
+        features = build_technical_features(sources['prices'])
+        features.index = pd.to_datetime(features.index).tz_localize(None)
+        state['technical'] = features
+
+    def fusion(state):
+        state['combined'] = compute_combined_sentiment(sources['news'], sources['trends'], sources['wiki'])
+
+    def merge(state):
+        state['features'] = merge_feature_frames(
+            state['technical'], sources['news'], sources['trends'], sources['wiki'], state['combined']
+        )
+        state['feature_cols'] = select_feature_columns(state['features'])
+
+    def train_baseline(state):
+        train_baseline_model(state['features'], state['feature_cols'], engine=engine)
+
+    def ablation(state):
+        train_with_ablation(state['features'], engine=engine)
+
+    def walk_forward(state):
+        state['predictions'] = generate_prediction_log(state['features'], state['feature_cols'], engine=engine)
+
+    def csv_export(state):
+        features_export = state['features'].reset_index().rename(columns={'date': 'Date'})
+        features_export.to_csv(os.path.join(out_dir, 'features.csv'), index=False)
+        # The prediction log only exists where the walk-forward ran
+        if 'predictions' in state:
+            state['predictions'].to_csv(os.path.join(out_dir, 'predictions.csv'), index=False)
+
+    return [
+        ('technical_features', technical_features),
+        ('fusion', fusion),
+        ('merge', merge),
+        ('train_baseline', train_baseline),
+        ('train_with_ablation', ablation),
+        ('walk_forward', walk_forward),
+        ('csv_export', csv_export),
+    ]
+
+
+def bench_range(n_days: int, engine: str, repeats: int, walk_forward: bool, seed: int = 0) -> dict:
+    """
+    Time every stage on one range length.
+
+    Args:
+        n_days: Trading days of synthetic data
+        engine: Model engine name
+        repeats: Timed runs per stage (the walk-forward log runs once)
+        walk_forward: Whether to run the walk-forward log
+        seed: Synthetic data seed
+
+    Returns:
+        Dictionary mapping stage -> median seconds (None if skipped)
+    """
+    sources = make_sources(n_days, seed=seed)
+    timings = {}
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        state = {}
+        for stage, runner in stage_runners(sources, engine, out_dir):
+            if stage == 'walk_forward' and not walk_forward:
+                timings[stage] = None
+                continue
+
+            runs = []
+            for _ in range(1 if stage == 'walk_forward' else repeats):
+                t0 = time.perf_counter()
+                # The training functions print their metrics; keep the report readable
+                with contextlib.redirect_stdout(io.StringIO()):
+                    runner(state)
+                runs.append(time.perf_counter() - t0)
+            timings[stage] = statistics.median(runs)
+
+    return timings
+
+
+def environment() -> dict:
+    """Versions and host details recorded with every result."""
+    import sklearn
+
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Find stages slower than their baseline.
+
+    Args:
+        results: Results of this run ({range: {'stages': {stage: seconds}}})
+        baseline: Stored baseline in the same format
+        tolerance: Allowed slowdown as a fraction (0.25 = 25%)
+
+    Returns:
+        List of (range, stage, baseline_seconds, seconds) regressions
+    """
+    regressions = []
+    for label, result in results.items():
+        base_stages = baseline.get(label, {}).get('stages', {})
+        for stage, seconds in result['stages'].items():
+            base = base_stages.get(stage)
+            if seconds is None or base is None:
+                continue
+            if seconds > base * (1 + tolerance) and seconds - base > MIN_REGRESSION_SECONDS:
+                regressions.append((label, stage, base, seconds))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on synthetic data")
+    parser.add_argument('--ranges', default=','.join(RANGES), help="Comma-separated range labels")
+    parser.add_argument('--repeats', type=int, default=3, help="Timed runs per stage")
+    parser.add_argument('--engine', default=None, help="Model engine")
+    parser.add_argument('--walk-forward-max-days', type=int, default=300,
+                        help="Longest range (trading days) to run the walk-forward log on (0: all)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON to compare with")
+    parser.add_argument('--update-baseline', action='store_true', help="Write this run as the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown before flagging")
+    parser.add_argument('--json', help="Write results to this file")
+    args = parser.parse_args()
+
+    labels = [label.strip() for label in args.ranges.split(',') if label.strip()]
+    unknown = [label for label in labels if label not in RANGES]
+    if unknown:
+        parser.error(f"Unknown ranges: {', '.join(unknown)} (choose from {', '.join(RANGES)})")
+    engine = resolve_engine(args.engine)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+    # Discarded run so one-time imports and thread pool start-up are not timed
+    bench_range(trading_days(RANGES['60d']), engine, 1, False)
+
+    results = {}
+    print(f"{'range':<6} {'days':>5}  {'stage':<20} {'ms':>10} {'baseline':>10} {'change':>8}")
+    for label in labels:
+        n_days = trading_days(RANGES[label])
+        walk_forward = args.walk_forward_max_days == 0 or n_days <= args.walk_forward_max_days
+        timings = bench_range(n_days, engine, args.repeats, walk_forward)
+        results[label] = {'trading_days': n_days, 'stages': timings}
+
+        for stage in STAGES:
+            seconds = timings[stage]
+            base = baseline.get(label, {}).get('stages', {}).get(stage)
+            ms = f"{seconds * 1000:10.1f}" if seconds is not None else f"{'skipped':>10}"
+            base_ms = f"{base * 1000:10.1f}" if base is not None else f"{'-':>10}"
+            change = f"{(seconds / base - 1) * 100:+7.0f}%" if seconds is not None and base else f"{'-':>8}"
+            print(f"{label:<6} {n_days:>5}  {stage:<20} {ms} {base_ms} {change}")
+
+    output = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'engine': engine,
+        'repeats': args.repeats,
+        'environment': environment(),
+        'results': results
+    }
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(output, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(output, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if not baseline:
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to create one")
+        return
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} stage(s) slower than the baseline by more than {args.tolerance:.0%}:")
+        for label, stage, base, seconds in regressions:
+            print(f"  {label:<6} {stage:<20} {base * 1000:9.1f} ms -> {seconds * 1000:9.1f} ms")
+        sys.exit(1)
+    print(f"\nNo stage slower than the baseline by more than {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
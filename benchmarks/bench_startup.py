@@ -0,0 +1,137 @@
+"""
+Cold-start benchmark.
+
+Imports the service entry points in fresh interpreters with
+``python -X importtime`` and reports wall-clock import time, the slowest
+modules, and self time per top-level package. The warm-up hook is timed the
+same way.
+
+Usage:
+    python -m benchmarks.bench_startup [--repeats 3] [--top 15] [--json startup.json]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+
+TARGETS = ['app.main', 'main', 'services.predict_service']
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    Parse ``-X importtime`` output.
+
+    Args:
+        stderr: Interpreter stderr
+
+    Returns:
+        List of (module, self_us, cumulative_us) tuples
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def bench_import(target: str, repeats: int) -> dict:
+    """
+    Import a module in fresh interpreters.
+
+    Args:
+        target: Module to import
+        repeats: Number of fresh interpreters
+
+    Returns:
+        Dictionary with wall-clock times and the parsed import table of the median run
+    """
+    runs = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {target}'],
+            capture_output=True, text=True
+        )
+        wall = time.perf_counter() - t0
+        if proc.returncode != 0:
+            raise RuntimeError(f"Importing {target} failed:\n{proc.stderr[-2000:]}")
+        runs.append((wall, parse_importtime(proc.stderr)))
+
+    runs.sort(key=lambda run: run[0])
+    wall, rows = runs[len(runs) // 2]
+
+    by_package = {}
+    for name, self_us, _ in rows:
+        package = name.split('.')[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+
+    return {
+        'wall_ms': [round(run[0] * 1000, 1) for run in runs],
+        'median_wall_ms': round(statistics.median(run[0] for run in runs) * 1000, 1),
+        'import_ms': round(max((cum for _, _, cum in rows), default=0) / 1000, 1),
+        'modules': sorted(rows, key=lambda row: -row[2]),
+        'packages': sorted(by_package.items(), key=lambda item: -item[1]),
+    }
+
+
+def bench_warmup() -> dict:
+    """Time the warm-up hook in a fresh interpreter."""
+    code = (
+        "import json, time; t0 = time.perf_counter();"
+        "from services.warmup import warmup; timings = warmup();"
+        "print(json.dumps({'total': time.perf_counter() - t0, 'steps': timings}))"
+    )
+    proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Warm-up failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import benchmark")
+    parser.add_argument('--repeats', type=int, default=3, help="Fresh interpreters per target")
+    parser.add_argument('--top', type=int, default=15, help="Slowest modules / packages to list")
+    parser.add_argument('--json', help="Write results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for target in TARGETS:
+        result = bench_import(target, args.repeats)
+        results[target] = result
+
+        print(f"\n{'='*60}")
+        print(f"import {target}: median wall {result['median_wall_ms']:.1f} ms "
+              f"(import {result['import_ms']:.1f} ms, runs {result['wall_ms']})")
+        print(f"{'='*60}")
+        print(f"  Slowest modules (cumulative):")
+        for name, self_us, cumulative_us in result['modules'][:args.top]:
+            print(f"    {name:<40} {cumulative_us / 1000:9.1f} ms  (self {self_us / 1000:7.1f} ms)")
+        print(f"  Self time by top-level package:")
+        for package, self_us in result['packages'][:args.top]:
+            print(f"    {package:<40} {self_us / 1000:9.1f} ms")
+
+    warm = bench_warmup()
+    results['warmup'] = warm
+    print(f"\n{'='*60}")
+    print(f"warmup(): {warm['total'] * 1000:.1f} ms")
+    print(f"{'='*60}")
+    for step, seconds in warm['steps'].items():
+        status = f"{seconds * 1000:9.1f} ms" if seconds is not None else "   failed"
+        print(f"  {step:<40} {status}")
+
+    if args.json:
+        for target in TARGETS:
+            results[target]['modules'] = results[target]['modules'][:args.top]
+            results[target]['packages'] = results[target]['packages'][:args.top]
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+"""
+The API with stubbed upstreams, for load tests.
+
+Serve it with ``uvicorn benchmarks.load_app:app``; benchmarks.bench_load
+does this for you.
+"""
+from benchmarks.stubs import install_stubs, worker_initializer
+
+install_stubs()
+
+from app.main import app, job_queue
+
+# Workers are spawned, so each one installs the stubs itself
+job_queue.initializer = worker_initializer
@@ -0,0 +1,83 @@
+"""
+Offline stand-ins for the upstream data sources.
+
+install_stubs() replaces the fetchers in the ingestion registry (and the
+bulk price download used by batch runs) with synthetic data, optionally
+after a simulated network latency (KASSANDRA_STUB_LATENCY, seconds per
+call). The data is deterministic per ticker and date range. Worker
+processes are spawned, so the API's job queue must run worker_initializer
+in each of them; see benchmarks.load_app.
+"""
+import os
+import time
+import zlib
+import pandas as pd
+from benchmarks.synthetic import make_prices, make_news, make_trends, make_wiki
+
+
+def _latency():
+    seconds = float(os.environ.get('KASSANDRA_STUB_LATENCY', 0))
+    if seconds > 0:
+        time.sleep(seconds)
+
+
+def _shape(stock: str, start_date: str, end_date: str) -> tuple:
+    """Trading days in the range and a per-ticker seed."""
+    n_days = max(len(pd.bdate_range(start_date, end_date)), 1)
+    return n_days, zlib.crc32(stock.upper().encode())
+
+
+def stub_prices(stock: str, start_date: str, end_date: str) -> pd.DataFrame:
+    _latency()
+    n_days, seed = _shape(stock, start_date, end_date)
+    return make_prices(n_days, seed=seed, start_date=start_date)
+
+
+def stub_prices_bulk(stocks: list, start_date: str, end_date: str) -> dict:
+    _latency()
+    return {stock: make_prices(*_shape(stock, start_date, end_date), start_date=start_date) for stock in stocks}
+
+
+def stub_news(stock: str, start_date: str, end_date: str) -> pd.DataFrame:
+    _latency()
+    n_days, seed = _shape(stock, start_date, end_date)
+    return make_news(n_days, seed=seed, start_date=start_date)
+
+
+def stub_trends(stock: str, start_date: str, end_date: str) -> pd.DataFrame:
+    _latency()
+    n_days, seed = _shape(stock, start_date, end_date)
+    return make_trends(n_days, seed=seed, start_date=start_date)
+
+
+def stub_wiki(stock: str, start_date: str, end_date: str) -> pd.DataFrame:
+    _latency()
+    n_days, seed = _shape(stock, start_date, end_date)
+    return make_wiki(n_days, seed=seed, start_date=start_date)
+
+
+STUB_FETCHERS = {
+    'prices': stub_prices,
+    'news': stub_news,
+    'trends': stub_trends,
+    'wiki': stub_wiki,
+}
+
+
+def install_stubs() -> None:
+    """Route every upstream fetch in this process to the synthetic sources."""
+    import services.ingestion as ingestion
+    import services.batch_service as batch_service
+
+    for source, fetch in STUB_FETCHERS.items():
+        ingestion.SOURCES[source]['fetch'] = fetch
+    batch_service.fetch_historical_prices_bulk = stub_prices_bulk
+
+
+def worker_initializer() -> None:
+    """Job-queue worker initializer: install the stubs, then warm up."""
+    from services.warmup import warmup
+
+    install_stubs()
+    # The stubs replace the news fetcher, so the VADER lexicon is never needed
+    warmup(load_resources=False)
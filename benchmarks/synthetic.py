@@ -0,0 +1,171 @@
+"""
+Deterministic synthetic market data for benchmarks.
+"""
+import numpy as np
+import pandas as pd
+from features.technical import build_technical_features
+
+
+# Sentiment-aware feature set used by the prediction service
+SENTIMENT_FEATURE_COLS = [
+    'daily_return', 'ma_5', 'ma_10', 'volatility_5',
+    'avg_news_sentiment', 'news_article_count',
+    'trend_score', 'trend_delta_7d',
+    'wiki_views', 'wiki_views_delta',
+    'combined_sentiment'
+]
+
+# Price-only feature set
+PRICE_FEATURE_COLS = ['daily_return', 'ma_5', 'ma_10', 'volatility_5']
+
+
+def make_prices(n_days: int, seed: int = 0, start_date: str = "2005-01-03") -> pd.DataFrame:
+    """
+    Generate a geometric random-walk OHLCV frame on business days.
+    
+    Args:
+        n_days: Number of trading days
+        seed: Random seed
+        start_date: First trading day
+    
+    Returns:
+        DataFrame with OHLCV columns and a DatetimeIndex named 'Date'
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(start=start_date, periods=n_days, name='Date')
+    
+    returns = rng.normal(0.0004, 0.018, n_days)
+    close = 100.0 * np.exp(np.cumsum(returns))
+    open_ = close * (1 + rng.normal(0, 0.004, n_days))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.006, n_days)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.006, n_days)))
+    volume = rng.integers(1_000_000, 50_000_000, n_days)
+    
+    return pd.DataFrame({
+        'Open': open_,
+        'High': high,
+        'Low': low,
+        'Close': close,
+        'Volume': volume
+    }, index=index)
+
+
+def make_feature_frame(n_days: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate a merged feature frame shaped like the prediction service's.
+    
+    Args:
+        n_days: Number of trading days of raw prices
+        seed: Random seed
+    
+    Returns:
+        DataFrame indexed by date with OHLCV, technical and sentiment columns
+    """
+    rng = np.random.default_rng(seed + 1)
+    features = build_technical_features(make_prices(n_days, seed))
+    features.index.name = 'date'
+    n = len(features)
+    
+    features['avg_news_sentiment'] = np.clip(rng.normal(0, 0.3, n), -1, 1)
+    features['news_article_count'] = rng.poisson(3, n)
+    features['trend_score'] = rng.integers(0, 101, n).astype(float)
+    features['trend_delta_7d'] = rng.normal(0, 5, n)
+    features['wiki_views'] = rng.integers(1_000, 20_000, n).astype(float)
+    features['wiki_views_delta'] = rng.normal(0, 800, n)
+    features['combined_sentiment'] = rng.normal(0, 0.5, n)
+    
+    return features
+
+
+def _calendar_days(n_days: int, start_date: str) -> pd.DatetimeIndex:
+    """Calendar days spanned by n_days trading days from start_date."""
+    trading_days = pd.bdate_range(start=start_date, periods=n_days)
+    return pd.date_range(trading_days[0], trading_days[-1])
+
+
+def make_news(n_days: int, seed: int = 0, start_date: str = "2005-01-03") -> pd.DataFrame:
+    """
+    Generate daily news sentiment shaped like fetch_news_sentiment's output.
+    
+    Only days with at least one article are present, as with the RSS feed.
+    
+    Args:
+        n_days: Number of trading days covered
+        seed: Random seed
+        start_date: First trading day
+    
+    Returns:
+        DataFrame with columns [date, avg_sentiment, article_count]
+    """
+    rng = np.random.default_rng(seed + 2)
+    days = _calendar_days(n_days, start_date)
+    article_count = rng.poisson(1.5, len(days))
+    
+    df = pd.DataFrame({
+        'date': days,
+        'avg_sentiment': np.clip(rng.normal(0.05, 0.3, len(days)), -1, 1),
+        'article_count': article_count
+    })
+    return df[df['article_count'] > 0].reset_index(drop=True)
+
+
+def make_trends(n_days: int, seed: int = 0, start_date: str = "2005-01-03") -> pd.DataFrame:
+    """
+    Generate daily Google Trends scores shaped like fetch_google_trends' output.
+    
+    Args:
+        n_days: Number of trading days covered
+        seed: Random seed
+        start_date: First trading day
+    
+    Returns:
+        DataFrame with columns [date, trend_score, trend_delta_7d]
+    """
+    rng = np.random.default_rng(seed + 3)
+    days = _calendar_days(n_days, start_date)
+    
+    score = np.clip(50 + np.cumsum(rng.normal(0, 3, len(days))), 0, 100).round()
+    df = pd.DataFrame({'date': days, 'trend_score': score})
+    df['trend_delta_7d'] = df['trend_score'].diff(7).fillna(0)
+    return df
+
+
+def make_wiki(n_days: int, seed: int = 0, start_date: str = "2005-01-03") -> pd.DataFrame:
+    """
+    Generate daily Wikipedia pageviews shaped like fetch_wikipedia_pageviews' output.
+    
+    Args:
+        n_days: Number of trading days covered
+        seed: Random seed
+        start_date: First trading day
+    
+    Returns:
+        DataFrame with columns [date, wiki_views, wiki_views_delta]
+    """
+    rng = np.random.default_rng(seed + 4)
+    days = _calendar_days(n_days, start_date)
+    
+    views = rng.lognormal(9, 0.4, len(days)).round()
+    df = pd.DataFrame({'date': days, 'wiki_views': views})
+    df['wiki_views_delta'] = df['wiki_views'].diff().fillna(0)
+    return df
+
+
+def make_sources(n_days: int, seed: int = 0, start_date: str = "2005-01-03") -> dict:
+    """
+    Generate every upstream source for one ticker, as fetch_sources returns them.
+    
+    Args:
+        n_days: Number of trading days
+        seed: Random seed
+        start_date: First trading day
+    
+    Returns:
+        Dictionary with 'prices', 'news', 'trends' and 'wiki' frames
+    """
+    return {
+        'prices': make_prices(n_days, seed, start_date),
+        'news': make_news(n_days, seed, start_date),
+        'trends': make_trends(n_days, seed, start_date),
+        'wiki': make_wiki(n_days, seed, start_date)
+    }
@@ -1,18 +1,25 @@
 """
 News sentiment data fetching module.
+
+nltk and feedparser are imported, and the VADER lexicon is located or
+downloaded, on first use rather than at import time.
 """
+import threading
 import pandas as pd
-import feedparser
 from datetime import datetime, timedelta
-from nltk.sentiment import SentimentIntensityAnalyzer
-import nltk
+from data.news_archive import NewsArchive, ARCHIVE_ERRORS, get_news_archive, normalize_headline
+from utils.cache import cached_source
+from utils.admission import upstream_slot
+from utils.deadline import time_left
+
 
+# Shared VADER analyzer, created on first use
+_analyzer = None
+_analyzer_lock = threading.Lock()
 
-# Download VADER lexicon if not already present
-try:
-    nltk.data.find('sentiment/vader_lexicon.zip')
-except LookupError:
-    nltk.download('vader_lexicon', quiet=True)
+
+# Days after a range whose headlines still count towards it (allow recent articles)
+RECENT_ARTICLE_DAYS = 30
 
 
 # Stock ticker to company name mapping
@@ -30,20 +37,52 @@ TICKER_TO_COMPANY = {
 }
 
 
-def fetch_news_sentiment(stock: str, start_date: str, end_date: str) -> pd.DataFrame:
+def ensure_vader_lexicon() -> None:
+    """Download the VADER lexicon if it is not installed yet."""
+    import nltk
+    
+    try:
+        nltk.data.find('sentiment/vader_lexicon.zip')
+    except LookupError:
+        nltk.download('vader_lexicon', quiet=True)
+
+
+def get_sentiment_analyzer():
     """
-    Fetch news headlines and compute sentiment scores.
+    Get the shared VADER sentiment analyzer, loading it on first call.
+    
+    Returns:
+        nltk SentimentIntensityAnalyzer
+    """
+    global _analyzer
+    
+    with _analyzer_lock:
+        if _analyzer is None:
+            from nltk.sentiment import SentimentIntensityAnalyzer
+            
+            ensure_vader_lexicon()
+            _analyzer = SentimentIntensityAnalyzer()
+    
+    return _analyzer
+
+
+def poll_news(stock: str, archive: NewsArchive) -> bool:
+    """
+    Fetch the current news feeds of a ticker into the archive.
+    
+    Only headlines the archive has not seen are scored and added.
     
     Args:
         stock: Stock ticker symbol
-        start_date: Start date in YYYY-MM-DD format
-        end_date: End date in YYYY-MM-DD format
+        archive: News archive to append to
     
     Returns:
-        DataFrame with daily aggregated sentiment (avg_sentiment, article_count)
+        True if every feed was read, False if one failed or the deadline passed
     """
-    # Initialize VADER sentiment analyzer
-    sia = SentimentIntensityAnalyzer()
+    import feedparser
+    
+    # Get the shared VADER sentiment analyzer
+    sia = get_sentiment_analyzer()
     
     # Get company name
     company_name = TICKER_TO_COMPANY.get(stock.upper(), stock)
@@ -57,62 +96,127 @@ def fetch_news_sentiment(stock: str, start_date: str, end_date: str) -> pd.DataF
         f"{company_name} financial"
     ]
     
-    all_articles = []
-    start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-    end_dt = datetime.strptime(end_date, "%Y-%m-%d")
+    # Collect (headline key, date) -> headline, deduplicated across queries
+    headlines = {}
+    complete = True
     
-    # Fetch from multiple queries
+    # Fetch from multiple queries, stopping once the request deadline has passed
     for query in query_patterns:
+        if time_left() == 0:
+            print(f"Deadline reached, skipping remaining news queries for {stock}")
+            complete = False
+            break
         try:
             print("News queries being used:", query_patterns)
             rss_url = f"https://news.google.com/rss/search?q={query.replace(' ', '+')}&hl=en-US&gl=US&ceid=US:en"
-            feed = feedparser.parse(rss_url)
+            with upstream_slot('news'):
+                feed = feedparser.parse(rss_url)
             
             for entry in feed.entries:
                 # Parse publication date
                 if hasattr(entry, 'published_parsed'):
-                    pub_date = datetime(*entry.published_parsed[:6])
+                    pub_date = datetime(*entry.published_parsed[:6]).date().isoformat()
                 else:
                     continue
                 
-                # Filter by date range (relaxed to get more recent data)
-                if pub_date <= end_dt + timedelta(days=30):  # Allow recent articles
-                    # Get headline
-                    headline = entry.title if hasattr(entry, 'title') else ""
-                    
-                    if headline:
-                        # Compute sentiment
-                        sentiment_scores = sia.polarity_scores(headline)
-                        compound_score = sentiment_scores['compound']
-                        
-                        all_articles.append({
-                            'date': pub_date.date(),
-                            'headline': headline,
-                            'sentiment': compound_score
-                        })
+                # Get headline
+                headline = entry.title if hasattr(entry, 'title') else ""
+                if headline:
+                    headlines.setdefault((normalize_headline(headline), pub_date), headline)
         except Exception as e:
+            complete = False
             continue
     
-    if not all_articles:
-        # Return empty DataFrame with proper structure
-        return pd.DataFrame(columns=['date', 'avg_sentiment', 'article_count'])
+    # Score and archive only the headlines not archived yet
+    if headlines:
+        known = archive.known(stock, min(pub_date for _, pub_date in headlines))
+        new_articles = [
+            {'date': pub_date, 'headline': headline, 'sentiment': sia.polarity_scores(headline)['compound']}
+            for (key, pub_date), headline in headlines.items()
+            if (key, pub_date) not in known
+        ]
+        added = archive.add(stock, new_articles) if new_articles else 0
+        print(f"Archived {added} new headlines for {stock} ({len(headlines)} in feeds)")
     
-    # Convert to DataFrame
-    df = pd.DataFrame(all_articles)
+    return complete
+
+
+@cached_source('news')
+def fetch_news_sentiment(stock: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """
+    Fetch news headlines and compute sentiment scores.
+    
+    The ticker's feeds are polled into the news archive (at most every
+    KASSANDRA_NEWS_REFRESH seconds), and the daily aggregates are read back
+    from the archive, so ranges older than the feeds still get the headlines
+    archived at the time.
+    
+    Args:
+        stock: Stock ticker symbol
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+    
+    Returns:
+        DataFrame with daily aggregated sentiment (avg_sentiment, article_count).
+        If a due poll did not complete, the archived history is still
+        returned, flagged attrs['partial'] so it is neither cached nor
+        reported as complete, and the next call polls again.
+    
+    Raises:
+        ValueError: If the archive cannot be read
+    """
+    archive = get_news_archive()
+    
+    # Poll the feeds unless another call did so recently
+    complete = True
+    try:
+        if archive.needs_poll(stock):
+            complete = poll_news(stock, archive)
+            if complete:
+                archive.record_poll(stock)
+    except ARCHIVE_ERRORS as e:
+        print(f"News archive write failed for {stock}: {e}")
+        complete = False
     
-    # Deduplicate by headline and date
-    df = df.drop_duplicates(subset=['headline', 'date'], keep='first')
+    # Aggregate by day over the range, plus the days after it (allow recent articles)
+    try:
+        daily = archive.daily_sentiment(stock, start_date, _recent_end(end_date))
+    except ARCHIVE_ERRORS as e:
+        raise ValueError(f"News archive failed for '{stock}': {e}")
     
-    # Aggregate by day
-    daily_sentiment = df.groupby('date').agg({
-        'sentiment': 'mean',
-        'headline': 'count'
-    }).reset_index()
+    if not complete:
+        print(f"News poll for {stock} incomplete, serving the archive as partial")
+        daily.attrs['partial'] = True
+    return daily
+
+
+def _recent_end(end_date: str) -> str:
+    """Last day of archived headlines read for a range ending on end_date."""
+    recent_end = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=RECENT_ARTICLE_DAYS)
+    return recent_end.date().isoformat()
+
+
+def news_version(stock: str, start_date: str, end_date: str):
+    """
+    State of the archived headlines fetch_news_sentiment reads for a range.
+    
+    Polls keep adding headlines dated in the days after a range, so even a
+    settled range's news sentiment changes until those days have passed.
     
-    daily_sentiment.columns = ['date', 'avg_sentiment', 'article_count']
-    daily_sentiment['date'] = pd.to_datetime(daily_sentiment['date'])
+    Args:
+        stock: Stock ticker symbol
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
     
-    return daily_sentiment
+    Returns:
+        Tuple of (article count, latest archive time), or None if the archive
+        cannot be read
+    """
+    try:
+        return get_news_archive().range_state(stock, start_date, _recent_end(end_date))
+    except ARCHIVE_ERRORS as e:
+        print(f"News archive read failed for {stock}: {e}")
+        return None
 
 
 def fetch_news_data(stock_name: str, start_date: str, end_date: str) -> dict:
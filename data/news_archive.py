@@ -0,0 +1,239 @@
+"""
+Scored News Archive
+
+Google News RSS only returns recent items, so each poll's headlines are kept
+in a local SQLite archive (one file on the host, shared by every worker)
+together with their VADER compound scores. Articles are unique per ticker,
+normalized headline and publication date, so a poll only appends (and only
+scores) headlines the archive has not seen. Daily aggregates are range
+queries over the archive, which covers every day it has been polled for,
+not just the feed's current window.
+
+The archive lives at KASSANDRA_NEWS_ARCHIVE_PATH (default
+.kassandra/news.sqlite3). If the file cannot be opened, an in-memory archive
+is used for the life of the process.
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+import pandas as pd
+
+
+DEFAULT_ARCHIVE_PATH = os.path.join('.kassandra', 'news.sqlite3')
+
+# Seconds before a ticker's feeds are polled again (KASSANDRA_NEWS_REFRESH)
+DEFAULT_REFRESH_SECONDS = 15 * 60
+
+ARCHIVE_ERRORS = (sqlite3.Error, OSError)
+
+
+def normalize_headline(headline: str) -> str:
+    """
+    Dedup key of a headline: case-folded, with whitespace collapsed.
+
+    Args:
+        headline: Headline text
+
+    Returns:
+        Normalized headline
+    """
+    return ' '.join(headline.split()).casefold()
+
+
+class NewsArchive:
+    """
+    Scored headlines and feed poll times in one SQLite file.
+
+    Each thread of each process opens its own connection. The database runs
+    in WAL mode, so readers do not block the writer. An in-memory archive
+    (path ':memory:') is one database per connection, so all threads share a
+    single connection under a lock instead.
+
+    Attributes:
+        path: Database file path
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.environ.get('KASSANDRA_NEWS_ARCHIVE_PATH', DEFAULT_ARCHIVE_PATH)
+        self._local = threading.local()
+        self._shared_conn = None
+        self._shared_lock = threading.RLock()
+
+    @contextmanager
+    def _connection(self):
+        """A connection for this thread, held exclusively while in use for an in-memory archive."""
+        if self.path != ':memory:':
+            yield self._thread_connection()
+            return
+        with self._shared_lock:
+            if self._shared_conn is None:
+                self._shared_conn = self._open()
+            yield self._shared_conn
+
+    def _thread_connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._open()
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _open(self) -> sqlite3.Connection:
+        """Open a connection and create the schema."""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "ticker TEXT NOT NULL, date TEXT NOT NULL, headline_key TEXT NOT NULL, headline TEXT NOT NULL, "
+            "compound REAL NOT NULL, archived_at REAL NOT NULL, PRIMARY KEY (ticker, headline_key, date))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS articles_by_date ON articles (ticker, date)")
+        conn.execute("CREATE TABLE IF NOT EXISTS polls (ticker TEXT PRIMARY KEY, polled_at REAL NOT NULL)")
+        return conn
+
+    def known(self, ticker: str, since: str) -> set:
+        """
+        Archived (headline_key, date) pairs of a ticker from a date on.
+
+        Args:
+            ticker: Ticker symbol
+            since: First date in YYYY-MM-DD format
+
+        Returns:
+            Set of (headline_key, date) tuples
+        """
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT headline_key, date FROM articles WHERE ticker = ? AND date >= ?",
+                (ticker.upper(), since)
+            ).fetchall()
+        return set(rows)
+
+    def add(self, ticker: str, articles: list) -> int:
+        """
+        Append scored articles, ignoring ones already archived.
+
+        Args:
+            ticker: Ticker symbol
+            articles: List of dicts with date (YYYY-MM-DD), headline and sentiment
+
+        Returns:
+            Number of articles added
+        """
+        now = time.time()
+        rows = [
+            (ticker.upper(), article['date'], normalize_headline(article['headline']),
+             article['headline'], float(article['sentiment']), now)
+            for article in articles
+        ]
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                before = conn.total_changes
+                conn.executemany(
+                    "INSERT OR IGNORE INTO articles (ticker, date, headline_key, headline, compound, archived_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                added = conn.total_changes - before
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return added
+
+    def daily_sentiment(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """
+        Mean compound score and article count per day of a range.
+
+        Args:
+            ticker: Ticker symbol
+            start_date: First date in YYYY-MM-DD format
+            end_date: Last date in YYYY-MM-DD format (inclusive)
+
+        Returns:
+            DataFrame with columns [date, avg_sentiment, article_count]
+        """
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT date, AVG(compound), COUNT(*) FROM articles "
+                "WHERE ticker = ? AND date BETWEEN ? AND ? GROUP BY date ORDER BY date",
+                (ticker.upper(), start_date, end_date)
+            ).fetchall()
+        daily = pd.DataFrame(rows, columns=['date', 'avg_sentiment', 'article_count'])
+        daily['date'] = pd.to_datetime(daily['date'])
+        return daily
+
+    def range_state(self, ticker: str, start_date: str, end_date: str) -> tuple:
+        """
+        Article count and latest archive time over a range, which change
+        whenever a poll adds headlines dated in it.
+
+        Args:
+            ticker: Ticker symbol
+            start_date: First date in YYYY-MM-DD format
+            end_date: Last date in YYYY-MM-DD format (inclusive)
+
+        Returns:
+            Tuple of (article count, latest archived_at or None)
+        """
+        with self._connection() as conn:
+            return tuple(conn.execute(
+                "SELECT COUNT(*), MAX(archived_at) FROM articles WHERE ticker = ? AND date BETWEEN ? AND ?",
+                (ticker.upper(), start_date, end_date)
+            ).fetchone())
+
+    def last_poll(self, ticker: str):
+        """Time a ticker's feeds were last polled in full, or None."""
+        with self._connection() as conn:
+            row = conn.execute("SELECT polled_at FROM polls WHERE ticker = ?", (ticker.upper(),)).fetchone()
+        return row[0] if row is not None else None
+
+    def record_poll(self, ticker: str) -> None:
+        """Note that a ticker's feeds were polled in full just now."""
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO polls (ticker, polled_at) VALUES (?, ?)", (ticker.upper(), time.time())
+            )
+
+    def needs_poll(self, ticker: str) -> bool:
+        """Whether a ticker's feeds were not polled within KASSANDRA_NEWS_REFRESH seconds."""
+        refresh = float(os.environ.get('KASSANDRA_NEWS_REFRESH', DEFAULT_REFRESH_SECONDS))
+        polled_at = self.last_poll(ticker)
+        return polled_at is None or time.time() - polled_at >= refresh
+
+
+# Process-wide archive, opened on first use
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_news_archive() -> NewsArchive:
+    """
+    Get the process-wide news archive, opening it on first call.
+
+    Returns:
+        NewsArchive at KASSANDRA_NEWS_ARCHIVE_PATH, or in memory if that fails
+    """
+    global _archive
+
+    with _archive_lock:
+        if _archive is None:
+            archive = NewsArchive()
+            try:
+                archive.last_poll('')
+            except ARCHIVE_ERRORS as e:
+                print(f"News archive at {archive.path} unavailable, using memory only: {e}")
+                archive = NewsArchive(':memory:')
+            _archive = archive
+
+    return _archive
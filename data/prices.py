@@ -1,10 +1,13 @@
 """
 Historical stock price data fetching module.
 """
-import yfinance as yf
 import pandas as pd
+from utils.cache import cached_source, get_cache, range_ttl
+from utils.admission import upstream_slot
+from utils.deadline import time_left
 
 
+@cached_source('prices')
 def fetch_historical_prices(stock_name: str, start_date: str, end_date: str) -> pd.DataFrame:
     """
     Fetch historical stock prices for given stock and date range.
@@ -17,9 +20,12 @@ def fetch_historical_prices(stock_name: str, start_date: str, end_date: str) ->
     Returns:
         DataFrame containing OHLCV data (Open, High, Low, Close, Volume)
     """
+    import yfinance as yf
+    
     try:
         ticker = yf.Ticker(stock_name)
-        df = ticker.history(start=start_date, end=end_date)
+        with upstream_slot('prices'):
+            df = ticker.history(start=start_date, end=end_date, timeout=max(0.1, time_left(10)))
         
         if df.empty:
             raise ValueError(f"No data found for ticker '{stock_name}' in the given date range")
@@ -34,3 +40,91 @@ def fetch_historical_prices(stock_name: str, start_date: str, end_date: str) ->
     
     except Exception as e:
         raise ValueError(f"Error fetching data for '{stock_name}': {str(e)}")
+
+
+def fetch_historical_prices_bulk(stock_names: list, start_date: str, end_date: str) -> dict:
+    """
+    Fetch historical stock prices for several tickers in one download.
+    
+    Tickers are cached under the same keys as fetch_historical_prices, so
+    tickers already fetched on their own or in another batch are not
+    downloaded again, and every downloaded ticker is cached on its own.
+    
+    Args:
+        stock_names: List of stock ticker symbols
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+    
+    Returns:
+        Dictionary mapping ticker -> OHLCV DataFrame. Tickers without data
+        in the given date range are left out.
+    
+    Raises:
+        ValueError: If the download itself fails
+    """
+    cache = get_cache()
+    cache_keys = {
+        stock_name: fetch_historical_prices.cache_key(stock_name, start_date, end_date)
+        for stock_name in stock_names
+    }
+    
+    prices = {}
+    for stock_name, key in cache_keys.items():
+        cached = cache.get(key)
+        if cached is not None:
+            prices[stock_name] = cached
+    
+    missing = [stock_name for stock_name in stock_names if stock_name not in prices]
+    if not missing:
+        return prices
+    
+    downloaded = _download_prices(missing, start_date, end_date)
+    for stock_name, ticker_df in downloaded.items():
+        cache.set(cache_keys[stock_name], ticker_df, ttl=range_ttl(end_date))
+    prices.update(downloaded)
+    
+    return {stock_name: prices[stock_name] for stock_name in stock_names if stock_name in prices}
+
+
+def _download_prices(stock_names: list, start_date: str, end_date: str) -> dict:
+    """Download OHLCV frames for several tickers with one yfinance call."""
+    import yfinance as yf
+    
+    try:
+        with upstream_slot('prices'):
+            df = yf.download(
+                stock_names,
+                start=start_date,
+                end=end_date,
+                group_by='ticker',
+                auto_adjust=True,
+                actions=False,
+                threads=True,
+                progress=False,
+                timeout=max(0.1, time_left(10))
+            )
+    except Exception as e:
+        raise ValueError(f"Error fetching data for {', '.join(stock_names)}: {str(e)}")
+    
+    prices = {}
+    if df is None or df.empty:
+        return prices
+    
+    for stock_name in stock_names:
+        if isinstance(df.columns, pd.MultiIndex):
+            if stock_name not in df.columns.get_level_values(0):
+                continue
+            ticker_df = df[stock_name]
+        else:
+            ticker_df = df
+        
+        # Keep only OHLCV columns, dropping days the ticker did not trade
+        ticker_df = ticker_df[['Open', 'High', 'Low', 'Close', 'Volume']].dropna(how='all')
+        if ticker_df.empty:
+            continue
+        
+        # Ensure datetime index
+        ticker_df.index = pd.to_datetime(ticker_df.index)
+        prices[stock_name] = ticker_df
+    
+    return prices
@@ -28,6 +28,15 @@ export interface PredictionResponse {
     feature_csv_path: string;
     prediction_csv_path: string;
     last_updated: string;
+    stage_timings?: Record<string, number>;
+    degraded_sources?: Record<string, string>;
+}
+
+export interface PredictionStreamHandlers {
+    onStage?: (stage: string, elapsedMs?: number) => void;
+    onPartial?: (partial: { predicted_close: number; sentiment_breakdown: SentimentBreakdown }) => void;
+    onResult: (result: PredictionResponse) => void;
+    onError: (error: ApiError) => void;
 }
 
 export interface ApiError {
@@ -119,6 +128,45 @@ export async function runPrediction(
     return response.json();
 }
 
+/**
+ * Run stock prediction with live progress (server-sent events).
+ * Returns a function that closes the stream and cancels the run.
+ */
+export function streamPrediction(
+    stock: string,
+    startDate: string,
+    endDate: string,
+    handlers: PredictionStreamHandlers
+): () => void {
+    const params = new URLSearchParams({ stock, start_date: startDate, end_date: endDate });
+    const source = new EventSource(`${API_BASE_URL}/predict/stream?${params.toString()}`);
+
+    source.addEventListener('stage_start', (e) => {
+        handlers.onStage?.(JSON.parse((e as MessageEvent).data).stage);
+    });
+    source.addEventListener('stage_end', (e) => {
+        const data = JSON.parse((e as MessageEvent).data);
+        handlers.onStage?.(data.stage, data.elapsed_ms);
+    });
+    source.addEventListener('partial', (e) => {
+        handlers.onPartial?.(JSON.parse((e as MessageEvent).data));
+    });
+    source.addEventListener('result', (e) => {
+        source.close();
+        handlers.onResult(JSON.parse((e as MessageEvent).data));
+    });
+    source.addEventListener('error', (e) => {
+        source.close();
+        const data = (e as MessageEvent).data;
+        handlers.onError({
+            type: 'generic',
+            message: data ? JSON.parse(data).detail : 'Prediction failed. Please try again.'
+        });
+    });
+
+    return () => source.close();
+}
+
 /**
  * Get download URL for features CSV
  */
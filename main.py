@@ -2,17 +2,20 @@
 Project Kassandra - Main Entry Point
 
 INPUT CONTRACT:
-    - STOCK_NAME: str (e.g., "AAPL", "GOOGL")
+    - STOCK_NAME: str (e.g., "AAPL", "GOOGL"), or a watchlist file of tickers (--watchlist)
     - TIMELINE: tuple (start_date, end_date) in format "YYYY-MM-DD"
 
 OUTPUT CONTRACT:
-    - Predicted closing price for the next trading day: float
+    - Predicted closing price for the next trading day: float (per ticker)
 """
+import argparse
 import sys
-from services.predict_service import run_prediction
+from services.predict_service import run_prediction, run_prediction_profiled
+from services.profiling import trace_path
+from services.watchlist import read_watchlist, run_watchlist
 
 
-def main(stock_name: str, start_date: str, end_date: str):
+def main(stock_name: str, start_date: str, end_date: str, profile: str = None, engine: str = None):
     """
     CLI entry point for stock prediction.
     
@@ -20,9 +23,14 @@ def main(stock_name: str, start_date: str, end_date: str):
         stock_name: Stock ticker symbol
         start_date: Start date in YYYY-MM-DD format
         end_date: End date in YYYY-MM-DD format
+        profile: Profile options to trace the run with (optional, e.g. "all")
+        engine: Model engine name (optional)
     """
     # Execute prediction pipeline
-    result = run_prediction(stock_name, start_date, end_date)
+    if profile:
+        result = run_prediction_profiled(stock_name, start_date, end_date, engine=engine, profile=profile)
+    else:
+        result = run_prediction(stock_name, start_date, end_date, engine=engine)
     
     # Print structured results
     print(f"\n{'='*60}")
@@ -41,21 +49,127 @@ def main(stock_name: str, start_date: str, end_date: str):
     print(f"  Features CSV:    {result['feature_csv_path']}")
     print(f"  Predictions CSV: {result['prediction_csv_path']}")
     print(f"\nLast Updated: {result['last_updated']}")
+    if result.get('trace_id'):
+        print(f"\nStage Timings:")
+        for stage, seconds in result['stage_timings'].items():
+            print(f"  {stage:<22} {seconds * 1000:10.1f} ms")
+        print(f"\nTrace: {trace_path(result['trace_id'])}")
     print(f"{'='*60}")
 
 
-if __name__ == "__main__":
-    if len(sys.argv) != 4:
-        print("Usage: python main.py STOCK_NAME START_DATE END_DATE")
-        print("Example: python main.py TSLA 2020-01-01 2023-12-31")
-        sys.exit(1)
+def batch_main(watchlist: str, start_date: str, end_date: str, workers: int = None,
+               engine: str = None, verbose: bool = False) -> int:
+    """
+    CLI entry point for a watchlist run.
+    
+    Args:
+        watchlist: Watchlist file path
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        workers: Worker processes (optional)
+        engine: Model engine name (optional)
+        verbose: Show each ticker's pipeline output
+    
+    Returns:
+        int: Exit status (1 if any ticker failed)
+    """
+    stocks = read_watchlist(watchlist)
+    print(f"Running {len(stocks)} tickers from {watchlist} ({start_date} to {end_date})...")
+    
+    def report(stock, result, error):
+        if error is None:
+            print(f"  {stock:<10} done    {result['seconds']:8.1f} s")
+        else:
+            print(f"  {stock:<10} FAILED  {error}")
+    
+    batch = run_watchlist(
+        stocks, start_date, end_date, engine=engine, workers=workers, verbose=verbose, on_result=report
+    )
+    results = batch['results']
+    errors = batch['errors']
+    
+    # Print consolidated summary in watchlist order
+    print(f"\n{'='*72}")
+    print(f"WATCHLIST RESULTS ({batch['model_engine']}, {batch['workers']} workers)")
+    print(f"{'='*72}")
+    print(f"{'Ticker':<10} {'Status':<8} {'Predicted':>11} {'Sentiment':>10} {'Seconds':>9}  Notes")
+    for stock in stocks:
+        if stock in results:
+            result = results[stock]
+            degraded = ', '.join(f"{source}: {reason}" for source, reason in result['degraded_sources'].items())
+            print(f"{stock:<10} {'ok':<8} {result['predicted_close']:>11.2f} "
+                  f"{result['sentiment_breakdown']['combined_sentiment']:>10.4f} {result['seconds']:>9.1f}  "
+                  f"{'degraded ' + degraded if degraded else ''}")
+        else:
+            print(f"{stock:<10} {'failed':<8} {'-':>11} {'-':>10} {'-':>9}  {errors[stock]}")
+    
+    ticker_seconds = sum(result['seconds'] for result in results.values())
+    print(f"\nSucceeded: {len(results)}  Failed: {len(errors)}")
+    print(f"Wall time: {batch['wall_seconds']:.1f} s  (sum of per-ticker times: {ticker_seconds:.1f} s)")
     
-    stock_name = sys.argv[1]
-    start_date = sys.argv[2]
-    end_date = sys.argv[3]
+    # Slowest stages summed over the tickers
+    stage_totals = {}
+    for result in results.values():
+        for stage, seconds in result['stage_timings'].items():
+            stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+    if stage_totals:
+        print(f"\nStage Timings (all tickers):")
+        for stage, seconds in sorted(stage_totals.items(), key=lambda item: -item[1]):
+            print(f"  {stage:<22} {seconds:10.1f} s")
+    print(f"{'='*72}")
+    
+    return 1 if errors else 0
+
+
+def parse_args(argv: list) -> argparse.Namespace:
+    """
+    Parse the command line.
+    
+    Args:
+        argv: Arguments without the program name
+    
+    Returns:
+        argparse.Namespace with stock_name (None in watchlist mode), start_date and end_date
+    """
+    parser = argparse.ArgumentParser(
+        usage="python main.py STOCK_NAME START_DATE END_DATE [--profile[=OPTIONS]] [--engine ENGINE]\n"
+              "       python main.py --watchlist FILE START_DATE END_DATE [--workers N] [--engine ENGINE] [--verbose]",
+        description="Predict the next-day close of a stock, or of every ticker in a watchlist",
+        epilog="Examples: python main.py TSLA 2020-01-01 2023-12-31\n"
+               "          python main.py --watchlist tickers.txt 2024-01-01 2024-06-30 --workers 4",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('args', nargs='+', metavar='ARG',
+                        help="STOCK_NAME START_DATE END_DATE, or START_DATE END_DATE with --watchlist")
+    parser.add_argument('--watchlist', metavar='FILE', help="Run every ticker listed in FILE")
+    parser.add_argument('--workers', type=int, metavar='N', help="Worker processes for --watchlist (default: CPU count)")
+    parser.add_argument('--engine', help="Model engine (default: KASSANDRA_MODEL_ENGINE or random_forest)")
+    parser.add_argument('--verbose', action='store_true', help="Show each ticker's pipeline output with --watchlist")
+    parser.add_argument('--profile', nargs='?', const='all', metavar='OPTIONS',
+                        help="Trace the run (all, or any of spans,cprofile,memory)")
+    args = parser.parse_args(argv)
+    
+    expected = 2 if args.watchlist else 3
+    if len(args.args) != expected:
+        parser.error(f"expected {'START_DATE END_DATE' if args.watchlist else 'STOCK_NAME START_DATE END_DATE'}")
+    if args.watchlist and args.profile:
+        parser.error("--profile traces a single ticker and cannot be combined with --watchlist")
+    
+    args.stock_name = None if args.watchlist else args.args[0]
+    args.start_date, args.end_date = args.args[-2:]
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
     
     try:
-        main(stock_name, start_date, end_date)
+        if args.watchlist:
+            sys.exit(batch_main(
+                args.watchlist, args.start_date, args.end_date, workers=args.workers,
+                engine=args.engine, verbose=args.verbose
+            ))
+        main(args.stock_name, args.start_date, args.end_date, profile=args.profile, engine=args.engine)
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
@@ -0,0 +1,180 @@
+"""
+Feature ablation and permutation-importance engine.
+
+Fits any number of feature subsets concurrently on one shared supervised
+matrix and measures how much each sentiment source contributes, so we can
+tell which sources are worth fetching.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import os
+import pandas as pd
+import numpy as np
+from model.engines import make_model
+
+
+# Feature columns produced by each data source
+SOURCE_FEATURES = {
+    'price': ['daily_return', 'ma_5', 'ma_10', 'volatility_5',
+              'ma_7', 'ma_21', 'volatility_7', 'volatility_21'],
+    'news': ['avg_news_sentiment', 'news_article_count'],
+    'trends': ['trend_score', 'trend_delta_7d'],
+    'wiki': ['wiki_views', 'wiki_views_delta'],
+}
+
+# Fused from every sentiment source, so it is dropped whenever one is left out
+FUSION_FEATURES = ['combined_sentiment']
+
+SENTIMENT_SOURCES = ['news', 'trends', 'wiki']
+
+
+def source_of(column: str) -> str:
+    """
+    Name the data source a feature column comes from.
+
+    Args:
+        column: Feature column name
+
+    Returns:
+        Source name ('price', 'news', 'trends', 'wiki', 'fusion' or 'other')
+    """
+    for source, columns in SOURCE_FEATURES.items():
+        if column in columns:
+            return source
+    if column in FUSION_FEATURES:
+        return 'fusion'
+    return 'other'
+
+
+def leave_one_source_out_sets(feature_columns: list) -> dict:
+    """
+    Build the standard ablation feature sets from the available columns.
+
+    Args:
+        feature_columns: All available feature column names
+
+    Returns:
+        Dictionary mapping set name -> list of columns:
+            - all: every column
+            - price_only: price/technical columns only
+            - without_<source>: every column except that source and the fused score
+    """
+    price_cols = [col for col in feature_columns if source_of(col) == 'price']
+    feature_sets = {
+        'all': list(feature_columns),
+        'price_only': price_cols
+    }
+
+    for source in SENTIMENT_SOURCES:
+        if not any(source_of(col) == source for col in feature_columns):
+            continue
+        feature_sets[f'without_{source}'] = [
+            col for col in feature_columns
+            if source_of(col) not in (source, 'fusion')
+        ]
+
+    return feature_sets
+
+
+def _grouped_permutation_importance(model, X_val: np.ndarray, y_val: np.ndarray, groups: dict,
+                                    n_repeats: int, seed: int) -> dict:
+    """Mean MAE increase when the columns of each group are shuffled together."""
+    from sklearn.metrics import mean_absolute_error
+
+    rng = np.random.default_rng(seed)
+    base_mae = mean_absolute_error(y_val, model.predict(X_val))
+    importances = {}
+
+    for name, positions in groups.items():
+        increases = []
+        for _ in range(n_repeats):
+            X_perm = X_val.copy()
+            X_perm[:, positions] = X_val[rng.permutation(len(X_val))][:, positions]
+            increases.append(mean_absolute_error(y_val, model.predict(X_perm)) - base_mae)
+        importances[name] = float(np.mean(increases))
+
+    return importances
+
+
+def run_ablation(features_df: pd.DataFrame, feature_sets: dict, engine: str = None,
+                 train_fraction: float = 0.8, permutation_repeats: int = 5,
+                 max_workers: int = None) -> dict:
+    """
+    Fit one model per feature subset concurrently and score them.
+
+    The supervised matrix is built once; every subset selects its columns from
+    it. Each task fits its model single-threaded, computes validation metrics
+    and, if permutation_repeats > 0, permutation importances per feature and
+    per source.
+
+    Args:
+        features_df: DataFrame with features and Close price
+        feature_sets: Dictionary mapping set name -> list of feature columns.
+            Columns missing from features_df are ignored.
+        engine: Model engine name (optional, see model.engines)
+        train_fraction: Fraction of rows used for training (time-ordered split)
+        permutation_repeats: Shuffles per feature/source (0 disables importances)
+        max_workers: Concurrent fits (defaults to the CPU count)
+
+    Returns:
+        Dictionary mapping set name -> metrics dict with mae, rmse, train_size,
+        val_size, features, model and (when enabled) feature_importance and
+        source_importance
+    """
+    from sklearn.metrics import mean_absolute_error, mean_squared_error
+
+    # Create supervised dataset once for every subset
+    union_cols = []
+    for cols in feature_sets.values():
+        union_cols.extend(col for col in cols if col in features_df.columns and col not in union_cols)
+
+    df = features_df[union_cols + ['Close']].copy()
+    df['target'] = df['Close'].shift(-1)
+    df = df.dropna()
+
+    X = df[union_cols].to_numpy(dtype=np.float64)
+    y = df['target'].values
+    position = {col: i for i, col in enumerate(union_cols)}
+    split_idx = int(len(X) * train_fraction)
+
+    def evaluate(cols: list) -> dict:
+        cols = [col for col in cols if col in position]
+        if not cols:
+            raise ValueError("Feature set has no available columns")
+
+        X_sub = X[:, [position[col] for col in cols]]
+        X_train, X_val = X_sub[:split_idx], X_sub[split_idx:]
+        y_train, y_val = y[:split_idx], y[split_idx:]
+
+        model = make_model(engine)
+        # Parallelism comes from running sets concurrently
+        if 'n_jobs' in model.get_params():
+            model.set_params(n_jobs=1)
+        model.fit(X_train, y_train)
+
+        y_pred = model.predict(X_val)
+        metrics = {
+            'mae': mean_absolute_error(y_val, y_pred),
+            'rmse': np.sqrt(mean_squared_error(y_val, y_pred)),
+            'train_size': len(X_train),
+            'val_size': len(X_val),
+            'features': cols,
+            'model': model
+        }
+
+        if permutation_repeats > 0:
+            metrics['feature_importance'] = _grouped_permutation_importance(
+                model, X_val, y_val, {col: [i] for i, col in enumerate(cols)}, permutation_repeats, seed=42
+            )
+            source_groups = {}
+            for i, col in enumerate(cols):
+                source_groups.setdefault(source_of(col), []).append(i)
+            metrics['source_importance'] = _grouped_permutation_importance(
+                model, X_val, y_val, source_groups, permutation_repeats, seed=42
+            )
+
+        return metrics
+
+    workers = max_workers or min(len(feature_sets), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {name: executor.submit(evaluate, cols) for name, cols in feature_sets.items()}
+        return {name: future.result() for name, future in futures.items()}
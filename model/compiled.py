@@ -0,0 +1,284 @@
+"""
+Compiled tree-ensemble inference module.
+
+Flattens a fitted forest into contiguous NumPy node arrays and evaluates it
+with a level-synchronous, pure-NumPy traversal. This skips scikit-learn's
+per-call input validation and joblib dispatch, which dominate the cost of
+scoring one row.
+
+Models that score a single row once and are then discarded (the walk-forward
+log) skip compilation and walk the fitted trees directly instead.
+"""
+import weakref
+import numpy as np
+
+
+class CompiledForest:
+    """
+    Tree ensemble stored as flat node arrays.
+
+    Every tree's nodes are concatenated; roots holds the offset of each tree's
+    root. Leaves point to themselves, so a fixed number of traversal steps
+    (the maximum depth) lands every row on a leaf without per-row masking.
+
+    Attributes:
+        feature: Split feature index per node (int64)
+        threshold: Split threshold per node (float64, +inf on leaves)
+        left: Left child per node (int64, self on leaves)
+        right: Right child per node (int64, self on leaves)
+        missing_left: Whether NaN goes left per node (bool)
+        value: Leaf value per node (float64)
+        roots: Root node offset per tree (int64)
+        depth: Maximum tree depth
+        baseline: Constant added before the tree sum
+        average: Divide the tree sum by the number of trees
+        input_dtype: dtype inputs are cast to before comparison
+        n_features: Number of input features
+    """
+
+    def __init__(self, trees: list, baseline: float, average: bool, input_dtype, n_features: int):
+        """
+        Build flat arrays from per-tree node arrays.
+
+        Args:
+            trees: List of (feature, threshold, left, right, missing_left, value, depth)
+                tuples with local node ids and -1 marking leaf children
+            baseline: Constant added before the tree sum
+            average: Whether the ensemble averages (forest) or sums (boosting)
+            input_dtype: dtype inputs are cast to, matching scikit-learn
+            n_features: Number of input features
+        """
+        sizes = np.array([len(tree[0]) for tree in trees], dtype=np.int64)
+        self.roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+
+        # Concatenate raw arrays first, then remap ids in a few vectorized passes
+        t_feature, t_threshold, t_left, t_right, t_missing, t_value, t_depth = zip(*trees)
+        left = np.concatenate(t_left).astype(np.int64)
+        right = np.concatenate(t_right).astype(np.int64)
+        is_leaf = left < 0
+        offsets = np.repeat(self.roots, sizes)
+        self_ids = np.arange(len(left), dtype=np.int64)
+
+        self.feature = np.where(is_leaf, 0, np.concatenate(t_feature)).astype(np.int64)
+        self.threshold = np.where(is_leaf, np.inf, np.concatenate(t_threshold)).astype(np.float64)
+        self.left = np.where(is_leaf, self_ids, left + offsets)
+        self.right = np.where(is_leaf, self_ids, right + offsets)
+        self.missing_left = np.concatenate(t_missing).astype(bool)
+        self.value = np.ascontiguousarray(np.concatenate(t_value), dtype=np.float64)
+        depth = max(t_depth)
+        self.depth = depth
+        self.baseline = float(baseline)
+        self.average = average
+        self.input_dtype = input_dtype
+        self.n_features = n_features
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Predict targets for a batch of rows.
+
+        Args:
+            X: Array-like of shape (n_rows, n_features) or (n_features,)
+
+        Returns:
+            Array of predictions, one per row
+        """
+        X = np.asarray(X, dtype=self.input_dtype)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+
+        n_rows = X.shape[0]
+        rows = np.arange(n_rows)[:, None]
+        node = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+
+        for _ in range(self.depth):
+            x = X[rows, self.feature[node]]
+            go_left = (x <= self.threshold[node]) | (np.isnan(x) & self.missing_left[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+
+        # Accumulate tree by tree, in estimator order, as scikit-learn does
+        leaf_values = self.value[node]
+        out = np.zeros(n_rows, dtype=np.float64)
+        out += self.baseline
+        for t in range(self.n_trees):
+            out += leaf_values[:, t]
+
+        if self.average:
+            out /= self.n_trees
+
+        return out
+
+
+def _tree_arrays(tree) -> tuple:
+    """Extract node arrays from a fitted sklearn Tree object."""
+    missing = getattr(tree, 'missing_go_to_left', None)
+    if missing is None:
+        missing = np.zeros(tree.node_count, dtype=bool)
+
+    return (
+        tree.feature,
+        tree.threshold,
+        tree.children_left,
+        tree.children_right,
+        np.asarray(missing, dtype=bool),
+        tree.value[:, 0, 0],
+        tree.max_depth
+    )
+
+
+def _predictor_arrays(predictor) -> tuple:
+    """Extract node arrays from a fitted HistGradientBoosting TreePredictor."""
+    nodes = predictor.nodes
+    if np.any(nodes['is_categorical']):
+        raise TypeError("Categorical splits are not supported")
+
+    is_leaf = nodes['is_leaf'].astype(bool)
+    left = np.where(is_leaf, -1, nodes['left'].astype(np.int64))
+    right = np.where(is_leaf, -1, nodes['right'].astype(np.int64))
+
+    return (
+        nodes['feature_idx'].astype(np.int64),
+        nodes['num_threshold'],
+        left,
+        right,
+        nodes['missing_go_to_left'].astype(bool),
+        nodes['value'],
+        int(nodes['depth'].max())
+    )
+
+
+def compile_model(model) -> CompiledForest:
+    """
+    Compile a fitted regressor into a CompiledForest.
+
+    Args:
+        model: Fitted RandomForestRegressor or single-output
+            HistGradientBoostingRegressor with squared-error loss
+
+    Returns:
+        CompiledForest matching the model's predictions
+
+    Raises:
+        TypeError: If the model type or configuration is not supported
+    """
+    from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
+
+    if isinstance(model, RandomForestRegressor):
+        if model.n_outputs_ != 1:
+            raise TypeError("Only single-output forests are supported")
+        trees = [_tree_arrays(estimator.tree_) for estimator in model.estimators_]
+        # sklearn trees compare float32 inputs against float64 thresholds
+        return CompiledForest(trees, 0.0, True, np.float32, model.n_features_in_)
+
+    if isinstance(model, HistGradientBoostingRegressor):
+        if model.loss != 'squared_error':
+            raise TypeError("Only squared_error boosting is supported")
+        trees = [_predictor_arrays(predictors[0]) for predictors in model._predictors]
+        baseline = np.asarray(model._baseline_prediction).ravel()[0]
+        return CompiledForest(trees, baseline, False, np.float64, model.n_features_in_)
+
+    raise TypeError(f"Cannot compile model of type {type(model).__name__}")
+
+
+# Compiled forms of models already seen, dropped with the model itself
+_compiled_cache = weakref.WeakKeyDictionary()
+
+# Largest batch scored with the compiled forest
+COMPILED_MAX_ROWS = 64
+
+
+def fast_predict(model, X) -> np.ndarray:
+    """
+    Predict with the compiled form of a model, falling back to model.predict.
+
+    The compiled forest is built on first use and cached for the lifetime of
+    the model object. Batches larger than COMPILED_MAX_ROWS go to
+    scikit-learn, whose threaded batch path is faster there.
+
+    Args:
+        model: Fitted regressor
+        X: Array-like of shape (n_rows, n_features)
+
+    Returns:
+        Array of predictions, one per row
+    """
+    if len(X) > COMPILED_MAX_ROWS:
+        return model.predict(X)
+
+    try:
+        compiled = _compiled_cache[model]
+    except KeyError:
+        try:
+            compiled = compile_model(model)
+        except (TypeError, AttributeError):
+            compiled = None
+        _compiled_cache[model] = compiled
+    except TypeError:
+        # Unhashable or non-weakrefable model
+        compiled = None
+
+    if compiled is None:
+        return model.predict(X)
+
+    return compiled.predict(X)
+
+
+# Largest batch scored by walking the trees instead of compiling
+ONE_SHOT_MAX_ROWS = 4
+
+
+def _walk_forest(model, row: np.ndarray) -> float:
+    """Score one row by walking every tree of a forest from root to leaf."""
+    # Round-trip through float32 to compare exactly like scikit-learn
+    x = np.asarray(row, dtype=np.float32).astype(np.float64).tolist()
+    total = 0.0
+
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        left, right = tree.children_left, tree.children_right
+        feature, threshold = tree.feature, tree.threshold
+        missing_left = getattr(tree, 'missing_go_to_left', None)
+
+        node = 0
+        while left[node] != -1:
+            value = x[feature[node]]
+            if value != value:
+                go_left = missing_left is not None and missing_left[node]
+            else:
+                go_left = value <= threshold[node]
+            node = left[node] if go_left else right[node]
+
+        total += tree.value[node, 0, 0]
+
+    return total / len(model.estimators_)
+
+
+def predict_once(model, X) -> np.ndarray:
+    """
+    Predict with a model that will not be used again.
+
+    Compiling costs about as much as one scikit-learn predict, so a forest
+    scoring only a handful of rows is walked directly; anything else goes
+    to scikit-learn.
+
+    Args:
+        model: Fitted regressor
+        X: Array-like of shape (n_rows, n_features)
+
+    Returns:
+        Array of predictions, one per row
+    """
+    from sklearn.ensemble import RandomForestRegressor
+
+    X = np.asarray(X, dtype=np.float64)
+
+    if (isinstance(model, RandomForestRegressor) and model.n_outputs_ == 1
+            and X.ndim == 2 and len(X) <= ONE_SHOT_MAX_ROWS):
+        return np.array([_walk_forest(model, row) for row in X], dtype=np.float64)
+
+    return model.predict(X)
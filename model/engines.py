@@ -0,0 +1,83 @@
+"""
+Model engine registry.
+
+Every regressor the pipeline fits is built here, so the estimator can be
+swapped through configuration (``KASSANDRA_MODEL_ENGINE``) or per request
+without touching the training code. Estimator classes are referenced by
+import path and only imported when a model is built, so importing the
+registry does not load scikit-learn.
+"""
+import importlib
+import os
+
+
+# Engine name -> (estimator import path, default hyperparameters)
+ENGINES = {
+    'random_forest': (
+        'sklearn.ensemble.RandomForestRegressor',
+        {'n_estimators': 100, 'random_state': 42, 'n_jobs': -1}
+    ),
+    'hist_gradient_boosting': (
+        'sklearn.ensemble.HistGradientBoostingRegressor',
+        {'max_iter': 200, 'learning_rate': 0.05, 'random_state': 42}
+    ),
+}
+
+DEFAULT_ENGINE = 'random_forest'
+
+
+def resolve_engine(engine: str = None) -> str:
+    """
+    Resolve the engine name to use for a training run.
+
+    Args:
+        engine: Requested engine name (optional). Falls back to the
+            KASSANDRA_MODEL_ENGINE environment variable, then DEFAULT_ENGINE.
+
+    Returns:
+        Validated engine name
+
+    Raises:
+        ValueError: If the engine is not registered
+    """
+    name = engine or os.environ.get('KASSANDRA_MODEL_ENGINE') or DEFAULT_ENGINE
+    name = name.strip().lower()
+
+    if name not in ENGINES:
+        raise ValueError(
+            f"Unknown model engine '{name}'. Available engines: {', '.join(sorted(ENGINES))}"
+        )
+
+    return name
+
+
+def make_model(engine: str = None, params: dict = None):
+    """
+    Build an unfitted regressor for the given engine.
+
+    Args:
+        engine: Engine name (optional, see resolve_engine)
+        params: Hyperparameters overriding the engine defaults (optional)
+
+    Returns:
+        Unfitted scikit-learn regressor
+    """
+    estimator_path, defaults = ENGINES[resolve_engine(engine)]
+    module_name, class_name = estimator_path.rsplit('.', 1)
+    estimator_cls = getattr(importlib.import_module(module_name), class_name)
+
+    model_params = dict(defaults)
+    if params:
+        model_params.update(params)
+
+    return estimator_cls(**model_params)
+
+
+def available_engines() -> list:
+    """
+    List registered engine names.
+
+    Returns:
+        Sorted list of engine names
+    """
+    return sorted(ENGINES)
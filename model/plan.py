@@ -0,0 +1,165 @@
+"""
+Coordinated training plan module.
+
+A prediction request needs three things from the model: the headline next-day
+model, its validation metrics and the walk-forward prediction log. All of them
+are fits on an expanding window of the same supervised dataset, so the plan
+collects every window up front and fits each distinct window exactly once.
+"""
+import hashlib
+import json
+import pandas as pd
+import numpy as np
+from model.engines import make_model, resolve_engine
+from model.compiled import fast_predict, predict_once
+from utils.cache import get_cache, SETTLED_TTL
+
+
+class TrainingPlan:
+    """
+    Deduplicated set of expanding-window fits for one feature frame.
+
+    Attributes:
+        feature_columns: Feature column names used for every fit
+        engine: Model engine name (None resolves to the configured default)
+        params: Hyperparameters overriding the engine defaults (None for defaults)
+        min_train_size: Minimum training rows before the first logged prediction
+        train_fraction: Fraction of rows used to train the headline model
+        n_jobs: Threads per fit for engines that support it (None keeps the engine default)
+        cache_headline: Store the headline model in the shared cache, keyed by
+            its training data, so other workers reuse it instead of refitting
+        fit_count: Number of model fits performed so far
+    """
+
+    def __init__(self, features_df: pd.DataFrame, feature_columns: list, engine: str = None,
+                 min_train_size: int = 30, train_fraction: float = 0.8, params: dict = None,
+                 n_jobs: int = None, cache_headline: bool = False):
+        self.feature_columns = feature_columns
+        self.engine = engine
+        self.params = params
+        self.n_jobs = n_jobs
+        self.cache_headline = cache_headline
+        self.min_train_size = min_train_size
+        self.train_fraction = train_fraction
+        self.fit_count = 0
+        self._headline = None
+
+        # Create supervised dataset once: features at time t predict Close at t+1
+        df = features_df.copy()
+        df['target'] = df['Close'].shift(-1)
+        df = df.dropna()
+
+        self.index = df.index
+        self.X = df[feature_columns].values
+        self.y = df['target'].values
+        self.split_idx = int(len(self.X) * train_fraction)
+
+    def _fit(self, end: int):
+        """Fit a model on rows [0, end), reusing the headline model for its window."""
+        if self._headline is not None and end == self.split_idx:
+            return self._headline
+        if self.cache_headline and end == self.split_idx:
+            return get_cache().get_or_compute(
+                self._window_key(end), lambda: self._fit_window(end), ttl=SETTLED_TTL
+            )
+        return self._fit_window(end)
+
+    def _window_key(self, end: int) -> str:
+        """Cache key identifying a fit: engine, hyperparameters and training rows."""
+        import sklearn
+
+        digest = hashlib.sha256()
+        digest.update(json.dumps(
+            [resolve_engine(self.engine), self.params, self.feature_columns, sklearn.__version__],
+            sort_keys=True, default=str
+        ).encode())
+        digest.update(np.ascontiguousarray(self.X[:end]).tobytes())
+        digest.update(np.ascontiguousarray(self.y[:end]).tobytes())
+        return f"model:{digest.hexdigest()}"
+
+    def _fit_window(self, end: int):
+        """Fit a fresh model on rows [0, end)."""
+        model = make_model(self.engine, self.params)
+        if self.n_jobs is not None and 'n_jobs' in model.get_params():
+            model.set_params(n_jobs=self.n_jobs)
+        model.fit(self.X[:end], self.y[:end])
+        self.fit_count += 1
+        return model
+
+    def run(self, validation: bool = True, prediction_log: bool = True, before_fit=None) -> dict:
+        """
+        Execute the plan.
+
+        Windows are visited in increasing order and each fitted model is
+        dropped as soon as every consumer of its window has used it, so at most
+        one model (plus the headline model) is alive at a time. The headline
+        model is kept, so running validation first and the log later still
+        fits its window only once.
+
+        Args:
+            validation: Fit the headline model and compute validation metrics
+            prediction_log: Generate the walk-forward prediction log
+            before_fit: Callable invoked before every fit (optional), e.g. to
+                abort a cancelled run by raising
+
+        Returns:
+            dict containing:
+                - model: Headline model trained on the first train_fraction rows (or None)
+                - metrics: Validation metrics dict (or None)
+                - predictions_log: Walk-forward DataFrame (or None)
+                - fit_count: Number of fits performed by this run
+        """
+        # Collect consumers per training window end
+        windows = {}
+        if validation:
+            windows.setdefault(self.split_idx, []).append('validation')
+        if prediction_log:
+            for i in range(self.min_train_size, len(self.X)):
+                windows.setdefault(i, []).append('log')
+
+        fits_before = self.fit_count
+        model = None
+        metrics = None
+        predictions_log = [] if prediction_log else None
+
+        for end in sorted(windows):
+            if before_fit is not None:
+                before_fit()
+            window_model = self._fit(end)
+
+            for consumer in windows[end]:
+                if consumer == 'validation':
+                    model = window_model
+                    self._headline = window_model
+                    metrics = self._validate(window_model)
+                else:
+                    predicted_price = predict_once(window_model, self.X[end:end + 1])[0]
+                    predictions_log.append({
+                        'Date': self.index[end].strftime('%Y-%m-%d'),
+                        'Actual_Closing_Price': self.y[end],
+                        'Predicted_Closing_Price': predicted_price
+                    })
+
+        if prediction_log:
+            predictions_log = pd.DataFrame(predictions_log)
+
+        return {
+            'model': model,
+            'metrics': metrics,
+            'predictions_log': predictions_log,
+            'fit_count': self.fit_count - fits_before
+        }
+
+    def _validate(self, model) -> dict:
+        """Evaluate the headline model on the held-out tail."""
+        from sklearn.metrics import mean_absolute_error, mean_squared_error
+
+        X_val, y_val = self.X[self.split_idx:], self.y[self.split_idx:]
+        y_pred = fast_predict(model, X_val)
+
+        return {
+            'mae': mean_absolute_error(y_val, y_pred),
+            'rmse': np.sqrt(mean_squared_error(y_val, y_pred)),
+            'train_size': self.split_idx,
+            'val_size': len(X_val)
+        }
@@ -3,6 +3,7 @@ Model prediction module.
 """
 import pandas as pd
 import numpy as np
+from model.compiled import fast_predict
 
 
 def predict_next_close(model, latest_features: pd.Series, feature_cols: list = None) -> float:
@@ -23,7 +24,7 @@ def predict_next_close(model, latest_features: pd.Series, feature_cols: list = N
     
     X = latest_features[feature_cols].values.reshape(1, -1)
     
-    prediction = model.predict(X)[0]
+    prediction = fast_predict(model, X)[0]
     
     return prediction
 
@@ -39,4 +40,69 @@ def predict_next_day(model: object, features: dict) -> float:
     Returns:
         Predicted closing price
     """
-    pass
+    latest_rows = pd.DataFrame([features])
+    
+    return float(predict_next_close_batch(model, latest_rows, list(features)).iloc[0])
+
+
+def latest_feature_rows(features_by_ticker: dict) -> pd.DataFrame:
+    """
+    Stack the most recent feature row of every ticker into one frame.
+    
+    Args:
+        features_by_ticker: Dictionary mapping ticker -> feature DataFrame
+    
+    Returns:
+        DataFrame indexed by ticker with one row per ticker
+    """
+    rows = {ticker: df.iloc[-1] for ticker, df in features_by_ticker.items() if not df.empty}
+    latest_rows = pd.DataFrame.from_dict(rows, orient='index')
+    latest_rows.index.name = 'ticker'
+    
+    return latest_rows
+
+
+def predict_next_close_batch(models, latest_rows: pd.DataFrame, feature_cols: list = None) -> pd.Series:
+    """
+    Predict next-day closing prices for many tickers at once.
+    
+    Rows that share a model are scored in a single vectorized predict call, so a
+    pooled cross-sectional model scores the whole watchlist in one pass.
+    
+    Args:
+        models: A single trained model shared by every row (pooled), or a
+            dictionary mapping ticker (row index) -> trained model
+        latest_rows: DataFrame indexed by ticker with the latest feature values
+        feature_cols: List of feature column names to use (optional)
+    
+    Returns:
+        Series of predicted closing prices indexed like latest_rows
+    
+    Raises:
+        KeyError: If a per-ticker model is missing for a row
+    """
+    # Use default feature columns if not specified
+    if feature_cols is None:
+        feature_cols = ['daily_return', 'ma_5', 'ma_10', 'volatility_5']
+    
+    X = latest_rows[feature_cols].to_numpy(dtype=np.float64)
+    predictions = np.empty(len(latest_rows), dtype=np.float64)
+    
+    if not isinstance(models, dict):
+        # Pooled model: one call for every row
+        if len(X):
+            predictions[:] = fast_predict(models, X)
+        return pd.Series(predictions, index=latest_rows.index, name='predicted_close')
+    
+    # Group row positions by model so each distinct model predicts once
+    groups = {}
+    for position, ticker in enumerate(latest_rows.index):
+        if ticker not in models:
+            raise KeyError(f"No model provided for ticker '{ticker}'")
+        model = models[ticker]
+        groups.setdefault(id(model), (model, []))[1].append(position)
+    
+    for model, positions in groups.values():
+        predictions[positions] = fast_predict(model, X[positions])
+    
+    return pd.Series(predictions, index=latest_rows.index, name='predicted_close')
@@ -1,138 +1,145 @@
 """
 Model training module.
 """
+import os
+import pickle
+import tempfile
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_absolute_error, mean_squared_error
+from model.engines import make_model
+from model.plan import TrainingPlan
+from model.ablation import run_ablation, source_of
 
 
-def train_baseline_model(features_df: pd.DataFrame, feature_columns=None):
+def train_baseline_model(features_df: pd.DataFrame, feature_columns=None, engine: str = None):
     """
     Train a baseline supervised learning model for next-day price prediction.
     
     Args:
         features_df: DataFrame with technical features and Close price
         feature_columns: List of feature column names to use (optional)
+        engine: Model engine name (optional, see model.engines)
     
     Returns:
         Trained model
     """
-    # Create supervised dataset: features at time t predict Close at t+1
-    df = features_df.copy()
-    
-    # Shift target to create next-day prediction task
-    df['target'] = df['Close'].shift(-1)
-    
-    # Drop last row (no target available)
-    df = df.dropna()
-    
     # Define feature columns
     if feature_columns is None:
         feature_cols = ['daily_return', 'ma_5', 'ma_10', 'volatility_5']
     else:
         feature_cols = feature_columns
     
-    X = df[feature_cols].values
-    y = df['target'].values
-    
     # Time-based split: 80% train, 20% validation (no shuffling)
-    split_idx = int(len(X) * 0.8)
-    
-    X_train, X_val = X[:split_idx], X[split_idx:]
-    y_train, y_val = y[:split_idx], y[split_idx:]
+    plan = TrainingPlan(features_df, feature_cols, engine=engine)
+    result = plan.run(validation=True, prediction_log=False)
     
-    # Train baseline model
-    model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
-    model.fit(X_train, y_train)
+    print_validation_metrics(result['metrics'])
     
-    # Evaluate on validation set
-    y_pred = model.predict(X_val)
-    mae = mean_absolute_error(y_val, y_pred)
-    rmse = np.sqrt(mean_squared_error(y_val, y_pred))
-    
-    print(f"  Training samples: {len(X_train)}")
-    print(f"  Validation samples: {len(X_val)}")
-    print(f"  Validation MAE: ${mae:.2f}")
-    print(f"  Validation RMSE: ${rmse:.2f}")
+    return result['model']
+
+
+def print_validation_metrics(metrics: dict) -> None:
+    """
+    Print validation metrics of a trained model.
     
-    return model
+    Args:
+        metrics: Metrics dict with train_size, val_size, mae and rmse
+    """
+    print(f"  Training samples: {metrics['train_size']}")
+    print(f"  Validation samples: {metrics['val_size']}")
+    print(f"  Validation MAE: ${metrics['mae']:.2f}")
+    print(f"  Validation RMSE: ${metrics['rmse']:.2f}")
 
 
-def train_with_ablation(features_df: pd.DataFrame):
+def train_with_ablation(features_df: pd.DataFrame, engine: str = None):
     """
     Train models with ablation study: baseline (price-only) vs sentiment-aware.
     
+    For more feature subsets (e.g. leave-one-source-out) and permutation
+    importances use model.ablation.run_ablation directly.
+    
     Args:
         features_df: DataFrame with all features including sentiment
+        engine: Model engine name (optional, see model.engines)
     
     Returns:
         Tuple of (sentiment_aware_model, baseline_metrics, sentiment_metrics)
     """
-    # Create supervised dataset
-    df = features_df.copy()
-    df['target'] = df['Close'].shift(-1)
-    df = df.dropna()
+    # Identify all numeric feature columns (exclude OHLCV)
+    exclude_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
+    all_feature_cols = [col for col in features_df.columns if col not in exclude_cols and features_df[col].dtype in ['float64', 'int64']]
     
-    # Identify all numeric feature columns (exclude OHLCV, target)
-    exclude_cols = ['Open', 'High', 'Low', 'Close', 'Volume', 'target']
-    all_feature_cols = [col for col in df.columns if col not in exclude_cols and df[col].dtype in ['float64', 'int64']]
-    
-    # Baseline features (price-only)
-    baseline_feature_cols = ['daily_return', 'ma_5', 'ma_10', 'volatility_5']
+    # Baseline features (price-only), limited to the columns actually present
+    baseline_feature_cols = [col for col in all_feature_cols if source_of(col) == 'price']
     
     # Sentiment-aware features (price + sentiment)
     sentiment_feature_cols = all_feature_cols
     
-    y = df['target'].values
+    # Both models are fitted concurrently on one shared training matrix
+    results = run_ablation(
+        features_df,
+        {'baseline': baseline_feature_cols, 'sentiment': sentiment_feature_cols},
+        engine=engine,
+        permutation_repeats=0
+    )
+    baseline_metrics = results['baseline']
+    sentiment_metrics = results['sentiment']
+    sentiment_model = sentiment_metrics.pop('model')
+    baseline_metrics.pop('model')
     
-    # Time-based split
-    split_idx = int(len(df) * 0.8)
+    # Calculate improvement
+    sentiment_metrics['improvement'] = ((baseline_metrics['rmse'] - sentiment_metrics['rmse']) / baseline_metrics['rmse']) * 100
     
-    # Train baseline model (price-only)
-    X_baseline = df[baseline_feature_cols].values
-    X_train_base, X_val_base = X_baseline[:split_idx], X_baseline[split_idx:]
-    y_train, y_val = y[:split_idx], y[split_idx:]
+    return sentiment_model, baseline_metrics, sentiment_metrics
+
+
+def generate_prediction_log(features_df: pd.DataFrame, feature_columns: list, engine: str = None,
+                            min_train_size: int = 30) -> pd.DataFrame:
+    """
+    Walk-forward prediction log: for each day, train only on the days before it.
     
-    baseline_model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
-    baseline_model.fit(X_train_base, y_train)
+    Args:
+        features_df: DataFrame with features and Close price (datetime index)
+        feature_columns: List of feature column names to use
+        engine: Model engine name (optional, see model.engines)
+        min_train_size: Minimum number of training rows before the first prediction
     
-    y_pred_base = baseline_model.predict(X_val_base)
-    baseline_mae = mean_absolute_error(y_val, y_pred_base)
-    baseline_rmse = np.sqrt(mean_squared_error(y_val, y_pred_base))
+    Returns:
+        DataFrame with columns [Date, Actual_Closing_Price, Predicted_Closing_Price]
+    """
+    plan = TrainingPlan(features_df, feature_columns, engine=engine, min_train_size=min_train_size)
     
-    # Train sentiment-aware model (price + sentiment)
-    X_sentiment = df[sentiment_feature_cols].values
-    X_train_sent, X_val_sent = X_sentiment[:split_idx], X_sentiment[split_idx:]
+    return plan.run(validation=False, prediction_log=True)['predictions_log']
+
+
+def train_pooled_model(features_by_ticker: dict, feature_columns: list, engine: str = None):
+    """
+    Train one cross-sectional model on the stacked history of many tickers.
     
-    sentiment_model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
-    sentiment_model.fit(X_train_sent, y_train)
+    Each ticker's next-day target is built within its own history before
+    stacking, so no target crosses from one ticker into another.
     
-    y_pred_sent = sentiment_model.predict(X_val_sent)
-    sentiment_mae = mean_absolute_error(y_val, y_pred_sent)
-    sentiment_rmse = np.sqrt(mean_squared_error(y_val, y_pred_sent))
+    Args:
+        features_by_ticker: Dictionary mapping ticker -> feature DataFrame
+        feature_columns: List of feature column names to use
+        engine: Model engine name (optional, see model.engines)
     
-    # Calculate improvement
-    improvement = ((baseline_rmse - sentiment_rmse) / baseline_rmse) * 100
-    
-    baseline_metrics = {
-        'mae': baseline_mae,
-        'rmse': baseline_rmse,
-        'train_size': len(X_train_base),
-        'val_size': len(X_val_base),
-        'features': baseline_feature_cols
-    }
-    
-    sentiment_metrics = {
-        'mae': sentiment_mae,
-        'rmse': sentiment_rmse,
-        'train_size': len(X_train_sent),
-        'val_size': len(X_val_sent),
-        'features': sentiment_feature_cols,
-        'improvement': improvement
-    }
+    Returns:
+        Trained pooled model
+    """
+    X_parts, y_parts = [], []
     
-    return sentiment_model, baseline_metrics, sentiment_metrics
+    for features_df in features_by_ticker.values():
+        df = features_df[feature_columns + ['Close']].copy()
+        df['target'] = df['Close'].shift(-1)
+        df = df.dropna()
+        X_parts.append(df[feature_columns].values)
+        y_parts.append(df['target'].values)
+    
+    model = make_model(engine)
+    model.fit(np.vstack(X_parts), np.concatenate(y_parts))
+    
+    return model
 
 
 def train_model(features: dict) -> object:
@@ -150,13 +157,27 @@ def train_model(features: dict) -> object:
 
 def save_model(model: object, filepath: str) -> None:
     """
-    Save trained model to disk.
+    Save trained model to disk (atomic write).
+    
+    The model is pickled to a temporary file next to filepath and moved into
+    place, so concurrent readers never load a partially written model.
     
     Args:
         model: Trained model object
         filepath: Path to save model
     """
-    pass
+    directory = os.path.dirname(os.path.abspath(filepath))
+    os.makedirs(directory, exist_ok=True)
+    
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
 
 def load_model(filepath: str) -> object:
@@ -168,5 +189,9 @@ def load_model(filepath: str) -> object:
     
     Returns:
         Loaded model object
+    
+    Raises:
+        FileNotFoundError: If no model is stored at filepath
     """
-    pass
+    with open(filepath, 'rb') as f:
+        return pickle.load(f)
@@ -0,0 +1,210 @@
+"""
+Hyperparameter tuning module.
+
+Searches engine hyperparameters with walk-forward (expanding window)
+time-series cross-validation and successive halving: every candidate is first
+scored on the most recent fold only, and only the best 1/eta advance to
+rungs with more folds. Fold fits run in a process pool. The best
+configuration per ticker is stored on disk so serving reuses it.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import itertools
+import json
+import math
+import os
+import tempfile
+import numpy as np
+from model.engines import make_model, resolve_engine
+
+
+# Search space per engine
+PARAM_GRIDS = {
+    'random_forest': {
+        'n_estimators': [50, 100, 200],
+        'max_depth': [None, 8, 16],
+        'min_samples_leaf': [1, 3, 5],
+        'max_features': [1.0, 0.5, 'sqrt'],
+    },
+    'hist_gradient_boosting': {
+        'max_iter': [100, 200, 400],
+        'learning_rate': [0.03, 0.05, 0.1],
+        'max_leaf_nodes': [15, 31, 63],
+        'min_samples_leaf': [5, 20],
+        'l2_regularization': [0.0, 1.0],
+    },
+}
+
+DEFAULT_TUNING_DIR = os.path.join('.kassandra', 'tuning')
+
+
+def candidate_params(engine: str, n_candidates: int = None, seed: int = 42) -> list:
+    """
+    Enumerate hyperparameter candidates for an engine.
+
+    Args:
+        engine: Engine name
+        n_candidates: Randomly sample this many grid points (optional, full grid otherwise)
+        seed: Sampling seed
+
+    Returns:
+        List of parameter dicts
+    """
+    grid = PARAM_GRIDS[resolve_engine(engine)]
+    keys = sorted(grid)
+    candidates = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+    if n_candidates is not None and n_candidates < len(candidates):
+        rng = np.random.default_rng(seed)
+        picks = rng.choice(len(candidates), size=n_candidates, replace=False)
+        candidates = [candidates[i] for i in sorted(picks)]
+
+    return candidates
+
+
+def _score_fold(engine: str, params: dict, X_train: np.ndarray, y_train: np.ndarray,
+                X_val: np.ndarray, y_val: np.ndarray) -> float:
+    """Fit one candidate on one fold and return its validation MAE (runs in a worker process)."""
+    from sklearn.metrics import mean_absolute_error
+
+    model = make_model(engine, params)
+    # One process per fit already uses every core
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=1)
+    model.fit(X_train, y_train)
+
+    return float(mean_absolute_error(y_val, model.predict(X_val)))
+
+
+def successive_halving(X: np.ndarray, y: np.ndarray, engine: str = None, candidates: list = None,
+                       n_splits: int = 5, min_folds: int = 1, eta: int = 3,
+                       max_workers: int = None) -> dict:
+    """
+    Select hyperparameters by successive halving over walk-forward CV folds.
+
+    Args:
+        X: Feature matrix in time order
+        y: Next-day close targets in time order
+        engine: Engine name (optional, see model.engines)
+        candidates: List of parameter dicts (defaults to the engine's full grid)
+        n_splits: Number of expanding-window folds
+        min_folds: Folds scored in the first rung
+        eta: Keep the best 1/eta candidates at every rung
+        max_workers: Worker processes (defaults to the CPU count)
+
+    Returns:
+        dict containing:
+            - params: Best parameter dict
+            - mae: Its mean MAE over all folds
+            - n_candidates: Candidates evaluated in the first rung
+            - n_fits: Total fold fits performed
+            - rungs: List of (n_folds, n_candidates) per rung
+    """
+    from sklearn.model_selection import TimeSeriesSplit
+
+    engine = resolve_engine(engine)
+    if candidates is None:
+        candidates = candidate_params(engine)
+
+    folds = list(TimeSeriesSplit(n_splits=n_splits).split(X))
+    scores = {}
+    alive = list(range(len(candidates)))
+    n_folds = max(1, min(min_folds, n_splits))
+    rungs = []
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            # Score alive candidates on the most recent n_folds folds, reusing earlier rungs
+            fold_ids = range(n_splits - n_folds, n_splits)
+            futures = {}
+            for c in alive:
+                for f in fold_ids:
+                    if (c, f) not in scores:
+                        train_idx, val_idx = folds[f]
+                        futures[(c, f)] = executor.submit(
+                            _score_fold, engine, candidates[c],
+                            X[train_idx], y[train_idx], X[val_idx], y[val_idx]
+                        )
+            for key, future in futures.items():
+                scores[key] = future.result()
+
+            mean_mae = {c: float(np.mean([scores[(c, f)] for f in fold_ids])) for c in alive}
+            rungs.append((n_folds, len(alive)))
+
+            if n_folds >= n_splits:
+                break
+
+            keep = max(1, math.ceil(len(alive) / eta))
+            alive = sorted(alive, key=lambda c: mean_mae[c])[:keep]
+            n_folds = min(n_splits, n_folds * eta)
+
+    best = min(alive, key=lambda c: mean_mae[c])
+
+    return {
+        'params': candidates[best],
+        'mae': mean_mae[best],
+        'n_candidates': len(candidates),
+        'n_fits': len(scores),
+        'rungs': rungs
+    }
+
+
+def _tuning_path(stock: str, engine: str) -> str:
+    """Path of the stored best configuration for a ticker and engine."""
+    tuning_dir = os.environ.get('KASSANDRA_TUNING_DIR', DEFAULT_TUNING_DIR)
+    return os.path.join(tuning_dir, f"{stock.upper()}_{resolve_engine(engine)}.json")
+
+
+def save_best_params(stock: str, engine: str, result: dict) -> str:
+    """
+    Store the best configuration for a ticker (atomic write).
+
+    Args:
+        stock: Stock ticker symbol
+        engine: Engine name
+        result: Result dict from successive_halving
+
+    Returns:
+        Path of the stored configuration
+    """
+    path = _tuning_path(stock, engine)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    record = {
+        'stock': stock.upper(),
+        'engine': resolve_engine(engine),
+        'params': result['params'],
+        'cv_mae': result['mae'],
+        'n_candidates': result['n_candidates'],
+        'n_fits': result['n_fits'],
+        'tuned_at': datetime.now().isoformat()
+    }
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp_path, path)
+
+    return path
+
+
+def load_best_params(stock: str, engine: str = None) -> dict:
+    """
+    Load the stored best configuration for a ticker.
+
+    Args:
+        stock: Stock ticker symbol
+        engine: Engine name (optional, see model.engines)
+
+    Returns:
+        Parameter dict, or None if the ticker has not been tuned
+    """
+    path = _tuning_path(stock, engine)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path) as f:
+            return json.load(f)['params']
+    except (OSError, ValueError, KeyError):
+        return None
@@ -2,8 +2,10 @@
 Google Trends sentiment module.
 """
 import pandas as pd
-from pytrends.request import TrendReq
 from datetime import datetime
+from utils.cache import cached_source
+from utils.admission import upstream_slot
+from utils.deadline import time_left
 
 
 # Stock ticker to company name mapping
@@ -21,6 +23,7 @@ TICKER_TO_COMPANY = {
 }
 
 
+@cached_source('trends')
 def fetch_google_trends(stock: str, start_date: str, end_date: str) -> pd.DataFrame:
     """
     Fetch Google Trends data for a stock.
@@ -33,21 +36,22 @@ def fetch_google_trends(stock: str, start_date: str, end_date: str) -> pd.DataFr
     Returns:
         DataFrame with columns: date, trend_score, trend_delta_7d
     """
+    from pytrends.request import TrendReq
+    
     # Get company name
     company_name = TICKER_TO_COMPANY.get(stock.upper(), stock)
     
-    # Initialize pytrends
-    pytrends = TrendReq(hl='en-US', tz=360)
+    # Initialize pytrends (read timeout bounded by the request deadline)
+    pytrends = TrendReq(hl='en-US', tz=360, timeout=(2, max(0.1, time_left(5))))
     
     # Build timeframe string
     timeframe = f'{start_date} {end_date}'
     
     try:
-        # Build payload
-        pytrends.build_payload([company_name], timeframe=timeframe, geo='US')
-        
-        # Get interest over time
-        trends_df = pytrends.interest_over_time()
+        # Build payload and get interest over time (one admitted call to Google Trends)
+        with upstream_slot('trends'):
+            pytrends.build_payload([company_name], timeframe=timeframe, geo='US')
+            trends_df = pytrends.interest_over_time()
         
         if trends_df.empty or company_name not in trends_df.columns:
             # Return empty DataFrame with proper structure
@@ -2,8 +2,10 @@
 Wikipedia pageviews sentiment module.
 """
 import pandas as pd
-import requests
 from datetime import datetime, timedelta
+from utils.cache import cached_source
+from utils.admission import upstream_slot
+from utils.deadline import time_left
 
 
 # Stock ticker to Wikipedia page title mapping
@@ -21,6 +23,7 @@ TICKER_TO_WIKI_PAGE = {
 }
 
 
+@cached_source('wiki')
 def fetch_wikipedia_pageviews(stock: str, start_date: str, end_date: str) -> pd.DataFrame:
     """
     Fetch Wikipedia pageviews for a stock's company page.
@@ -33,6 +36,8 @@ def fetch_wikipedia_pageviews(stock: str, start_date: str, end_date: str) -> pd.
     Returns:
         DataFrame with columns: date, wiki_views, wiki_views_delta
     """
+    import requests
+    
     # Get Wikipedia page title
     page_title = TICKER_TO_WIKI_PAGE.get(stock.upper(), stock)
     
@@ -49,7 +54,8 @@ def fetch_wikipedia_pageviews(stock: str, start_date: str, end_date: str) -> pd.
     try:
         # Make request
         headers = {'User-Agent': 'Kassandra/1.0 (Educational Project)'}
-        response = requests.get(url, headers=headers, timeout=10)
+        with upstream_slot('wiki'):
+            response = requests.get(url, headers=headers, timeout=max(0.1, time_left(10)))
         
         if response.status_code != 200:
             return pd.DataFrame(columns=['date', 'wiki_views', 'wiki_views_delta'])
@@ -0,0 +1,218 @@
+"""
+Artifact Store
+
+Keeps the feature and prediction frames produced by each run on disk (under
+.kassandra/artifacts) so the API can generate CSV downloads on demand instead
+of writing every CSV up front. Artifacts are addressed by the name of the CSV
+they render to, e.g. "features_AAPL_2024-01-01_to_2024-06-30.csv".
+
+An artifact file holds the frame as pickled chunks of CSV_CHUNK_ROWS rows,
+followed by a JSON trailer with the rendered CSV's length, content hash and
+the file and CSV offsets of every chunk, then the trailer's length (8 bytes).
+The trailer is written with the artifact, so a download gets its headers
+without rendering anything, and streams (or serves a byte range) one chunk
+at a time.
+"""
+import hashlib
+import io
+import json
+import os
+import pickle
+import re
+import struct
+import tempfile
+import pandas as pd
+
+
+DEFAULT_ARTIFACT_DIR = os.path.join('.kassandra', 'artifacts')
+
+# Rows rendered per streamed CSV chunk
+CSV_CHUNK_ROWS = 1000
+
+# {features|predictions}_{TICKER}_{start}_to_{end}.csv
+ARTIFACT_NAME_PATTERN = re.compile(
+    r'^(features|predictions)_[A-Za-z0-9.^=\-]{1,20}_\d{4}-\d{2}-\d{2}_to_\d{4}-\d{2}-\d{2}\.csv$'
+)
+
+
+def artifact_dir() -> str:
+    """Directory holding stored artifacts (KASSANDRA_ARTIFACT_DIR)."""
+    return os.environ.get('KASSANDRA_ARTIFACT_DIR', DEFAULT_ARTIFACT_DIR)
+
+
+def parse_artifact_name(path: str, kind: str = None) -> str:
+    """
+    Validate a client-supplied CSV path and reduce it to an artifact name.
+
+    Only the file name is used, so directory components can never escape the
+    artifact directory.
+
+    Args:
+        path: CSV file name or path as returned by /predict
+        kind: Required artifact kind, 'features' or 'predictions' (optional)
+
+    Returns:
+        Artifact name (the CSV file name)
+
+    Raises:
+        ValueError: If the name is not a valid artifact name of the given kind
+    """
+    name = os.path.basename(path.replace('\\', '/'))
+    match = ARTIFACT_NAME_PATTERN.match(name)
+    if match is None:
+        raise ValueError(f"Invalid artifact name: {path}")
+    if kind is not None and match.group(1) != kind:
+        raise ValueError(f"Not a {kind} artifact: {path}")
+
+    return name
+
+
+# Byte length of the trailer-length field at the end of an artifact file
+_TRAILER_SIZE = struct.calcsize('>Q')
+
+
+def artifact_path(name: str) -> str:
+    """Path of the stored frame for an artifact name."""
+    return os.path.join(artifact_dir(), os.path.splitext(name)[0] + '.chunks')
+
+
+def save_artifact(name: str, df: pd.DataFrame, chunk_rows: int = CSV_CHUNK_ROWS) -> str:
+    """
+    Store a frame for later CSV rendering (atomic write).
+
+    Args:
+        name: Artifact name (CSV file name)
+        df: Frame exactly as it should render, written without its index
+        chunk_rows: Rows per stored (and streamed) chunk
+
+    Returns:
+        Path of the stored frame
+    """
+    path = artifact_path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    header = df.iloc[:0].to_csv(index=False).encode()
+    digest = hashlib.sha256(header)
+    csv_offset = len(header)
+    chunks = []
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            # Step 1: Pickle each chunk, noting where it sits in the file and in the CSV
+            for start in range(0, len(df), chunk_rows):
+                chunk = df.iloc[start:start + chunk_rows]
+                rendered = chunk.to_csv(index=False, header=False).encode()
+                digest.update(rendered)
+                chunks.append([f.tell(), csv_offset, len(rendered)])
+                csv_offset += len(rendered)
+                pickle.dump(chunk, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+            # Step 2: Append the trailer and its length
+            trailer = json.dumps({
+                'rows': len(df),
+                'header': header.decode(),
+                'csv_bytes': csv_offset,
+                'sha256': digest.hexdigest(),
+                'chunks': chunks
+            }).encode()
+            f.write(trailer)
+            f.write(struct.pack('>Q', len(trailer)))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    return path
+
+
+def artifact_info(name: str) -> dict:
+    """
+    Read an artifact's trailer without loading its rows.
+
+    Args:
+        name: Artifact name (CSV file name)
+
+    Returns:
+        dict with rows, header, csv_bytes (rendered CSV length), sha256 (of
+        the rendered CSV) and chunks, or None if the artifact does not exist
+    """
+    try:
+        with open(artifact_path(name), 'rb') as f:
+            return _read_trailer(f)
+    except FileNotFoundError:
+        return None
+
+
+def _read_trailer(f) -> dict:
+    f.seek(-_TRAILER_SIZE, os.SEEK_END)
+    (length,) = struct.unpack('>Q', f.read(_TRAILER_SIZE))
+    f.seek(-_TRAILER_SIZE - length, os.SEEK_END)
+    return json.loads(f.read(length))
+
+
+def load_artifact(name: str) -> pd.DataFrame:
+    """
+    Load a stored frame.
+
+    Args:
+        name: Artifact name (CSV file name)
+
+    Returns:
+        DataFrame, or None if the artifact does not exist
+    """
+    try:
+        f = open(artifact_path(name), 'rb')
+    except FileNotFoundError:
+        return None
+
+    with f:
+        info = _read_trailer(f)
+        f.seek(0)
+        frames = [pickle.load(f) for _ in info['chunks']]
+    if not frames:
+        return pd.read_csv(io.StringIO(info['header']))
+    return pd.concat(frames)
+
+
+def artifact_csv_chunks(name: str, first_byte: int = 0) -> tuple:
+    """
+    Stream an artifact's CSV rendering from the chunk holding a byte on.
+
+    The file is opened up front (so a vanished artifact fails before any
+    response starts), and chunks before first_byte are skipped unread.
+
+    Args:
+        name: Artifact name (CSV file name)
+        first_byte: First byte of the rendering that is needed
+
+    Returns:
+        Tuple of (byte offset of the first chunk yielded, generator of CSV
+        bytes, one stored chunk at a time)
+
+    Raises:
+        FileNotFoundError: If the artifact does not exist
+    """
+    f = open(artifact_path(name), 'rb')
+    try:
+        info = _read_trailer(f)
+    except BaseException:
+        f.close()
+        raise
+
+    header = info['header'].encode()
+    chunks = [chunk for chunk in info['chunks'] if chunk[1] + chunk[2] > first_byte]
+    include_header = first_byte < len(header)
+    offset = 0 if include_header else (chunks[0][1] if chunks else info['csv_bytes'])
+
+    def generate():
+        with f:
+            if include_header:
+                yield header
+            if chunks:
+                f.seek(chunks[0][0])
+            for _ in chunks:
+                yield pickle.load(f).to_csv(index=False, header=False).encode()
+
+    return offset, generate()
+
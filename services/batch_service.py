@@ -0,0 +1,188 @@
+"""
+Batch Prediction Service
+
+Runs the prediction pipeline for a watchlist of tickers in one pass: prices
+for every ticker come from a single bulk download, the per-ticker sentiment
+sources are fetched concurrently within the request deadline, and the
+per-ticker models are trained in parallel threads. A failure for one ticker
+is reported for that ticker without affecting the others; a sentiment source
+that fails or runs out of time only degrades its ticker's result.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from data.prices import fetch_historical_prices_bulk
+from sentiment.fusion import compute_combined_sentiment
+from features.technical import build_technical_features
+from utils.dates import validate_and_normalize_dates
+from model.engines import resolve_engine
+from services.predict_service import merge_feature_frames, predict_from_features
+from services.tracking import PipelineTracker
+from services.ingestion import SOURCES, SENTIMENT_SOURCES, make_deadline, resolve_source
+from utils.deadline import Deadline, deadline_scope
+
+# Upper bound on tickers per batch request
+MAX_BATCH_SIZE = 25
+
+
+def build_feature_frames_batch(stocks: list, start_date: str, end_date: str,
+                               max_workers: int = None, tracker: PipelineTracker = None,
+                               deadline: Deadline = None):
+    """
+    Fetch every source for a list of tickers and build their feature frames.
+
+    Sentiment fetches queue on one shared pool, so they are bounded by the
+    batch deadline rather than by per-source budgets.
+
+    Args:
+        stocks: List of normalized ticker symbols
+        start_date: Validated start date in YYYY-MM-DD format
+        end_date: Validated end date in YYYY-MM-DD format
+        max_workers: Concurrent sentiment fetches (defaults to 3 per ticker, at most 16)
+        tracker: Stage tracker for timings (optional)
+        deadline: Ingestion deadline (optional, see services.ingestion.make_deadline)
+
+    Returns:
+        tuple: (features_by_ticker dict, errors dict mapping ticker -> message,
+        ticker_trackers dict mapping ticker -> PipelineTracker holding its
+        source_rows and degraded_sources)
+    """
+    tracker = tracker or PipelineTracker()
+    deadline = deadline or make_deadline()
+    errors = {}
+    ticker_trackers = {stock: PipelineTracker() for stock in stocks}
+
+    # Step 1: One bulk download for all tickers' prices
+    with tracker.stage('fetch_prices'):
+        print(f"Fetching historical prices for {len(stocks)} tickers from {start_date} to {end_date}...")
+        prices_by_ticker = fetch_historical_prices_bulk(stocks, start_date, end_date)
+
+    for stock in stocks:
+        ticker_trackers[stock].record_source('prices', len(prices_by_ticker.get(stock, ())))
+        if stock not in prices_by_ticker:
+            errors[stock] = f"No data found for ticker '{stock}' in the given date range"
+
+    tickers = [stock for stock in stocks if stock in prices_by_ticker]
+
+    # Step 2: Fetch every (ticker, source) pair concurrently - the fetchers are I/O bound
+    def fetch(source, stock):
+        with deadline_scope(deadline):
+            return SOURCES[source]['fetch'](stock, start_date, end_date)
+
+    with tracker.stage('fetch_sentiment'):
+        print(f"Fetching sentiment sources for {len(tickers)} tickers...")
+        workers = max_workers or max(1, min(16, len(tickers) * len(SENTIMENT_SOURCES)))
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = {
+                (stock, source): executor.submit(fetch, source, stock)
+                for stock in tickers
+                for source in SENTIMENT_SOURCES
+            }
+            sentiment = {}
+            for (stock, source), future in futures.items():
+                sentiment[(stock, source)] = resolve_source(
+                    source, future, stock, start_date, end_date, deadline.remaining(), ticker_trackers[stock]
+                )
+        finally:
+            # Do not wait for fetches abandoned at the deadline
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # Step 3: Build and merge features per ticker
+    features_by_ticker = {}
+    with tracker.stage('features'):
+        for stock in tickers:
+            if stock in errors:
+                continue
+            try:
+                features = build_technical_features(prices_by_ticker[stock])
+                features.index = pd.to_datetime(features.index).tz_localize(None)
+
+                news_df = sentiment[(stock, 'news')]
+                trends_df = sentiment[(stock, 'trends')]
+                wiki_df = sentiment[(stock, 'wiki')]
+                combined_sentiment_df = compute_combined_sentiment(news_df, trends_df, wiki_df)
+
+                features_by_ticker[stock] = merge_feature_frames(
+                    features, news_df, trends_df, wiki_df, combined_sentiment_df
+                )
+            except Exception as e:
+                errors[stock] = f"Error building features for '{stock}': {str(e)}"
+
+    return features_by_ticker, errors, ticker_trackers
+
+
+def run_batch_prediction(stocks: list, start_date: str, end_date: str, engine: str = None,
+                         export_csv: bool = True, max_workers: int = None,
+                         deadline_seconds: float = None) -> dict:
+    """
+    Execute the prediction pipeline for several tickers.
+
+    Args:
+        stocks: List of stock ticker symbols
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        engine: Model engine name (optional, see model.engines)
+        export_csv: Also write each ticker's CSVs to the working directory
+        max_workers: Parallel training threads (defaults to the CPU count)
+        deadline_seconds: Time allowed for fetching the data sources (optional,
+            defaults to KASSANDRA_INGEST_DEADLINE or 30)
+
+    Returns:
+        dict containing:
+            - results: Dictionary mapping ticker -> run_prediction result
+            - errors: Dictionary mapping ticker -> error message
+            - model_engine: Engine used for training
+            - stage_timings: Seconds spent in each shared stage
+
+    Raises:
+        ValueError: If the date range, engine or ticker list is invalid
+    """
+    # Step 1: Validate inputs once for the whole batch
+    start_date, end_date = validate_and_normalize_dates(start_date, end_date)
+    engine = resolve_engine(engine)
+    stocks = list(dict.fromkeys(stock.strip().upper() for stock in stocks if stock.strip()))
+    if not stocks:
+        raise ValueError("At least one ticker is required")
+    if len(stocks) > MAX_BATCH_SIZE:
+        raise ValueError(f"At most {MAX_BATCH_SIZE} tickers per batch (got {len(stocks)})")
+
+    tracker = PipelineTracker()
+    deadline = make_deadline(deadline_seconds)
+
+    # Step 2: Shared ingestion and feature building
+    features_by_ticker, errors, ticker_trackers = build_feature_frames_batch(
+        stocks, start_date, end_date, tracker=tracker, deadline=deadline
+    )
+
+    # Step 3: Train and predict per ticker in parallel threads, one core per fit
+    def predict_one(stock):
+        return predict_from_features(
+            stock, start_date, end_date, features_by_ticker[stock],
+            engine=engine, export_csv=export_csv, n_jobs=1
+        )
+
+    results = {}
+    with tracker.stage('train_predict'):
+        workers = max_workers or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {stock: executor.submit(predict_one, stock) for stock in features_by_ticker}
+            for stock, future in futures.items():
+                try:
+                    results[stock] = {
+                        **future.result(),
+                        'source_rows': dict(ticker_trackers[stock].source_rows),
+                        'degraded_sources': dict(ticker_trackers[stock].degraded_sources)
+                    }
+                except Exception as e:
+                    errors[stock] = f"Prediction failed for '{stock}': {str(e)}"
+
+    print(f"\nBatch complete: {len(results)} succeeded, {len(errors)} failed")
+
+    # Step 4: Return results in request order
+    return {
+        'results': {stock: results[stock] for stock in stocks if stock in results},
+        'errors': {stock: errors[stock] for stock in stocks if stock in errors},
+        'model_engine': engine,
+        'stage_timings': {name: round(seconds, 4) for name, seconds in tracker.timings.items()}
+    }
@@ -0,0 +1,225 @@
+"""
+Deadline-Aware Ingestion
+
+Registry of the upstream data sources of a prediction and the code that
+fetches them within a request deadline. Every source gets a time budget (and
+never more than the request has left). A source that misses its budget or
+fails is abandoned, and the run continues with its last cached result, or a
+neutral empty frame that merges as zeros. Each source that did not deliver
+fresh data is reported as degraded, as is one whose result is flagged partial
+(which is kept). A sentiment source that answered with no rows did deliver
+and is not. Prices are required: without them the run fails.
+"""
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+import pandas as pd
+from data.prices import fetch_historical_prices
+from data.news import fetch_news_sentiment
+from sentiment.trends import fetch_google_trends
+from sentiment.wikipedia import fetch_wikipedia_pageviews
+from services.tracking import PipelineTracker, PipelineCancelled
+from utils.cache import is_partial
+from utils.deadline import Deadline, deadline_scope
+
+
+# Upstream data sources: fetcher, columns of an empty result, and whether a
+# prediction can go ahead without it
+SOURCES = {
+    'prices': {
+        'fetch': fetch_historical_prices,
+        'columns': ['Open', 'High', 'Low', 'Close', 'Volume'],
+        'required': True
+    },
+    'news': {
+        'fetch': fetch_news_sentiment,
+        'columns': ['date', 'avg_sentiment', 'article_count'],
+        'required': False
+    },
+    'trends': {
+        'fetch': fetch_google_trends,
+        'columns': ['date', 'trend_score', 'trend_delta_7d'],
+        'required': False
+    },
+    'wiki': {
+        'fetch': fetch_wikipedia_pageviews,
+        'columns': ['date', 'wiki_views', 'wiki_views_delta'],
+        'required': False
+    },
+}
+
+SENTIMENT_SOURCES = ['news', 'trends', 'wiki']
+
+# Seconds each source may take (KASSANDRA_SOURCE_BUDGETS, e.g. '{"trends": 5}')
+SOURCE_BUDGETS = {'prices': 20.0, 'news': 20.0, 'trends': 15.0, 'wiki': 10.0}
+
+# Overall ingestion deadline per request (KASSANDRA_INGEST_DEADLINE)
+DEFAULT_DEADLINE_SECONDS = 30.0
+
+
+def source_budgets() -> dict:
+    """
+    Effective per-source budgets.
+
+    Returns:
+        Dictionary mapping source -> seconds
+
+    Raises:
+        ValueError: If KASSANDRA_SOURCE_BUDGETS is not a JSON object
+    """
+    budgets = dict(SOURCE_BUDGETS)
+    overrides = os.environ.get('KASSANDRA_SOURCE_BUDGETS')
+    if overrides:
+        try:
+            overrides = json.loads(overrides)
+        except ValueError as e:
+            raise ValueError(f"KASSANDRA_SOURCE_BUDGETS is not valid JSON: {e}")
+        if not isinstance(overrides, dict):
+            raise ValueError("KASSANDRA_SOURCE_BUDGETS must be a JSON object")
+        budgets.update({source: float(seconds) for source, seconds in overrides.items()})
+    return budgets
+
+
+def make_deadline(seconds: float = None) -> Deadline:
+    """
+    Create a request's ingestion deadline.
+
+    Args:
+        seconds: Deadline in seconds (defaults to KASSANDRA_INGEST_DEADLINE or 30)
+
+    Returns:
+        Deadline
+    """
+    if seconds is None:
+        seconds = float(os.environ.get('KASSANDRA_INGEST_DEADLINE', DEFAULT_DEADLINE_SECONDS))
+    return Deadline(seconds)
+
+
+def neutral_frame(source: str) -> pd.DataFrame:
+    """Empty result of a source, which merges as neutral (zero) features."""
+    return pd.DataFrame(columns=SOURCES[source]['columns'])
+
+
+def _fallback(source: str, stock: str, start_date: str, end_date: str):
+    """Last cached result of a source, even if expired, or None."""
+    stale = getattr(SOURCES[source]['fetch'], 'stale', None)
+    if stale is None:
+        return None
+    try:
+        df = stale(stock, start_date, end_date)
+    except Exception as e:
+        print(f"No cached fallback for {source}: {e}")
+        return None
+    return df if df is not None and len(df) else None
+
+
+def resolve_source(source: str, future, stock: str, start_date: str, end_date: str,
+                   timeout: float, tracker: PipelineTracker) -> pd.DataFrame:
+    """
+    Wait for a source's fetch and fall back if it misses its time or fails.
+
+    Args:
+        source: Source name
+        future: Future of the source's fetch
+        stock: Stock ticker symbol
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        timeout: Seconds to wait for the fetch
+        tracker: Tracker receiving rows and degradations
+
+    Returns:
+        The fetched frame, the cached fallback, or a neutral frame
+
+    Raises:
+        Exception: The fetch's error, or ValueError on timeout, for a
+            required source without a cached fallback
+    """
+    reason = None
+    error = None
+    try:
+        df = future.result(timeout=timeout)
+        # No rows is a valid answer (e.g. no news that week), except for prices
+        if len(df) == 0 and SOURCES[source]['required']:
+            reason = 'empty'
+    except PipelineCancelled:
+        raise
+    except FuturesTimeout:
+        future.cancel()
+        reason = 'timeout'
+        error = ValueError(f"Timed out fetching {source} for '{stock}' after {timeout:.1f}s")
+    except Exception as e:
+        reason = 'error'
+        error = e
+
+    if reason is None:
+        tracker.record_source(source, len(df))
+        # Whatever part was fetched is kept, but the result is not complete
+        if is_partial(df):
+            tracker.record_degraded(source, 'partial')
+        return df
+
+    if reason != 'empty':
+        print(f"Source {source} degraded ({reason}): {error}")
+    fallback = _fallback(source, stock, start_date, end_date)
+    if fallback is not None:
+        tracker.record_degraded(source, f"{reason}, using cached data")
+        return fallback
+
+    if SOURCES[source]['required']:
+        raise error if error is not None else ValueError(f"No {source} data for '{stock}'")
+
+    tracker.record_source(source, 0)
+    tracker.record_degraded(source, reason)
+    return neutral_frame(source)
+
+
+def fetch_sources(stock: str, start_date: str, end_date: str, sources: list = None,
+                  deadline: Deadline = None, tracker: PipelineTracker = None) -> dict:
+    """
+    Fetch several sources for one ticker concurrently within a deadline.
+
+    Each fetch runs as its own tracker stage (fetch_<source>). A source may
+    take min(its budget, the time the request has left). The deadline is in
+    scope inside every fetch, so HTTP timeouts and admission waits are
+    bounded by it as well. A fetch that runs out of time is abandoned rather
+    than awaited; its thread finishes in the background once its own HTTP
+    timeout expires.
+
+    Args:
+        stock: Stock ticker symbol
+        start_date: Validated start date in YYYY-MM-DD format
+        end_date: Validated end date in YYYY-MM-DD format
+        sources: Source names to fetch (defaults to every registered source)
+        deadline: Request deadline (defaults to make_deadline())
+        tracker: Stage tracker (optional)
+
+    Returns:
+        Dictionary mapping source -> DataFrame (fetched, cached fallback or neutral)
+    """
+    sources = sources or list(SOURCES)
+    deadline = deadline or make_deadline()
+    tracker = tracker or PipelineTracker()
+    budgets = source_budgets()
+
+    def fetch(source):
+        with deadline_scope(deadline), tracker.stage(f'fetch_{source}'):
+            return SOURCES[source]['fetch'](stock, start_date, end_date)
+
+    executor = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix='ingest')
+    try:
+        submitted = time.monotonic()
+        futures = {source: executor.submit(fetch, source) for source in sources}
+
+        frames = {}
+        for source in sources:
+            # Budgets run from submission since every source starts at once
+            elapsed = time.monotonic() - submitted
+            timeout = max(0.0, min(budgets.get(source, deadline.seconds) - elapsed, deadline.remaining()))
+            frames[source] = resolve_source(
+                source, futures[source], stock, start_date, end_date, timeout, tracker
+            )
+        return frames
+    finally:
+        # Do not wait for abandoned fetches
+        executor.shutdown(wait=False, cancel_futures=True)
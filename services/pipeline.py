@@ -0,0 +1,261 @@
+"""
+Pipeline DAG Executor
+
+Runs a pipeline declared as a graph of stages. Each stage names the values it
+reads (run parameters or other stages' outputs) and produces one value under
+its own name. Execution is demand-driven: asking for some values runs only
+the stages they depend on, each at most once per run. Stages whose inputs are
+ready at the same time run concurrently in a thread pool.
+
+Every value has a fingerprint. Run parameters, given values and stages marked
+'content' (whose output depends on the outside world, e.g. fetched data) are
+fingerprinted by their content. Every other stage is fingerprinted by its
+name, version and its inputs' fingerprints, without running it. A stage marked
+'memoize' keeps its output in the shared cache under its fingerprint, so any
+worker running the same inputs later reuses it. The lookup only needs
+fingerprints, so on a hit the stages feeding it are skipped as well.
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from functools import lru_cache
+from importlib import metadata
+import pandas as pd
+from services.tracking import PipelineTracker
+from utils.cache import get_cache, SETTLED_TTL
+
+
+# Threads per run for stages that can run side by side (KASSANDRA_STAGE_THREADS)
+DEFAULT_STAGE_THREADS = 4
+
+# Libraries whose upgrades can change memoized outputs
+MEMO_LIBRARIES = ('pandas', 'numpy', 'scikit-learn')
+
+
+def fingerprint(value) -> str:
+    """
+    Content hash of a value.
+
+    DataFrames and Series are hashed with their index, columns and dtypes;
+    dicts, lists and tuples element by element; anything else by its JSON
+    form (str() for objects JSON cannot encode).
+
+    Args:
+        value: Value to hash
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    _hash_into(digest, value)
+    return digest.hexdigest()
+
+
+def _hash_into(digest, value) -> None:
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        frame = value.to_frame() if isinstance(value, pd.Series) else value
+        digest.update(json.dumps(
+            [[str(column), str(dtype)] for column, dtype in frame.dtypes.items()]
+        ).encode())
+        digest.update(pd.util.hash_pandas_object(frame, index=True).values.tobytes())
+    elif isinstance(value, dict):
+        digest.update(f"dict:{len(value)}".encode())
+        for key in sorted(value, key=str):
+            _hash_into(digest, str(key))
+            _hash_into(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"list:{len(value)}".encode())
+        for item in value:
+            _hash_into(digest, item)
+    else:
+        digest.update(json.dumps(value, sort_keys=True, default=str).encode())
+
+
+@lru_cache(maxsize=1)
+def _library_versions() -> tuple:
+    """Installed versions of MEMO_LIBRARIES."""
+    versions = []
+    for library in MEMO_LIBRARIES:
+        try:
+            versions.append(f"{library}=={metadata.version(library)}")
+        except metadata.PackageNotFoundError:
+            versions.append(f"{library}==none")
+    return tuple(versions)
+
+
+class PipelineRun:
+    """
+    Demand-driven, memoized execution of one pipeline run.
+
+    A stage is a dict with:
+        inputs: Names of the values it reads, passed as keyword arguments
+        run: Callable taking the run context and the inputs
+        version: Bumped when the stage's output changes for the same inputs (optional)
+        content: Fingerprint the output by content, for stages reading the
+            outside world (optional)
+        memoize: Keep the output in the shared cache under its fingerprint (optional)
+
+    Stages run in the calling thread unless several are ready at once. With
+    tracker.serial_stages set (profiled runs) they all run in the calling
+    thread, one at a time.
+
+    Attributes:
+        stages: Stage registry, mapping value name -> stage dict
+        context: Objects passed to every stage (tracker, deadline, options);
+            not part of any fingerprint
+        values: Values computed or given so far
+        memo_hits: Names of the stages served from the memo cache
+        max_workers: Threads for stages that run side by side
+    """
+
+    def __init__(self, stages: dict, values: dict, context: dict = None, tracker: PipelineTracker = None,
+                 max_workers: int = None):
+        """
+        Args:
+            stages: Stage registry
+            values: Run parameters and precomputed stage outputs, by name
+            context: Objects passed to every stage (optional)
+            tracker: Stage tracker, also added to the context as 'tracker' (optional)
+            max_workers: Threads for stages that run side by side (defaults to
+                KASSANDRA_STAGE_THREADS or DEFAULT_STAGE_THREADS)
+        """
+        self.stages = stages
+        self.tracker = tracker or PipelineTracker()
+        self.context = {**(context or {}), 'tracker': self.tracker}
+        self.values = dict(values)
+        self.memo_hits = []
+        self.max_workers = max_workers or int(os.environ.get('KASSANDRA_STAGE_THREADS', DEFAULT_STAGE_THREADS))
+        self._fingerprints = {name: fingerprint(value) for name, value in self.values.items()}
+
+    def get(self, *targets) -> dict:
+        """
+        Compute values on demand.
+
+        Args:
+            *targets: Names of the values wanted
+
+        Returns:
+            Dictionary mapping each target -> value
+
+        Raises:
+            KeyError: If a name is neither a given value nor a stage
+        """
+        # Step 1: Serve memoized stages from the cache, downstream first, since
+        # a hit makes the stages feeding it unnecessary
+        needed = self._missing(targets)
+        for name in reversed(needed):
+            if name in needed and self.stages[name].get('memoize'):
+                cached = get_cache().get(self._memo_key(name))
+                if cached is not None:
+                    print(f"Reusing memoized {name}")
+                    self.values[name] = cached
+                    self.memo_hits.append(name)
+                    needed = self._missing(targets)
+
+        # Step 2: Run whatever is still missing
+        self._execute(needed)
+        return {name: self.values[name] for name in targets}
+
+    def fingerprint(self, name: str) -> str:
+        """
+        Fingerprint of a value, running only the content stages it depends on.
+
+        Args:
+            name: Value name
+
+        Returns:
+            Hex digest
+        """
+        if name not in self._fingerprints:
+            if name not in self.stages:
+                raise KeyError(f"Unknown pipeline value '{name}'")
+            stage = self.stages[name]
+            if stage.get('content'):
+                self._execute(self._missing([name]))
+            else:
+                self._fingerprints[name] = fingerprint([
+                    name, stage.get('version', 1), [self.fingerprint(source) for source in stage['inputs']]
+                ])
+        return self._fingerprints[name]
+
+    def _memo_key(self, name: str) -> str:
+        """Shared-cache key of a memoized stage's output."""
+        return f"stage:{name}:{fingerprint([self.fingerprint(name), _library_versions()])}"
+
+    def _missing(self, targets) -> list:
+        """Stages needed for the targets and not computed yet, in dependency order."""
+        order = []
+        seen = set()
+
+        def visit(name):
+            if name in seen or name in self.values:
+                return
+            if name not in self.stages:
+                raise KeyError(f"Unknown pipeline value '{name}'")
+            seen.add(name)
+            for source in self.stages[name]['inputs']:
+                visit(source)
+            order.append(name)
+
+        for target in targets:
+            visit(target)
+        return order
+
+    def _run_stage(self, name: str, memo_key: str = None):
+        """Run one stage on its computed inputs (through the memo cache if memoized)."""
+        self.tracker.check_cancelled()
+        stage = self.stages[name]
+        inputs = {source: self.values[source] for source in stage['inputs']}
+        if memo_key is None:
+            return stage['run'](self.context, **inputs)
+        return get_cache().get_or_compute(memo_key, lambda: stage['run'](self.context, **inputs), ttl=SETTLED_TTL)
+
+    def _store(self, name: str, value) -> None:
+        self.values[name] = value
+        if self.stages[name].get('content'):
+            self._fingerprints[name] = fingerprint(value)
+
+    def _execute(self, names: list) -> None:
+        """Run stages (in dependency order), side by side where their inputs allow."""
+        def memo_key(name):
+            return self._memo_key(name) if self.stages[name].get('memoize') else None
+
+        if self.max_workers <= 1 or getattr(self.tracker, 'serial_stages', False):
+            for name in names:
+                if name not in self.values:
+                    self._store(name, self._run_stage(name, memo_key(name)))
+            return
+
+        pending = {
+            name: {source for source in self.stages[name]['inputs'] if source not in self.values}
+            for name in names if name not in self.values
+        }
+        running = {}
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='stage')
+        try:
+            while pending or running:
+                ready = [name for name, waiting in pending.items() if not waiting]
+                for name in ready:
+                    del pending[name]
+                if not ready and not running:
+                    raise ValueError(f"Pipeline stages depend on each other: {sorted(pending)}")
+
+                # A stage with nothing to run beside it stays in this thread
+                if len(ready) == 1 and not running:
+                    self._finish(ready[0], self._run_stage(ready[0], memo_key(ready[0])), pending)
+                    continue
+                for name in ready:
+                    running[executor.submit(self._run_stage, name, memo_key(name))] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._finish(running.pop(future), future.result(), pending)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _finish(self, name: str, value, pending: dict) -> None:
+        """Store a finished stage's value and release the stages waiting on it."""
+        self._store(name, value)
+        for waiting in pending.values():
+            waiting.discard(name)
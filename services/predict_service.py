@@ -5,17 +5,22 @@ This service encapsulates the full ML pipeline logic for stock prediction.
 It fetches data, builds features, trains models, and generates predictions.
 """
 from datetime import datetime
+from functools import partial
 import pandas as pd
-from data.prices import fetch_historical_prices
 from utils.dates import validate_and_normalize_dates
 from features.technical import build_technical_features
-from model.train import train_baseline_model
+from model.train import print_validation_metrics
+from model.plan import TrainingPlan
 from model.predict import predict_next_close
-from data.news import fetch_news_sentiment
-from sentiment.trends import fetch_google_trends
-from sentiment.wikipedia import fetch_wikipedia_pageviews
 from sentiment.fusion import compute_combined_sentiment
-from sklearn.ensemble import RandomForestRegressor
+from model.engines import resolve_engine
+from model.tuning import load_best_params
+from services.tracking import PipelineTracker
+from services.pipeline import PipelineRun
+from services.ingestion import fetch_sources, make_deadline
+from utils.deadline import Deadline
+from services.artifacts import save_artifact
+from services.profiling import parse_profile_options, run_profiled
 
 
 def normalize_date_column(df: pd.DataFrame) -> pd.DataFrame:
@@ -51,101 +56,46 @@ def normalize_date_column(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def run_prediction(stock: str, start_date: str, end_date: str) -> dict:
+# Candidate model feature columns (filtered to those present in the frame)
+SENTIMENT_FEATURE_COLS = [
+    'daily_return', 'ma_7', 'ma_21', 'volatility_7', 'volatility_21',
+    'avg_news_sentiment', 'news_article_count',
+    'trend_score', 'trend_delta_7d',
+    'wiki_views', 'wiki_views_delta',
+    'combined_sentiment'
+]
+
+
+def select_feature_columns(features: pd.DataFrame) -> list:
     """
-    Execute the full ML pipeline for stock prediction.
-    
-    This function orchestrates the entire prediction workflow:
-    1. Validates dates and fetches historical price data
-    2. Builds technical features from price data
-    3. Fetches multi-source sentiment data (news, trends, Wikipedia)
-    4. Computes combined sentiment scores
-    5. Merges all features into a unified dataset
-    6. Trains a regression model
-    7. Predicts next-day closing price
-    8. Exports feature CSV and prediction log CSV
+    Select the model feature columns available in a merged feature frame.
     
     Args:
-        stock: Stock ticker symbol (e.g., "TSLA", "AAPL")
-        start_date: Start date in YYYY-MM-DD format
-        end_date: End date in YYYY-MM-DD format
+        features: Merged feature DataFrame
     
     Returns:
-        dict: Structured result containing:
-            - predicted_close: float - Predicted next-day closing price
-            - sentiment_breakdown: dict - Individual sentiment source scores
-            - feature_csv_path: str - Path to exported features CSV
-            - prediction_csv_path: str - Path to exported predictions CSV
-            - last_updated: str - ISO timestamp of prediction generation
+        List of feature column names
     """
-    # Step 1: Validate and normalize date range
-    start_date, end_date = validate_and_normalize_dates(start_date, end_date)
-    
-    # Step 2: Fetch historical price data
-    print(f"Fetching historical prices for {stock} from {start_date} to {end_date}...")
-    prices = fetch_historical_prices(stock, start_date, end_date)
-    
-    # Step 3: Display fetched data
-    print(f"\nSuccessfully fetched {len(prices)} trading days")
-    print("\nLast 5 rows of raw price data:")
-    print(prices.tail())
-    
-    # Step 4: Build technical features
-    print(f"\nBuilding technical features...")
-    features = build_technical_features(prices)
-    
-    # Normalize technical features index to timezone-naive datetime
-    features.index = pd.to_datetime(features.index).tz_localize(None)
-    
-    # Step 5: Fetch news sentiment data
-    print(f"\nFetching news sentiment...")
-    news_df = fetch_news_sentiment(stock, start_date, end_date)
-    
-    if not news_df.empty:
-        print(f"Fetched news sentiment for {len(news_df)} days")
-        non_zero_sentiment = news_df[news_df['article_count'] > 0]
-        if not non_zero_sentiment.empty:
-            print(f"Sample news sentiment rows (non-zero):")
-            print(non_zero_sentiment.head(3)[['date', 'avg_sentiment', 'article_count']].to_string(index=False))
-    else:
-        print("No news sentiment data available")
-    
-    # Step 6: Fetch Google Trends data
-    print(f"\nFetching Google Trends...")
-    trends_df = fetch_google_trends(stock, start_date, end_date)
-    
-    if not trends_df.empty:
-        print(f"Fetched Google Trends for {len(trends_df)} days")
-        print(f"Sample trends rows:")
-        print(trends_df.head(3)[['date', 'trend_score', 'trend_delta_7d']].to_string(index=False))
-    else:
-        print("No Google Trends data available")
-    
-    # Step 7: Fetch Wikipedia pageviews
-    print(f"\nFetching Wikipedia pageviews...")
-    wiki_df = fetch_wikipedia_pageviews(stock, start_date, end_date)
-    
-    if not wiki_df.empty:
-        print(f"Fetched Wikipedia pageviews for {len(wiki_df)} days")
-        print(f"Sample wiki rows:")
-        print(wiki_df.head(3)[['date', 'wiki_views', 'wiki_views_delta']].to_string(index=False))
-    else:
-        print("No Wikipedia pageviews data available")
-    
-    # Step 8: Compute combined sentiment
-    print(f"\nComputing combined sentiment...")
-    combined_sentiment_df = compute_combined_sentiment(news_df, trends_df, wiki_df)
+    return [col for col in SENTIMENT_FEATURE_COLS if col in features.columns]
+
+
+def merge_feature_frames(features: pd.DataFrame, news_df: pd.DataFrame, trends_df: pd.DataFrame,
+                         wiki_df: pd.DataFrame, combined_sentiment_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Left-join every sentiment source onto the technical features by date.
     
-    if not combined_sentiment_df.empty:
-        print(f"Combined sentiment computed for {len(combined_sentiment_df)} days")
-        non_zero_combined = combined_sentiment_df[combined_sentiment_df['combined_sentiment'].abs() > 0.01]
-        if not non_zero_combined.empty:
-            print(f"Sample combined sentiment rows (non-zero):")
-            print(non_zero_combined.head(5)[['date', 'combined_sentiment']].to_string(index=False))
+    Missing sources become neutral (zero) columns.
     
-    # Step 9: Merge all sentiment features with technical features
-    print(f"\nMerging all features...")
+    Args:
+        features: Technical features with a timezone-naive DatetimeIndex
+        news_df: DataFrame with columns [date, avg_sentiment, article_count]
+        trends_df: DataFrame with columns [date, trend_score, trend_delta_7d]
+        wiki_df: DataFrame with columns [date, wiki_views, wiki_views_delta]
+        combined_sentiment_df: DataFrame with columns [date, combined_sentiment]
     
+    Returns:
+        DataFrame indexed by date with technical and sentiment features
+    """
     # Prepare features for merging
     features_with_date = features.reset_index()
     features_with_date = features_with_date.rename(columns={'Date': 'date'})
@@ -190,7 +140,119 @@ def run_prediction(stock: str, start_date: str, end_date: str) -> dict:
     
     # Set date back as index
     features_with_date = features_with_date.set_index('date')
-    features = features_with_date
+    
+    return features_with_date
+
+
+def build_sentiment_breakdown(latest_features: pd.Series) -> dict:
+    """
+    Build the per-source sentiment breakdown for the latest day.
+    
+    Args:
+        latest_features: Most recent row of the merged feature frame
+    
+    Returns:
+        dict: Sentiment source scores
+    """
+    return {
+        'news_sentiment': float(latest_features.get('avg_news_sentiment', 0.0)),
+        'news_article_count': int(latest_features.get('news_article_count', 0)),
+        'google_trends_score': float(latest_features.get('trend_score', 0.0)),
+        'google_trends_delta_7d': float(latest_features.get('trend_delta_7d', 0.0)),
+        'wikipedia_views': float(latest_features.get('wiki_views', 0.0)),
+        'wikipedia_views_delta': float(latest_features.get('wiki_views_delta', 0.0)),
+        'combined_sentiment': float(latest_features.get('combined_sentiment', 0.0))
+    }
+
+
+def _fetch_sources_stage(context: dict, stock: str, start_date: str, end_date: str) -> dict:
+    """Stage: fetch prices and every sentiment source within the deadline."""
+    tracker = context['tracker']
+    
+    # Step 2: Fetch prices and every sentiment source concurrently within the deadline
+    print(f"Fetching prices and sentiment sources for {stock} from {start_date} to {end_date}...")
+    sources = fetch_sources(stock, start_date, end_date, deadline=context.get('deadline'), tracker=tracker)
+    prices = sources['prices']
+    news_df = sources['news']
+    trends_df = sources['trends']
+    wiki_df = sources['wiki']
+    
+    if tracker.degraded_sources:
+        print(f"Degraded sources: {tracker.degraded_sources}")
+    
+    # Step 3: Display fetched data
+    print(f"\nSuccessfully fetched {len(prices)} trading days")
+    print("\nLast 5 rows of raw price data:")
+    print(prices.tail())
+    
+    # Step 4: Display news sentiment data
+    if not news_df.empty:
+        print(f"Fetched news sentiment for {len(news_df)} days")
+        non_zero_sentiment = news_df[news_df['article_count'] > 0]
+        if not non_zero_sentiment.empty:
+            print(f"Sample news sentiment rows (non-zero):")
+            print(non_zero_sentiment.head(3)[['date', 'avg_sentiment', 'article_count']].to_string(index=False))
+    else:
+        print("No news sentiment data available")
+    
+    # Step 5: Display Google Trends data
+    if not trends_df.empty:
+        print(f"Fetched Google Trends for {len(trends_df)} days")
+        print(f"Sample trends rows:")
+        print(trends_df.head(3)[['date', 'trend_score', 'trend_delta_7d']].to_string(index=False))
+    else:
+        print("No Google Trends data available")
+    
+    # Step 6: Display Wikipedia pageviews
+    if not wiki_df.empty:
+        print(f"Fetched Wikipedia pageviews for {len(wiki_df)} days")
+        print(f"Sample wiki rows:")
+        print(wiki_df.head(3)[['date', 'wiki_views', 'wiki_views_delta']].to_string(index=False))
+    else:
+        print("No Wikipedia pageviews data available")
+    
+    return sources
+
+
+def _technical_stage(context: dict, sources: dict) -> pd.DataFrame:
+    """Stage: build technical features from the prices."""
+    # Step 7: Build technical features
+    with context['tracker'].stage('technical_features'):
+        print(f"\nBuilding technical features...")
+        features = build_technical_features(sources['prices'])
+        
+        # Normalize technical features index to timezone-naive datetime
+        features.index = pd.to_datetime(features.index).tz_localize(None)
+    
+    return features
+
+
+def _fusion_stage(context: dict, sources: dict) -> pd.DataFrame:
+    """Stage: combine the sentiment sources into one score per day."""
+    # Step 8: Compute combined sentiment
+    with context['tracker'].stage('fusion'):
+        print(f"\nComputing combined sentiment...")
+        combined_sentiment_df = compute_combined_sentiment(sources['news'], sources['trends'], sources['wiki'])
+    
+    if not combined_sentiment_df.empty:
+        print(f"Combined sentiment computed for {len(combined_sentiment_df)} days")
+        non_zero_combined = combined_sentiment_df[combined_sentiment_df['combined_sentiment'].abs() > 0.01]
+        if not non_zero_combined.empty:
+            print(f"Sample combined sentiment rows (non-zero):")
+            print(non_zero_combined.head(5)[['date', 'combined_sentiment']].to_string(index=False))
+    
+    return combined_sentiment_df
+
+
+def _merge_stage(context: dict, technical: pd.DataFrame, sources: dict,
+                 combined_sentiment: pd.DataFrame) -> pd.DataFrame:
+    """Stage: merge every sentiment source onto the technical features."""
+    # Step 9: Merge all sentiment features with technical features
+    with context['tracker'].stage('merge'):
+        print(f"\nMerging all features...")
+        features = merge_feature_frames(
+            technical, sources['news'], sources['trends'], sources['wiki'], combined_sentiment
+        )
     
     # Step 10: Display merged feature statistics
     print(f"\nFinal Feature DataFrame shape: {features.shape}")
@@ -198,98 +260,390 @@ def run_prediction(stock: str, start_date: str, end_date: str) -> dict:
     print("\nLast 5 rows of merged features:")
     print(features.tail())
     
+    return features
+
+
+def _tuned_params_stage(context: dict, stock: str, engine: str) -> dict:
+    """Stage: hyperparameters stored by the tuning service, if any."""
+    params = load_best_params(stock, engine)
+    if params:
+        print(f"  Using tuned hyperparameters: {params}")
+    return params
+
+
+def _plan_stage(context: dict, features: pd.DataFrame, engine: str, tuned_params: dict) -> TrainingPlan:
+    """Stage: one training plan for the headline model, its validation and the prediction log."""
+    # One plan covers the headline model, its validation and the prediction log,
+    # so every distinct training window is fitted exactly once
+    return TrainingPlan(
+        features, select_feature_columns(features), engine=engine, params=tuned_params,
+        n_jobs=context.get('n_jobs'), cache_headline=True
+    )
+
+
+def _training_stage(context: dict, plan: TrainingPlan, engine: str) -> dict:
+    """Stage: train and validate the headline model."""
     # Step 11: Train model with all sentiment features
-    print(f"\nTraining sentiment-aware model...")
-    
-    # Define feature columns
-    sentiment_feature_cols = [
-        'daily_return', 'ma_7', 'ma_21', 'volatility_7', 'volatility_21',
-        'avg_news_sentiment', 'news_article_count',
-        'trend_score', 'trend_delta_7d',
-        'wiki_views', 'wiki_views_delta',
-        'combined_sentiment'
-    ]
+    with context['tracker'].stage('train'):
+        print(f"\nTraining sentiment-aware model ({engine})...")
+        training = plan.run(validation=True, prediction_log=False)
+        print_validation_metrics(training['metrics'])
     
-    # Filter to only existing columns
-    available_features = [col for col in sentiment_feature_cols if col in features.columns]
-    
-    model = train_baseline_model(features, feature_columns=available_features)
+    return training
+
+
+def _sentiment_breakdown_stage(context: dict, features: pd.DataFrame) -> dict:
+    """Stage: per-source sentiment of the latest day."""
+    return build_sentiment_breakdown(features.iloc[-1])
+
+
+def _prediction_stage(context: dict, stock: str, features: pd.DataFrame, plan: TrainingPlan,
+                      training: dict, sentiment_breakdown: dict) -> float:
+    """Stage: predict the next close and emit it as a partial result."""
+    tracker = context['tracker']
     
     # Step 12: Predict next trading day's closing price
-    latest_features = features.iloc[-1]
-    prediction = predict_next_close(model, latest_features, available_features)
+    with tracker.stage('predict'):
+        prediction = float(predict_next_close(training['model'], features.iloc[-1], plan.feature_columns))
     
     print(f"\n{'='*60}")
     print(f"Multi-source sentiment-aware predicted next-day closing price for {stock}: ${prediction:.2f}")
     print(f"{'='*60}")
     
+    tracker.emit('partial', predicted_close=prediction, sentiment_breakdown=sentiment_breakdown)
+    
+    return prediction
+
+
+def _feature_csv_stage(context: dict, stock: str, start_date: str, end_date: str,
+                       features: pd.DataFrame) -> str:
+    """Stage: store the features artifact (and export it as CSV)."""
+    export_csv = context.get('export_csv', True)
+    
     # Step 13: Export features to CSV
-    csv_filename = f"features_{stock}_{start_date}_to_{end_date}.csv"
-    features_export = features.reset_index()
-    features_export = features_export.rename(columns={'date': 'Date'})
-    features_export.to_csv(csv_filename, index=False)
+    with context['tracker'].stage('export_features'):
+        csv_filename = f"features_{stock}_{start_date}_to_{end_date}.csv"
+        features_export = features.reset_index()
+        features_export = features_export.rename(columns={'date': 'Date'})
+        save_artifact(csv_filename, features_export)
+        if export_csv:
+            features_export.to_csv(csv_filename, index=False)
     
     print(f"\n{'='*60}")
-    print(f"Features exported to: {csv_filename}")
+    print(f"Features {'exported to' if export_csv else 'stored as'}: {csv_filename}")
     print(f"Rows exported: {len(features_export)}")
     print(f"{'='*60}")
     
-    # Step 14: Generate prediction log
-    print(f"\nGenerating prediction log...")
+    return csv_filename
+
+
+def _predictions_log_stage(context: dict, plan: TrainingPlan, prediction: float) -> pd.DataFrame:
+    """Stage: walk-forward prediction log (after the headline prediction is out)."""
+    tracker = context['tracker']
+    
+    # Step 14: Generate prediction log (reuses the headline model's window)
+    with tracker.stage('backtest'):
+        print(f"\nGenerating prediction log...")
+        predictions_df = plan.run(
+            validation=False, prediction_log=True, before_fit=tracker.check_cancelled
+        )['predictions_log']
+        print(f"  Model fits for this request: {plan.fit_count}")
+    
+    return predictions_df
+
+
+def _prediction_csv_stage(context: dict, stock: str, start_date: str, end_date: str,
+                          predictions_log: pd.DataFrame) -> str:
+    """Stage: store the prediction log artifact (and export it as CSV)."""
+    export_csv = context.get('export_csv', True)
+    
+    # Step 15: Export prediction log
+    with context['tracker'].stage('export_predictions'):
+        predictions_csv = f"predictions_{stock}_{start_date}_to_{end_date}.csv"
+        save_artifact(predictions_csv, predictions_log)
+        if export_csv:
+            predictions_log.to_csv(predictions_csv, index=False)
+    
+    print(f"\n{'='*60}")
+    print(f"Predictions {'exported to' if export_csv else 'stored as'}: {predictions_csv}")
+    print(f"Total predictions generated: {len(predictions_log)}")
+    print(f"{'='*60}")
+    
+    return predictions_csv
+
+
+# The prediction pipeline as a DAG (see services.pipeline). Run parameters:
+# stock, start_date, end_date and engine. The prediction log waits for the
+# headline prediction, so the partial result is out before the backtest starts
+# (the log refits the headline window anyway, so this costs nothing). The
+# walk-forward log is memoized: its fingerprint covers the fetched data, tuned
+# hyperparameters and engine.
+PREDICTION_STAGES = {
+    'sources': {'inputs': ['stock', 'start_date', 'end_date'], 'run': _fetch_sources_stage, 'content': True},
+    'technical': {'inputs': ['sources'], 'run': _technical_stage},
+    'combined_sentiment': {'inputs': ['sources'], 'run': _fusion_stage},
+    'features': {'inputs': ['technical', 'sources', 'combined_sentiment'], 'run': _merge_stage},
+    'tuned_params': {'inputs': ['stock', 'engine'], 'run': _tuned_params_stage, 'content': True},
+    'plan': {'inputs': ['features', 'engine', 'tuned_params'], 'run': _plan_stage},
+    'training': {'inputs': ['plan', 'engine'], 'run': _training_stage},
+    'sentiment_breakdown': {'inputs': ['features'], 'run': _sentiment_breakdown_stage},
+    'prediction': {
+        'inputs': ['stock', 'features', 'plan', 'training', 'sentiment_breakdown'], 'run': _prediction_stage
+    },
+    'feature_csv': {'inputs': ['stock', 'start_date', 'end_date', 'features'], 'run': _feature_csv_stage},
+    'predictions_log': {'inputs': ['plan', 'prediction'], 'run': _predictions_log_stage, 'memoize': True},
+    'prediction_csv': {
+        'inputs': ['stock', 'start_date', 'end_date', 'predictions_log'], 'run': _prediction_csv_stage
+    },
+}
+
+
+def prediction_pipeline(stock: str, start_date: str, end_date: str, engine: str = None,
+                        tracker: PipelineTracker = None, deadline: Deadline = None, export_csv: bool = True,
+                        n_jobs: int = None, values: dict = None) -> PipelineRun:
+    """
+    Set up a lazy run of the prediction pipeline.
     
-    predictions_log = []
-    min_train_size = 30
+    Nothing runs until values are requested with get(), and then only the
+    stages those values need, e.g. get('sentiment_breakdown') fetches and
+    merges the data without training anything.
     
-    df = features.copy()
-    df['target'] = df['Close'].shift(-1)
-    df = df.dropna()
+    Args:
+        stock: Stock ticker symbol
+        start_date: Validated start date in YYYY-MM-DD format
+        end_date: Validated end date in YYYY-MM-DD format
+        engine: Model engine name (optional)
+        tracker: Stage tracker for progress events and timings (optional)
+        deadline: Ingestion deadline (optional, see services.ingestion.make_deadline)
+        export_csv: Also write the CSVs to the working directory
+        n_jobs: Threads per model fit (optional, engine default otherwise)
+        values: Precomputed stage outputs, e.g. {'features': frame} (optional)
     
-    for i in range(min_train_size, len(df)):
-        train_data = df.iloc[:i]
-        test_row = df.iloc[i]
-        
-        X_train = train_data[available_features].values
-        y_train = train_data['target'].values
-        
-        X_test = test_row[available_features].values.reshape(1, -1)
-        actual_price = test_row['target']
-        
-        model_temp = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
-        model_temp.fit(X_train, y_train)
-        
-        predicted_price = model_temp.predict(X_test)[0]
-        
-        predictions_log.append({
-            'Date': test_row.name.strftime('%Y-%m-%d'),
-            'Actual_Closing_Price': actual_price,
-            'Predicted_Closing_Price': predicted_price
-        })
+    Returns:
+        PipelineRun over PREDICTION_STAGES
+    """
+    return PipelineRun(
+        PREDICTION_STAGES,
+        {'stock': stock, 'start_date': start_date, 'end_date': end_date, 'engine': resolve_engine(engine),
+         **(values or {})},
+        context={'deadline': deadline, 'export_csv': export_csv, 'n_jobs': n_jobs},
+        tracker=tracker
+    )
+
+
+def build_feature_frame(stock: str, start_date: str, end_date: str, tracker: PipelineTracker = None,
+                        deadline: Deadline = None) -> pd.DataFrame:
+    """
+    Fetch prices and every sentiment source, and merge them into one frame.
     
-    predictions_df = pd.DataFrame(predictions_log)
-    predictions_csv = f"predictions_{stock}_{start_date}_to_{end_date}.csv"
-    predictions_df.to_csv(predictions_csv, index=False)
+    Sources that miss their time budget or fail are replaced by cached or
+    neutral values and recorded in tracker.degraded_sources.
     
-    print(f"\n{'='*60}")
-    print(f"Predictions exported to: {predictions_csv}")
-    print(f"Total predictions generated: {len(predictions_df)}")
-    print(f"{'='*60}")
+    Args:
+        stock: Stock ticker symbol
+        start_date: Validated start date in YYYY-MM-DD format
+        end_date: Validated end date in YYYY-MM-DD format
+        tracker: Stage tracker for progress events and timings (optional)
+        deadline: Ingestion deadline (optional, see services.ingestion.make_deadline)
     
-    # Step 15: Build sentiment breakdown for response
-    sentiment_breakdown = {
-        'news_sentiment': float(latest_features.get('avg_news_sentiment', 0.0)),
-        'news_article_count': int(latest_features.get('news_article_count', 0)),
-        'google_trends_score': float(latest_features.get('trend_score', 0.0)),
-        'google_trends_delta_7d': float(latest_features.get('trend_delta_7d', 0.0)),
-        'wikipedia_views': float(latest_features.get('wiki_views', 0.0)),
-        'wikipedia_views_delta': float(latest_features.get('wiki_views_delta', 0.0)),
-        'combined_sentiment': float(latest_features.get('combined_sentiment', 0.0))
-    }
+    Returns:
+        DataFrame indexed by date with OHLCV, technical and sentiment features
+    """
+    run = prediction_pipeline(stock, start_date, end_date, tracker=tracker, deadline=deadline)
+    return run.get('features')['features']
+
+
+def run_prediction(stock: str, start_date: str, end_date: str, engine: str = None,
+                   tracker: PipelineTracker = None, export_csv: bool = True,
+                   deadline_seconds: float = None) -> dict:
+    """
+    Execute the full ML pipeline for stock prediction.
+    
+    This function orchestrates the entire prediction workflow (see
+    PREDICTION_STAGES):
+    1. Validates dates and fetches historical price data
+    2. Builds technical features from price data
+    3. Fetches multi-source sentiment data (news, trends, Wikipedia)
+    4. Computes combined sentiment scores
+    5. Merges all features into a unified dataset
+    6. Trains and validates the headline model
+    7. Predicts next-day closing price
+    8. Generates the walk-forward log from the same training plan
+    9. Stores the feature and prediction log artifacts (and exports them as CSV)
+    
+    The headline prediction is emitted as a 'partial' event before the slow
+    walk-forward backtest starts.
+    
+    Args:
+        stock: Stock ticker symbol (e.g., "TSLA", "AAPL")
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        engine: Model engine name (optional, defaults to KASSANDRA_MODEL_ENGINE
+            or random_forest)
+        tracker: Stage tracker for progress events and timings (optional)
+        export_csv: Also write both CSVs to the working directory. The API
+            skips this and renders downloads from the stored artifacts.
+        deadline_seconds: Time allowed for fetching the data sources (optional,
+            defaults to KASSANDRA_INGEST_DEADLINE or 30)
+    
+    Returns:
+        dict: Structured result containing:
+            - predicted_close: float - Predicted next-day closing price
+            - sentiment_breakdown: dict - Individual sentiment source scores
+            - feature_csv_path: str - Features CSV name (artifact name)
+            - prediction_csv_path: str - Predictions CSV name (artifact name)
+            - last_updated: str - ISO timestamp of prediction generation
+            - model_engine: str - Engine used for training
+            - fit_count: int - Number of model fits performed for this request
+            - stage_timings: dict - Seconds spent in each pipeline stage
+            - source_rows: dict - Rows returned by each upstream source (for metrics)
+            - degraded_sources: dict - Sources replaced by cached or neutral values, with the reason
+    """
+    tracker = tracker or PipelineTracker()
+    deadline = make_deadline(deadline_seconds)
+    
+    # Step 1: Validate and normalize date range
+    start_date, end_date = validate_and_normalize_dates(start_date, end_date)
+    
+    # Steps 2-16: Fetch, build features, train, predict, backtest and store artifacts
+    run = prediction_pipeline(
+        stock, start_date, end_date, engine=engine, tracker=tracker, deadline=deadline, export_csv=export_csv
+    )
+    return _prediction_result(run)
+
+
+def predict_from_features(stock: str, start_date: str, end_date: str, features: pd.DataFrame,
+                          engine: str = None, tracker: PipelineTracker = None, export_csv: bool = True,
+                          n_jobs: int = None) -> dict:
+    """
+    Train, predict and backtest on an already merged feature frame.
+    
+    Args:
+        stock: Stock ticker symbol
+        start_date: Validated start date in YYYY-MM-DD format
+        end_date: Validated end date in YYYY-MM-DD format
+        features: Merged feature frame from build_feature_frame
+        engine: Model engine name (optional)
+        tracker: Stage tracker for progress events and timings (optional)
+        export_csv: Also write both CSVs to the working directory
+        n_jobs: Threads per model fit (optional, engine default otherwise)
+    
+    Returns:
+        dict: Same structure as run_prediction
+    """
+    run = prediction_pipeline(
+        stock, start_date, end_date, engine=engine, tracker=tracker, export_csv=export_csv,
+        n_jobs=n_jobs, values={'features': features}
+    )
+    return _prediction_result(run)
+
+
+def run_stages(stock: str, start_date: str, end_date: str, targets: list, engine: str = None,
+               tracker: PipelineTracker = None, export_csv: bool = False,
+               deadline_seconds: float = None) -> dict:
+    """
+    Compute only some of the pipeline's outputs.
+    
+    Only the stages the targets depend on run, e.g. ['sentiment_breakdown']
+    skips training, ['prediction'] skips the backtest, and ['feature_csv']
+    only stores the features artifact.
+    
+    Args:
+        stock: Stock ticker symbol
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        targets: Names of the values wanted (keys of PREDICTION_STAGES)
+        engine: Model engine name (optional)
+        tracker: Stage tracker for progress events and timings (optional)
+        export_csv: Also write requested CSVs to the working directory
+        deadline_seconds: Time allowed for fetching the data sources (optional)
+    
+    Returns:
+        Dictionary mapping each target -> value
+    
+    Raises:
+        KeyError: If a target is not a pipeline value
+    """
+    start_date, end_date = validate_and_normalize_dates(start_date, end_date)
+    run = prediction_pipeline(
+        stock, start_date, end_date, engine=engine, tracker=tracker,
+        deadline=make_deadline(deadline_seconds), export_csv=export_csv
+    )
+    return run.get(*targets)
+
+
+def _prediction_result(run: PipelineRun) -> dict:
+    """Run every output stage and assemble the run_prediction result."""
+    values = run.get('prediction', 'sentiment_breakdown', 'feature_csv', 'prediction_csv')
+    tracker = run.tracker
     
     # Step 16: Return structured result
     return {
-        'predicted_close': float(prediction),
-        'sentiment_breakdown': sentiment_breakdown,
-        'feature_csv_path': csv_filename,
-        'prediction_csv_path': predictions_csv,
-        'last_updated': datetime.now().isoformat()
+        'predicted_close': values['prediction'],
+        'sentiment_breakdown': values['sentiment_breakdown'],
+        'feature_csv_path': values['feature_csv'],
+        'prediction_csv_path': values['prediction_csv'],
+        'last_updated': datetime.now().isoformat(),
+        'model_engine': run.values['engine'],
+        'fit_count': run.values['plan'].fit_count if 'plan' in run.values else 0,
+        'stage_timings': {name: round(seconds, 4) for name, seconds in tracker.timings.items()},
+        'source_rows': dict(tracker.source_rows),
+        'degraded_sources': dict(tracker.degraded_sources)
     }
+
+
+def run_prediction_with_events(stock: str, start_date: str, end_date: str, engine: str,
+                               event_queue, cancel_event, export_csv: bool = True,
+                               deadline_seconds: float = None) -> dict:
+    """
+    Run the pipeline in a worker process, relaying progress events.
+    
+    Args:
+        stock: Stock ticker symbol
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        engine: Model engine name (optional)
+        event_queue: Queue (e.g. a multiprocessing.Manager queue) receiving event dicts
+        cancel_event: Event set by the caller to cancel the run
+        export_csv: Also write both CSVs to the working directory
+        deadline_seconds: Time allowed for fetching the data sources (optional)
+    
+    Returns:
+        dict: Same structure as run_prediction
+    """
+    tracker = PipelineTracker(on_event=event_queue.put, is_cancelled=cancel_event.is_set)
+    
+    return run_prediction(
+        stock, start_date, end_date, engine=engine, tracker=tracker, export_csv=export_csv,
+        deadline_seconds=deadline_seconds
+    )
+
+
+def run_prediction_profiled(stock: str, start_date: str, end_date: str, engine: str = None,
+                            profile: str = 'all', export_csv: bool = True,
+                            deadline_seconds: float = None) -> dict:
+    """
+    Run the pipeline with tracing and store the trace.
+    
+    Args:
+        stock: Stock ticker symbol
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        engine: Model engine name (optional)
+        profile: Profile options, e.g. "1" (spans only), "all" or "cprofile,memory"
+        export_csv: Also write both CSVs to the working directory
+        deadline_seconds: Time allowed for fetching the data sources (optional)
+    
+    Returns:
+        dict: Same structure as run_prediction, plus trace_id
+    """
+    options = parse_profile_options(profile) or {'spans'}
+    
+    return run_profiled(
+        partial(
+            run_prediction, stock, start_date, end_date, engine=engine, export_csv=export_csv,
+            deadline_seconds=deadline_seconds
+        ),
+        options,
+        label={'stock': stock, 'start_date': start_date, 'end_date': end_date, 'engine': engine}
+    )
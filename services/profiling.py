@@ -0,0 +1,234 @@
+"""
+Request Profiling
+
+Opt-in tracing for a single pipeline run: every stage becomes a timed span,
+and a cProfile profile and tracemalloc allocation snapshot can be collected
+on top. The trace is stored as JSON under .kassandra/traces (with the raw
+cProfile stats next to it) so it can be downloaded later. Nothing here runs
+unless a caller asks for a profiled run.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import tempfile
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from services.tracking import PipelineTracker
+
+
+DEFAULT_TRACE_DIR = os.path.join('.kassandra', 'traces')
+
+# Profile options accepted by the API header and the CLI flag
+PROFILE_OPTIONS = ('spans', 'cprofile', 'memory')
+
+# Entries kept in the stored top-function and top-allocation tables
+PROFILE_TOP_N = 40
+
+
+def trace_dir() -> str:
+    """Directory holding stored traces (KASSANDRA_TRACE_DIR)."""
+    return os.environ.get('KASSANDRA_TRACE_DIR', DEFAULT_TRACE_DIR)
+
+
+def parse_profile_options(value: str) -> set:
+    """
+    Parse a profile request such as "1", "all" or "cprofile,memory".
+
+    Spans are always included once profiling is requested.
+
+    Args:
+        value: Header or flag value (may be None or empty)
+
+    Returns:
+        Set of enabled options (empty when profiling is off)
+
+    Raises:
+        ValueError: If an unknown option is requested
+    """
+    if value is None or value.strip().lower() in ('', '0', 'false', 'off', 'no'):
+        return set()
+
+    options = {'spans'}
+    for option in value.lower().replace(' ', '').split(','):
+        if option in ('1', 'true', 'on', 'yes', 'spans'):
+            continue
+        if option == 'all':
+            options.update(PROFILE_OPTIONS)
+        elif option in PROFILE_OPTIONS:
+            options.add(option)
+        else:
+            raise ValueError(
+                f"Unknown profile option '{option}'. Use 'all' or any of: {', '.join(PROFILE_OPTIONS)}"
+            )
+
+    return options
+
+
+class TracingTracker(PipelineTracker):
+    """
+    Pipeline tracker that also records every stage as a span.
+
+    Attributes:
+        spans: List of span dicts (name, start_ms, duration_ms and, with
+            memory tracing on, alloc_kb / peak_kb)
+        peak_bytes: Highest traced memory seen across stages (memory tracing only)
+    """
+
+    # cProfile only sees the calling thread, and memory spans need one stage at a time
+    serial_stages = True
+
+    def __init__(self, on_event=None, is_cancelled=None, memory: bool = False):
+        super().__init__(on_event=on_event, is_cancelled=is_cancelled)
+        self.memory = memory
+        self.spans = []
+        self.peak_bytes = 0
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        span = {'name': name, 'start_ms': round((time.perf_counter() - self._origin) * 1000, 3)}
+        if self.memory:
+            tracemalloc.reset_peak()
+            allocated_before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            with super().stage(name):
+                yield
+        finally:
+            span['duration_ms'] = round((time.perf_counter() - start) * 1000, 3)
+            if self.memory:
+                allocated, peak = tracemalloc.get_traced_memory()
+                span['alloc_kb'] = round((allocated - allocated_before) / 1024, 1)
+                span['peak_kb'] = round((peak - allocated_before) / 1024, 1)
+                self.peak_bytes = max(self.peak_bytes, peak)
+            self.spans.append(span)
+
+
+def _profile_table(profiler: cProfile.Profile) -> str:
+    """Top functions by cumulative time as text."""
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+    return stream.getvalue()
+
+
+def _allocation_table(snapshot: tracemalloc.Snapshot) -> list:
+    """Top allocation sites still alive at the end of the run."""
+    return [
+        {'site': str(stat.traceback), 'size_kb': round(stat.size / 1024, 1), 'count': stat.count}
+        for stat in snapshot.statistics('lineno')[:PROFILE_TOP_N]
+    ]
+
+
+def save_trace(trace: dict, profiler: cProfile.Profile = None) -> str:
+    """
+    Store a trace (atomic write), plus the raw cProfile stats if given.
+
+    Args:
+        trace: Trace dict with a trace_id
+        profiler: Finished cProfile profiler (optional)
+
+    Returns:
+        Path of the stored JSON trace
+    """
+    directory = trace_dir()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{trace['trace_id']}.json")
+
+    if profiler is not None:
+        profiler.dump_stats(os.path.join(directory, f"{trace['trace_id']}.prof"))
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(trace, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+    return path
+
+
+def trace_path(trace_id: str, suffix: str = '.json') -> str:
+    """
+    Path of a stored trace file.
+
+    Args:
+        trace_id: Trace identifier
+        suffix: '.json' for the trace, '.prof' for the raw cProfile stats
+
+    Returns:
+        File path
+
+    Raises:
+        ValueError: If the trace id is malformed
+    """
+    if len(trace_id) != 32 or any(c not in '0123456789abcdef' for c in trace_id):
+        raise ValueError(f"Invalid trace id: {trace_id}")
+
+    return os.path.join(trace_dir(), trace_id + suffix)
+
+
+def run_profiled(run, options: set, label: dict = None, tracker_kwargs: dict = None) -> dict:
+    """
+    Run a pipeline function under tracing and store its trace.
+
+    Args:
+        run: Callable taking a tracker keyword argument and returning a
+            result dict (e.g. a partial of run_prediction)
+        options: Enabled options from parse_profile_options
+        label: Request details stored with the trace (optional)
+        tracker_kwargs: Extra TracingTracker arguments, e.g. on_event (optional)
+
+    Returns:
+        dict: The run's result with trace_id added
+    """
+    trace_id = uuid.uuid4().hex
+    memory = 'memory' in options
+    tracker = TracingTracker(memory=memory, **(tracker_kwargs or {}))
+    profiler = cProfile.Profile() if 'cprofile' in options else None
+
+    trace = {
+        'trace_id': trace_id,
+        'request': label or {},
+        'options': sorted(options),
+        'started_at': datetime.now().isoformat()
+    }
+
+    started_tracemalloc = memory and not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    start = time.perf_counter()
+    error = None
+    try:
+        if profiler is not None:
+            profiler.enable()
+        try:
+            result = run(tracker=tracker)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+    except Exception as e:
+        error = e
+        result = None
+    finally:
+        trace['total_ms'] = round((time.perf_counter() - start) * 1000, 3)
+        trace['spans'] = tracker.spans
+        trace['error'] = str(error) if error is not None else None
+        if profiler is not None:
+            trace['profile'] = _profile_table(profiler)
+        if memory:
+            trace['memory'] = {
+                'peak_kb': round(max(tracker.peak_bytes, tracemalloc.get_traced_memory()[1]) / 1024, 1),
+                'top_allocations': _allocation_table(tracemalloc.take_snapshot())
+            }
+            if started_tracemalloc:
+                tracemalloc.stop()
+        save_trace(trace, profiler)
+
+    if error is not None:
+        error.trace_id = trace_id
+        raise error
+
+    return {**result, 'trace_id': trace_id}
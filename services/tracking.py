@@ -0,0 +1,111 @@
+"""
+Pipeline Stage Tracking
+
+Times the stages of a pipeline run and reports them to an optional event
+listener, so callers can stream progress, partial results and per-stage
+timings while the run is still going. A listener can stop the run early by
+raising PipelineCancelled.
+"""
+import time
+from contextlib import contextmanager
+
+
+class PipelineCancelled(Exception):
+    """Raised inside a pipeline run when its caller has cancelled it."""
+    pass
+
+
+class PipelineTracker:
+    """
+    Stage timer and event emitter for one pipeline run.
+
+    Attributes:
+        timings: Dictionary mapping stage name -> elapsed seconds
+        source_rows: Dictionary mapping data source -> rows fetched
+        degraded_sources: Dictionary mapping data source -> why it did not
+            deliver fresh data (timeout, error, empty)
+        serial_stages: Run the pipeline's stages one at a time in the calling
+            thread (see services.pipeline)
+    """
+
+    serial_stages = False
+
+    def __init__(self, on_event=None, is_cancelled=None):
+        """
+        Args:
+            on_event: Callable receiving each event dict (optional)
+            is_cancelled: Callable returning True once the run should stop (optional)
+        """
+        self.on_event = on_event
+        self.is_cancelled = is_cancelled
+        self.timings = {}
+        self.source_rows = {}
+        self.degraded_sources = {}
+
+    def emit(self, event: str, **data) -> None:
+        """
+        Send an event to the listener.
+
+        Args:
+            event: Event type (stage_start, stage_end, partial, ...)
+            **data: JSON-serializable event payload
+        """
+        if self.on_event is not None:
+            self.on_event({'event': event, **data})
+
+    def check_cancelled(self) -> None:
+        """
+        Raise PipelineCancelled if the caller has cancelled the run.
+
+        Raises:
+            PipelineCancelled: If is_cancelled() returns True
+        """
+        if self.is_cancelled is not None and self.is_cancelled():
+            raise PipelineCancelled("Pipeline run was cancelled")
+
+    def record_source(self, source: str, rows: int) -> None:
+        """
+        Record how many rows an upstream data source returned.
+
+        Args:
+            source: Data source name (prices, news, trends, wiki)
+            rows: Number of rows fetched (0 for an empty result)
+        """
+        self.source_rows[source] = int(rows)
+
+    def record_degraded(self, source: str, reason: str) -> None:
+        """
+        Record that a data source was replaced by cached or neutral values,
+        or delivered only part of its data.
+
+        Args:
+            source: Data source name
+            reason: Why, e.g. 'timeout' or 'error, using cached data'
+        """
+        self.degraded_sources[source] = reason
+        self.emit('degraded', source=source, reason=reason)
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Time a pipeline stage and emit its start and end events.
+
+        An exception escaping the stage is tagged with a failed_stage
+        attribute naming it.
+
+        Args:
+            name: Stage name
+        """
+        self.check_cancelled()
+        self.emit('stage_start', stage=name)
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            if not hasattr(e, 'failed_stage'):
+                e.failed_stage = name
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+        self.emit('stage_end', stage=name, elapsed_ms=round(elapsed * 1000, 1))
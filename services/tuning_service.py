@@ -0,0 +1,77 @@
+"""
+Tuning Service - Per-Ticker Hyperparameter Search
+
+Builds the same feature frame as the prediction service, runs the
+successive-halving search and stores the best configuration so later
+predictions for the ticker reuse it instead of tuning on every request.
+
+Usage:
+    python -m services.tuning_service STOCK_NAME START_DATE END_DATE [--engine NAME]
+"""
+import argparse
+from utils.dates import validate_and_normalize_dates
+from model.engines import resolve_engine
+from model.tuning import candidate_params, successive_halving, save_best_params
+from services.predict_service import build_feature_frame, select_feature_columns
+
+
+def tune_ticker(stock: str, start_date: str, end_date: str, engine: str = None,
+                n_candidates: int = None, n_splits: int = 5, max_workers: int = None) -> dict:
+    """
+    Tune and store hyperparameters for one ticker.
+    
+    Args:
+        stock: Stock ticker symbol
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        engine: Model engine name (optional, see model.engines)
+        n_candidates: Sample this many grid points (optional, full grid otherwise)
+        n_splits: Walk-forward CV folds
+        max_workers: Worker processes for candidate fits
+    
+    Returns:
+        dict: Search result with the stored config path under 'path'
+    """
+    start_date, end_date = validate_and_normalize_dates(start_date, end_date)
+    engine = resolve_engine(engine)
+    
+    features = build_feature_frame(stock, start_date, end_date)
+    feature_cols = select_feature_columns(features)
+    
+    df = features.copy()
+    df['target'] = df['Close'].shift(-1)
+    df = df.dropna()
+    
+    print(f"\nTuning {engine} for {stock} on {len(df)} rows...")
+    result = successive_halving(
+        df[feature_cols].values,
+        df['target'].values,
+        engine=engine,
+        candidates=candidate_params(engine, n_candidates),
+        n_splits=n_splits,
+        max_workers=max_workers
+    )
+    result['path'] = save_best_params(stock, engine, result)
+    
+    print(f"  Rungs (folds, candidates): {result['rungs']}")
+    print(f"  Fold fits: {result['n_fits']}")
+    print(f"  Best CV MAE: ${result['mae']:.2f}")
+    print(f"  Best params: {result['params']}")
+    print(f"  Stored at: {result['path']}")
+    
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune model hyperparameters for one ticker")
+    parser.add_argument('stock', help="Stock ticker symbol")
+    parser.add_argument('start_date', help="Start date (YYYY-MM-DD)")
+    parser.add_argument('end_date', help="End date (YYYY-MM-DD)")
+    parser.add_argument('--engine', default=None, help="Model engine")
+    parser.add_argument('--candidates', type=int, default=None, help="Random sample of grid points")
+    parser.add_argument('--splits', type=int, default=5, help="Walk-forward CV folds")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes")
+    args = parser.parse_args()
+    
+    tune_ticker(args.stock, args.start_date, args.end_date, engine=args.engine,
+                n_candidates=args.candidates, n_splits=args.splits, max_workers=args.workers)
@@ -0,0 +1,65 @@
+"""
+Warm-up Hook
+
+The pipeline imports its heavy dependencies (scikit-learn, yfinance, nltk,
+feedparser, pytrends, requests) lazily on first use. warmup() pays that cost
+up front, e.g. in each worker process as it starts, so the first request
+does not. It never raises: a resource that cannot be loaded (such as the
+VADER lexicon without network access) is reported and loaded again on
+first use instead.
+"""
+import importlib
+import time
+
+
+# Modules the pipeline imports on first use
+WARMUP_MODULES = [
+    'sklearn.ensemble',
+    'sklearn.metrics',
+    'yfinance',
+    'feedparser',
+    'nltk.sentiment',
+    'pytrends.request',
+    'requests',
+]
+
+
+def warmup(load_resources: bool = True, verbose: bool = False) -> dict:
+    """
+    Import heavy modules and load one-time resources ahead of first use.
+
+    Args:
+        load_resources: Also load the VADER lexicon and analyzer
+        verbose: Print per-step timings
+
+    Returns:
+        Dictionary mapping step -> seconds taken (None if the step failed)
+    """
+    timings = {}
+
+    for module_name in WARMUP_MODULES:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(module_name)
+            timings[module_name] = time.perf_counter() - start
+        except Exception as e:
+            timings[module_name] = None
+            print(f"Warm-up: could not import {module_name}: {e}")
+
+    if load_resources:
+        from data.news import get_sentiment_analyzer
+
+        start = time.perf_counter()
+        try:
+            get_sentiment_analyzer()
+            timings['vader_lexicon'] = time.perf_counter() - start
+        except Exception as e:
+            timings['vader_lexicon'] = None
+            print(f"Warm-up: could not load the VADER lexicon: {e}")
+
+    if verbose:
+        for step, seconds in timings.items():
+            status = f"{seconds * 1000:8.1f} ms" if seconds is not None else "  failed"
+            print(f"  {step:<20} {status}")
+
+    return timings
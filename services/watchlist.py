@@ -0,0 +1,136 @@
+"""
+Watchlist Runs
+
+Runs the full prediction pipeline for every ticker of a watchlist file in a
+pool of worker processes, for nightly jobs that would otherwise start one
+interpreter per ticker. Workers are spawned and warmed up once, then take
+tickers one at a time; they share the host-wide data cache and upstream
+limits, so overlapping sources are fetched once and the upstreams are not
+overrun. A failing ticker is reported and the run continues.
+"""
+import contextlib
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from utils.dates import validate_and_normalize_dates
+from model.engines import resolve_engine
+from services.warmup import warmup
+
+
+def read_watchlist(path: str) -> list:
+    """
+    Read tickers from a watchlist file.
+
+    Tickers are separated by newlines, commas or whitespace; text after '#'
+    is a comment. Duplicates are dropped, keeping the first occurrence.
+
+    Args:
+        path: Watchlist file path
+
+    Returns:
+        List of upper-cased ticker symbols in file order
+
+    Raises:
+        ValueError: If the file holds no tickers
+    """
+    stocks = []
+    with open(path) as f:
+        for line in f:
+            line = line.split('#', 1)[0]
+            stocks.extend(token.strip().upper() for token in line.replace(',', ' ').split())
+
+    stocks = list(dict.fromkeys(stocks))
+    if not stocks:
+        raise ValueError(f"No tickers in watchlist {path}")
+
+    return stocks
+
+
+def _worker_initializer():
+    # The pipeline's own progress output would interleave across workers
+    with contextlib.redirect_stdout(io.StringIO()):
+        warmup()
+
+
+def _run_ticker(stock: str, start_date: str, end_date: str, engine: str, verbose: bool,
+                export_csv: bool) -> dict:
+    """Run one ticker in a worker process and time it."""
+    from services.predict_service import run_prediction
+
+    start = time.perf_counter()
+    if verbose:
+        result = run_prediction(stock, start_date, end_date, engine=engine, export_csv=export_csv)
+    else:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_prediction(stock, start_date, end_date, engine=engine, export_csv=export_csv)
+    result['seconds'] = time.perf_counter() - start
+
+    return result
+
+
+def run_watchlist(stocks: list, start_date: str, end_date: str, engine: str = None,
+                  workers: int = None, verbose: bool = False, export_csv: bool = True,
+                  on_result=None) -> dict:
+    """
+    Run the prediction pipeline for every ticker in a process pool.
+
+    Args:
+        stocks: Ticker symbols
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        engine: Model engine name (optional, see model.engines)
+        workers: Worker processes (defaults to KASSANDRA_WORKERS or the CPU count)
+        verbose: Let the pipeline print its progress output
+        export_csv: Also write each ticker's CSVs to the working directory
+        on_result: Callback called as on_result(stock, result, error) as each
+            ticker finishes (optional)
+
+    Returns:
+        dict containing:
+            - results: Dictionary mapping ticker -> run_prediction result (with 'seconds')
+            - errors: Dictionary mapping ticker -> error message
+            - model_engine: Engine used for training
+            - workers: Worker processes used
+            - wall_seconds: Time the whole run took
+
+    Raises:
+        ValueError: If the date range or engine is invalid
+    """
+    # Step 1: Validate once so a bad range fails before any worker starts
+    start_date, end_date = validate_and_normalize_dates(start_date, end_date)
+    engine = resolve_engine(engine)
+    workers = workers or int(os.environ.get('KASSANDRA_WORKERS', os.cpu_count() or 1))
+    workers = max(1, min(workers, len(stocks)))
+
+    # Step 2: Fan the tickers out over spawned, warmed-up workers
+    results = {}
+    errors = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_worker_initializer
+    ) as executor:
+        futures = {
+            executor.submit(_run_ticker, stock, start_date, end_date, engine, verbose, export_csv): stock
+            for stock in stocks
+        }
+        for future in as_completed(futures):
+            stock = futures[future]
+            try:
+                results[stock] = future.result()
+            except Exception as e:
+                errors[stock] = str(e)
+            if on_result is not None:
+                on_result(stock, results.get(stock), errors.get(stock))
+
+    # Step 3: Return results in watchlist order
+    return {
+        'results': {stock: results[stock] for stock in stocks if stock in results},
+        'errors': {stock: errors[stock] for stock in stocks if stock in errors},
+        'model_engine': engine,
+        'workers': workers,
+        'wall_seconds': time.perf_counter() - start
+    }
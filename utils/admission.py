@@ -0,0 +1,421 @@
+"""
+Upstream Admission Control
+
+Bounds how hard the pipeline hits each upstream (Yahoo Finance, Google News
+RSS, Google Trends, Wikimedia). Every call takes a slot of the upstream's
+concurrency pool and a token from its token bucket, and waits when either
+is exhausted. Under a burst, requests queue up and throughput levels off at
+the configured rate instead of the upstream throttling every caller at once.
+
+Pipelines run in several worker processes, so the pools and buckets live in
+a SQLite file shared by every process on the host. The backend is selected
+with KASSANDRA_ADMISSION:
+    shared (default)  host-wide state at KASSANDRA_ADMISSION_PATH
+    local             per-process state
+    off               no limits
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from utils.deadline import time_left
+
+
+DEFAULT_ADMISSION_PATH = os.path.join('.kassandra', 'admission.sqlite3')
+
+# Per-upstream limits: concurrent calls, sustained calls per second and burst size.
+# Override with KASSANDRA_UPSTREAM_LIMITS, e.g. '{"trends": {"rate": 0.2}}'
+UPSTREAM_LIMITS = {
+    'prices': {'concurrency': 4, 'rate': 2.0, 'burst': 4},
+    'news': {'concurrency': 4, 'rate': 5.0, 'burst': 10},
+    'trends': {'concurrency': 1, 'rate': 0.5, 'burst': 2},
+    'wiki': {'concurrency': 8, 'rate': 20.0, 'burst': 20},
+}
+
+# Seconds a call waits for admission before giving up (KASSANDRA_UPSTREAM_WAIT)
+DEFAULT_MAX_WAIT = 60.0
+
+# Seconds after which the slot of a crashed holder is reclaimed
+SLOT_TIMEOUT = 300.0
+
+# Longest single sleep between admission attempts
+POLL_SECONDS = 0.05
+
+ADMISSION_ERRORS = (sqlite3.Error, OSError)
+
+
+class UpstreamBusyError(Exception):
+    """Raised when an upstream call is not admitted within the wait limit."""
+    pass
+
+
+def upstream_limits() -> dict:
+    """
+    Effective per-upstream limits.
+
+    Returns:
+        Dictionary mapping upstream -> {concurrency, rate, burst}
+
+    Raises:
+        ValueError: If KASSANDRA_UPSTREAM_LIMITS is not a JSON object
+    """
+    limits = {source: dict(values) for source, values in UPSTREAM_LIMITS.items()}
+    overrides = os.environ.get('KASSANDRA_UPSTREAM_LIMITS')
+    if overrides:
+        try:
+            overrides = json.loads(overrides)
+        except ValueError as e:
+            raise ValueError(f"KASSANDRA_UPSTREAM_LIMITS is not valid JSON: {e}")
+        if not isinstance(overrides, dict):
+            raise ValueError("KASSANDRA_UPSTREAM_LIMITS must be a JSON object")
+        for source, values in overrides.items():
+            limits.setdefault(source, dict(UPSTREAM_LIMITS['prices'])).update(values)
+    return limits
+
+
+def _refill(tokens: float, updated_at: float, now: float, limits: dict) -> float:
+    """Token count after refilling a bucket up to its burst size."""
+    return min(float(limits['burst']), tokens + (now - updated_at) * limits['rate'])
+
+
+def _token_wait(tokens: float, limits: dict) -> float:
+    """Seconds until a bucket holding `tokens` has a whole token."""
+    return max(0.0, (1.0 - tokens) / limits['rate'])
+
+
+class LocalAdmissionStore:
+    """Per-process slots, buckets and counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._waiters = {}
+        self._buckets = {}
+        self._counters = {}
+
+    def try_acquire(self, source: str, owner: str, limits: dict) -> float:
+        """
+        Take a slot and a token if both are available.
+
+        Returns:
+            0.0 if admitted, otherwise the suggested seconds to wait
+        """
+        now = time.time()
+        with self._lock:
+            slots = self._slots.setdefault(source, {})
+            for stale in [o for o, expires_at in slots.items() if expires_at <= now]:
+                del slots[stale]
+            if len(slots) >= limits['concurrency']:
+                return POLL_SECONDS
+
+            tokens, updated_at = self._buckets.get(source, (float(limits['burst']), now))
+            tokens = _refill(tokens, updated_at, now, limits)
+            if tokens < 1.0:
+                self._buckets[source] = (tokens, now)
+                return _token_wait(tokens, limits)
+
+            self._buckets[source] = (tokens - 1.0, now)
+            slots[owner] = now + SLOT_TIMEOUT
+            return 0.0
+
+    def release(self, source: str, owner: str) -> None:
+        with self._lock:
+            self._slots.get(source, {}).pop(owner, None)
+
+    def set_waiting(self, source: str, owner: str, waiting: bool) -> None:
+        with self._lock:
+            if waiting:
+                self._waiters[owner] = source
+            else:
+                self._waiters.pop(owner, None)
+
+    def record(self, source: str, waited: float, timed_out: bool) -> None:
+        with self._lock:
+            counters = self._counters.setdefault(source, {'calls': 0, 'wait_seconds': 0.0, 'timeouts': 0})
+            counters['wait_seconds'] += waited
+            if timed_out:
+                counters['timeouts'] += 1
+            else:
+                counters['calls'] += 1
+
+    def snapshot(self) -> dict:
+        """Current in-flight and waiting calls plus counters per upstream."""
+        now = time.time()
+        with self._lock:
+            sources = set(self._slots) | set(self._counters) | set(self._waiters.values())
+            return {
+                source: {
+                    'in_flight': sum(1 for expires_at in self._slots.get(source, {}).values() if expires_at > now),
+                    'waiting': sum(1 for s in self._waiters.values() if s == source),
+                    **self._counters.get(source, {'calls': 0, 'wait_seconds': 0.0, 'timeouts': 0})
+                }
+                for source in sources
+            }
+
+
+class SharedAdmissionStore:
+    """
+    Host-wide slots, buckets and counters in one SQLite file.
+
+    Every state change runs in a BEGIN IMMEDIATE transaction, so concurrent
+    processes see a consistent view of each pool and bucket.
+
+    Attributes:
+        path: Database file path
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.environ.get('KASSANDRA_ADMISSION_PATH', DEFAULT_ADMISSION_PATH)
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened (and the schema created) on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS slots (owner TEXT PRIMARY KEY, source TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS waiters (owner TEXT PRIMARY KEY, source TEXT NOT NULL, since REAL NOT NULL)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (source TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS counters ("
+            "source TEXT PRIMARY KEY, calls INTEGER NOT NULL, wait_seconds REAL NOT NULL, timeouts INTEGER NOT NULL)"
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def try_acquire(self, source: str, owner: str, limits: dict) -> float:
+        """
+        Take a slot and a token if both are available.
+
+        Returns:
+            0.0 if admitted, otherwise the suggested seconds to wait
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM slots WHERE source = ? AND expires_at <= ?", (source, now))
+            in_flight = conn.execute("SELECT COUNT(*) FROM slots WHERE source = ?", (source,)).fetchone()[0]
+            if in_flight >= limits['concurrency']:
+                return POLL_SECONDS
+
+            row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE source = ?", (source,)).fetchone()
+            tokens = _refill(*(row or (float(limits['burst']), now)), now, limits)
+            admitted = tokens >= 1.0
+            if admitted:
+                tokens -= 1.0
+                conn.execute(
+                    "INSERT INTO slots (owner, source, expires_at) VALUES (?, ?, ?)",
+                    (owner, source, now + SLOT_TIMEOUT)
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (source, tokens, updated_at) VALUES (?, ?, ?)",
+                (source, tokens, now)
+            )
+            return 0.0 if admitted else _token_wait(tokens, limits)
+
+    def release(self, source: str, owner: str) -> None:
+        self._connection().execute("DELETE FROM slots WHERE owner = ?", (owner,))
+
+    def set_waiting(self, source: str, owner: str, waiting: bool) -> None:
+        conn = self._connection()
+        if waiting:
+            now = time.time()
+            # Drop the rows of waiters whose process died before removing them
+            conn.execute("DELETE FROM waiters WHERE since <= ?", (now - SLOT_TIMEOUT,))
+            conn.execute(
+                "INSERT OR REPLACE INTO waiters (owner, source, since) VALUES (?, ?, ?)", (owner, source, now)
+            )
+        else:
+            conn.execute("DELETE FROM waiters WHERE owner = ?", (owner,))
+
+    def record(self, source: str, waited: float, timed_out: bool) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO counters (source, calls, wait_seconds, timeouts) VALUES (?, 0, 0, 0)", (source,)
+            )
+            conn.execute(
+                "UPDATE counters SET calls = calls + ?, wait_seconds = wait_seconds + ?, timeouts = timeouts + ? "
+                "WHERE source = ?",
+                (0 if timed_out else 1, waited, 1 if timed_out else 0, source)
+            )
+
+    def snapshot(self) -> dict:
+        """Current in-flight and waiting calls plus counters per upstream."""
+        now = time.time()
+        conn = self._connection()
+        # Waiters whose process died stay until the next wait prunes them, so only count recent ones
+        stale_before = now - SLOT_TIMEOUT
+        stats = {}
+
+        def entry(source):
+            return stats.setdefault(
+                source, {'in_flight': 0, 'waiting': 0, 'calls': 0, 'wait_seconds': 0.0, 'timeouts': 0}
+            )
+
+        for source, count in conn.execute(
+            "SELECT source, COUNT(*) FROM slots WHERE expires_at > ? GROUP BY source", (now,)
+        ):
+            entry(source)['in_flight'] = count
+        for source, count in conn.execute(
+            "SELECT source, COUNT(*) FROM waiters WHERE since > ? GROUP BY source", (stale_before,)
+        ):
+            entry(source)['waiting'] = count
+        for source, calls, wait_seconds, timeouts in conn.execute(
+            "SELECT source, calls, wait_seconds, timeouts FROM counters"
+        ):
+            entry(source).update(calls=calls, wait_seconds=wait_seconds, timeouts=timeouts)
+        return stats
+
+
+# Process-wide store, created on first use
+_store = None
+_store_lock = threading.Lock()
+
+
+def build_store(backend: str = None):
+    """
+    Build an admission store for a backend name.
+
+    Args:
+        backend: 'shared', 'local' or 'off' (defaults to KASSANDRA_ADMISSION or 'shared')
+
+    Returns:
+        Store, or None when admission control is off
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    backend = (backend or os.environ.get('KASSANDRA_ADMISSION', 'shared')).strip().lower()
+
+    if backend == 'shared':
+        store = SharedAdmissionStore()
+        try:
+            store.snapshot()
+        except ADMISSION_ERRORS as e:
+            print(f"Admission: shared state at {store.path} unavailable, limiting per process: {e}")
+            store = LocalAdmissionStore()
+        return store
+    if backend == 'local':
+        return LocalAdmissionStore()
+    if backend in ('off', 'none', '0'):
+        return None
+
+    raise ValueError(f"Unknown admission backend '{backend}'. Use 'shared', 'local' or 'off'")
+
+
+def get_store():
+    """Get the process-wide admission store, building it on first call."""
+    global _store
+
+    with _store_lock:
+        if _store is None:
+            _store = build_store() or False
+
+    return _store or None
+
+
+def _store_call(method, *args, default=None, **kwargs):
+    """Call a store method; if the store fails, log it and return default."""
+    try:
+        return method(*args, **kwargs)
+    except ADMISSION_ERRORS as e:
+        print(f"Admission: {method.__name__} failed, not limiting this call: {e}")
+        return default
+
+
+@contextmanager
+def upstream_slot(source: str, max_wait: float = None):
+    """
+    Hold one admitted call to an upstream for the duration of the block.
+
+    Waits until the upstream has a free concurrency slot and a token in its
+    bucket, sleeping between attempts for as long as the bucket needs to
+    refill. If the admission state cannot be read or written, the call goes
+    ahead unlimited rather than failing.
+
+    Args:
+        source: Upstream name, a key of UPSTREAM_LIMITS
+        max_wait: Seconds to wait for admission (defaults to KASSANDRA_UPSTREAM_WAIT
+            or 60, and never longer than the current request deadline allows)
+
+    Raises:
+        UpstreamBusyError: If the call is not admitted within max_wait
+    """
+    store = get_store()
+    if store is None:
+        yield
+        return
+
+    limits = upstream_limits()[source]
+    if max_wait is None:
+        max_wait = float(os.environ.get('KASSANDRA_UPSTREAM_WAIT', DEFAULT_MAX_WAIT))
+    max_wait = time_left(max_wait)
+    owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+    start = time.monotonic()
+
+    # Released however the block ends, including failures before it starts
+    try:
+        wait = _store_call(store.try_acquire, source, owner, limits, default=0.0)
+        if wait > 0:
+            _store_call(store.set_waiting, source, owner, True)
+            try:
+                while wait > 0:
+                    remaining = max_wait - (time.monotonic() - start)
+                    if remaining <= 0:
+                        _store_call(store.record, source, time.monotonic() - start, timed_out=True)
+                        raise UpstreamBusyError(
+                            f"Upstream '{source}' did not admit the call within {max_wait:.0f}s"
+                        )
+                    time.sleep(min(wait, POLL_SECONDS * 4, remaining))
+                    wait = _store_call(store.try_acquire, source, owner, limits, default=0.0)
+            finally:
+                _store_call(store.set_waiting, source, owner, False)
+
+        _store_call(store.record, source, time.monotonic() - start, timed_out=False)
+        yield
+    finally:
+        _store_call(store.release, source, owner)
+
+
+def admission_snapshot() -> dict:
+    """
+    Per-upstream admission state for metrics.
+
+    Returns:
+        Dictionary mapping upstream -> {in_flight, waiting, calls,
+        wait_seconds, timeouts}; empty when admission control is off or the
+        state cannot be read
+    """
+    store = get_store()
+    if store is None:
+        return {}
+    try:
+        return store.snapshot()
+    except ADMISSION_ERRORS as e:
+        print(f"Admission: could not read state: {e}")
+        return {}
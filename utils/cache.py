@@ -0,0 +1,634 @@
+"""
+Shared Data Cache
+
+Two-tier cache for upstream fetches, fitted models and responses. An
+in-process LRU tier answers repeated lookups within a worker. A shared
+SQLite tier (one file on the host) is visible to every API and pool worker,
+so the first worker to fetch a key warms the cache for the others.
+
+Values are pickled. Every write is a single SQLite statement, so readers
+never see a partial entry. get_or_compute() takes a per-key lock in the
+shared tier, so concurrent misses for one key compute it once (stampede
+protection) while the other callers wait for the result.
+
+The backend is selected with KASSANDRA_CACHE:
+    shared (default)  memory tier + SQLite file at KASSANDRA_CACHE_PATH
+    memory            in-process tier only
+    off               no caching
+"""
+import functools
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from utils.dates import is_settled
+
+
+DEFAULT_CACHE_PATH = os.path.join('.kassandra', 'cache.sqlite3')
+
+# Bump whenever a change alters what a cached fetcher returns
+CACHE_VERSION = "1"
+
+# Entries and pickled bytes kept by the in-process tier (KASSANDRA_MEMORY_TIER_MB);
+# larger values (e.g. fitted models) live in the shared tier only
+MEMORY_TIER_SIZE = 128
+MEMORY_TIER_BYTES = 64 * 1024 * 1024
+
+# Shared-tier writes between purges of long-expired entries
+PURGE_EVERY_WRITES = 500
+
+# Time-to-live (seconds) for fetches of settled and still-open date ranges
+SETTLED_TTL = 24 * 3600
+OPEN_TTL = 15 * 60
+
+# Seconds expired shared entries are kept as a fallback for sources that time out
+STALE_TTL = 7 * 24 * 3600
+
+# Seconds a stampede lock lasts without renewal, and the waiters' poll interval.
+# The holder renews it every LOCK_TIMEOUT / 3 seconds while it computes, so
+# only the lock of a holder that died expires.
+LOCK_TIMEOUT = 120.0
+LOCK_POLL_SECONDS = 0.05
+
+# Errors of the shared tier that degrade to a cache miss instead of failing the caller
+CACHE_ERRORS = (sqlite3.Error, OSError)
+
+
+def range_ttl(end_date: str) -> int:
+    """
+    Time-to-live for data covering a date range.
+
+    Args:
+        end_date: End date in YYYY-MM-DD format
+
+    Returns:
+        SETTLED_TTL for ranges whose trading sessions have all closed
+        (see utils.dates.is_settled), OPEN_TTL otherwise
+    """
+    return SETTLED_TTL if is_settled(end_date) else OPEN_TTL
+
+
+class MemoryTier:
+    """
+    Thread-safe in-process LRU of pickled values with expiry.
+
+    Bounded by both entry count and total pickled size. A value larger than
+    max_bytes / 8 is not kept, so a few big values (fitted forests run to
+    tens of MB) cannot crowd out everything else.
+
+    Attributes:
+        max_entries: Maximum entries kept
+        max_bytes: Maximum total size of the pickled values kept
+        size_bytes: Current total size of the pickled values
+    """
+
+    def __init__(self, max_entries: int = MEMORY_TIER_SIZE, max_bytes: int = None):
+        self.max_entries = max_entries
+        if max_bytes is None:
+            megabytes = os.environ.get('KASSANDRA_MEMORY_TIER_MB')
+            max_bytes = int(float(megabytes) * 1024 * 1024) if megabytes else MEMORY_TIER_BYTES
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        """Pickled value for a key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            data, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                self.size_bytes -= len(data)
+                return None
+            self._entries.move_to_end(key)
+            return data
+
+    def set(self, key: str, data: bytes, ttl: float = None) -> None:
+        """Store a pickled value, evicting the least recently used beyond the limits."""
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._pop(key)
+            if len(data) > self.max_bytes // 8:
+                return
+            self._entries[key] = (data, expires_at)
+            self.size_bytes += len(data)
+            while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self.size_bytes -= len(evicted)
+
+    def _pop(self, key: str) -> None:
+        """Drop an entry; the caller holds the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= len(entry[0])
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+
+class SQLiteTier:
+    """
+    Host-wide tier in one SQLite file, shared by every process on the host.
+
+    Each thread of each process opens its own connection. The database runs
+    in WAL mode, so readers do not block the writer.
+
+    Attributes:
+        path: Database file path
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.environ.get('KASSANDRA_CACHE_PATH', DEFAULT_CACHE_PATH)
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened (and the schema created) on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL, created_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str, include_expired: bool = False):
+        """Pickled value for a key, or None if missing (or expired, unless include_expired)."""
+        entry = self.get_entry(key, include_expired)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str, include_expired: bool = False):
+        """(pickled value, expires_at) for a key, or None."""
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM entries WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, float('-inf') if include_expired else time.time())
+        ).fetchone()
+        return (row[0], row[1]) if row is not None else None
+
+    def set(self, key: str, data: bytes, ttl: float = None) -> None:
+        """
+        Store a pickled value; the single statement makes the write atomic.
+
+        Every PURGE_EVERY_WRITES writes of this process also purge long-expired
+        entries, so the file does not grow without bound on a long-running host.
+        """
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO entries (key, value, expires_at, created_at) VALUES (?, ?, ?, ?)",
+            (key, sqlite3.Binary(data), now + ttl if ttl is not None else None, now)
+        )
+        with self._writes_lock:
+            self._writes += 1
+            purge = self._writes % PURGE_EVERY_WRITES == 0
+        if purge:
+            self.purge_expired()
+
+    def delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        conn = self._connection()
+        conn.execute("DELETE FROM entries")
+        conn.execute("DELETE FROM locks")
+
+    def purge_expired(self) -> int:
+        """
+        Delete entries expired for longer than STALE_TTL, and stale locks.
+
+        Returns:
+            Number of entries deleted
+        """
+        now = time.time()
+        conn = self._connection()
+        deleted = conn.execute(
+            "DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now - STALE_TTL,)
+        ).rowcount
+        conn.execute("DELETE FROM locks WHERE expires_at <= ?", (now,))
+        return deleted
+
+    def acquire(self, key: str, owner: str, timeout: float = LOCK_TIMEOUT) -> bool:
+        """
+        Try to take the compute lock for a key.
+
+        A lock whose holder died is taken over once it expires.
+
+        Args:
+            key: Cache key
+            owner: Unique id of the caller
+            timeout: Seconds until the lock expires
+
+        Returns:
+            True if the lock was taken
+        """
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM locks WHERE key = ? AND expires_at <= ?", (key, now))
+            taken = conn.execute(
+                "INSERT OR IGNORE INTO locks (key, owner, expires_at) VALUES (?, ?, ?)",
+                (key, owner, now + timeout)
+            ).rowcount == 1
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return taken
+
+    def is_locked(self, key: str) -> bool:
+        """Whether an unexpired compute lock is held for a key."""
+        row = self._connection().execute(
+            "SELECT 1 FROM locks WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    def renew(self, key: str, owner: str, timeout: float = LOCK_TIMEOUT) -> bool:
+        """
+        Push back the expiry of a compute lock the caller holds.
+
+        Args:
+            key: Cache key
+            owner: Unique id the lock was taken with
+            timeout: Seconds from now until the lock expires
+
+        Returns:
+            True if the caller still held the lock
+        """
+        return self._connection().execute(
+            "UPDATE locks SET expires_at = ? WHERE key = ? AND owner = ?", (time.time() + timeout, key, owner)
+        ).rowcount == 1
+
+    def release(self, key: str, owner: str) -> None:
+        self._connection().execute("DELETE FROM locks WHERE key = ? AND owner = ?", (key, owner))
+
+
+class TieredCache:
+    """
+    Memory tier in front of an optional shared tier.
+
+    Either tier may be None; with both None every lookup misses and
+    get_or_compute() simply computes. Tier errors are reported and treated
+    as misses, so a broken cache never fails a request.
+
+    Attributes:
+        memory: In-process tier (or None)
+        shared: Host-wide tier (or None)
+        stats: Lookup counts by outcome (memory_hit, shared_hit, miss)
+    """
+
+    def __init__(self, memory: MemoryTier = None, shared: SQLiteTier = None):
+        self.memory = memory
+        self.shared = shared
+        self.stats = {'memory_hit': 0, 'shared_hit': 0, 'miss': 0}
+        self._key_locks = {}
+        self._key_locks_guard = threading.Lock()
+
+    def _lookup(self, key: str, count: bool = True):
+        """Pickled value from the first tier holding the key, or None."""
+        if self.memory is not None:
+            data = self.memory.get(key)
+            if data is not None:
+                if count:
+                    self.stats['memory_hit'] += 1
+                return data
+
+        if self.shared is not None:
+            try:
+                entry = self.shared.get_entry(key)
+            except CACHE_ERRORS as e:
+                print(f"Cache: shared tier read failed for {key}: {e}")
+                entry = None
+            if entry is not None:
+                if count:
+                    self.stats['shared_hit'] += 1
+                self._promote(key, *entry)
+                return entry[0]
+
+        if count:
+            self.stats['miss'] += 1
+        return None
+
+    def _promote(self, key: str, data: bytes, expires_at: float) -> None:
+        """Copy a shared entry into the memory tier, keeping its expiry."""
+        if self.memory is not None:
+            self.memory.set(key, data, expires_at - time.time() if expires_at is not None else None)
+
+    def get(self, key: str, default=None):
+        """
+        Look up a value.
+
+        Args:
+            key: Cache key
+            default: Returned on a miss
+
+        Returns:
+            A fresh copy of the cached value, or default
+        """
+        data = self._lookup(key)
+        return pickle.loads(data) if data is not None else default
+
+    def get_stale(self, key: str, default=None):
+        """
+        Look up a value, accepting an entry of the shared tier that has expired.
+
+        Used as a fallback when refreshing the value failed or ran out of time.
+
+        Args:
+            key: Cache key
+            default: Returned if no entry exists at all
+
+        Returns:
+            A fresh copy of the cached value, or default
+        """
+        data = self._lookup(key, count=False)
+        if data is None and self.shared is not None:
+            try:
+                data = self.shared.get(key, include_expired=True)
+            except CACHE_ERRORS as e:
+                print(f"Cache: shared tier read failed for {key}: {e}")
+        return pickle.loads(data) if data is not None else default
+
+    def set(self, key: str, value, ttl: float = None) -> None:
+        """
+        Store a value in every tier.
+
+        Args:
+            key: Cache key
+            value: Picklable value
+            ttl: Seconds until the entry expires (None: never)
+        """
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, data, ttl)
+            except CACHE_ERRORS as e:
+                print(f"Cache: shared tier write failed for {key}: {e}")
+        if self.memory is not None:
+            # The memory tier never outlives the shared entry
+            self.memory.set(key, data, ttl)
+
+    def delete(self, key: str) -> None:
+        for tier in (self.memory, self.shared):
+            if tier is not None:
+                tier.delete(key)
+
+    def clear(self) -> None:
+        for tier in (self.memory, self.shared):
+            if tier is not None:
+                tier.clear()
+
+    @contextmanager
+    def _key_lock(self, key: str):
+        """Hold the in-process lock of a key; it is dropped once no thread uses it."""
+        with self._key_locks_guard:
+            entry = self._key_locks.get(key)
+            if entry is None:
+                entry = self._key_locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._key_locks_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key]
+
+    def get_or_compute(self, key: str, compute, ttl: float = None, should_store=None):
+        """
+        Return the cached value for a key, computing and storing it on a miss.
+
+        Concurrent misses for the same key compute it once: threads of one
+        process queue on an in-process lock, and processes on a lock row in
+        the shared tier. The winner renews its lock for as long as it
+        computes, however long that takes. Callers that lose the race wait
+        for the winner's entry and compute it themselves if the winner fails,
+        or dies and its lock expires.
+
+        Args:
+            key: Cache key
+            compute: Zero-argument callable producing the value
+            ttl: Seconds until the entry expires (None: never)
+            should_store: Predicate on the computed value (optional); values
+                it rejects (e.g. empty results) are returned but not cached
+
+        Returns:
+            The cached or computed value
+        """
+        data = self._lookup(key)
+        if data is not None:
+            return pickle.loads(data)
+
+        with self._key_lock(key):
+            # Another thread may have filled the key while we queued
+            data = self._lookup(key, count=False)
+            if data is not None:
+                return pickle.loads(data)
+
+            owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+            locked = self._acquire_shared(key, owner)
+            try:
+                if not locked:
+                    data = self._wait_for(key)
+                    if data is not None:
+                        return pickle.loads(data)
+
+                with self._renewing(key, owner, locked):
+                    value = compute()
+                if should_store is None or should_store(value):
+                    self.set(key, value, ttl)
+                return value
+            finally:
+                if locked:
+                    self._release_shared(key, owner)
+
+    def _acquire_shared(self, key: str, owner: str) -> bool:
+        """Take the shared compute lock; True without a shared tier or on tier errors."""
+        if self.shared is None:
+            return True
+        try:
+            return self.shared.acquire(key, owner)
+        except CACHE_ERRORS as e:
+            print(f"Cache: could not lock {key}: {e}")
+            return True
+
+    @contextmanager
+    def _renewing(self, key: str, owner: str, locked: bool):
+        """Keep renewing the shared lock in a background thread while the block runs."""
+        if not locked or self.shared is None:
+            yield
+            return
+
+        stop = threading.Event()
+
+        def renew():
+            while not stop.wait(LOCK_TIMEOUT / 3):
+                try:
+                    self.shared.renew(key, owner)
+                except CACHE_ERRORS as e:
+                    print(f"Cache: could not renew the lock on {key}: {e}")
+
+        renewer = threading.Thread(target=renew, name='cache-lock-renew', daemon=True)
+        renewer.start()
+        try:
+            yield
+        finally:
+            stop.set()
+
+    def _release_shared(self, key: str, owner: str) -> None:
+        if self.shared is None:
+            return
+        try:
+            self.shared.release(key, owner)
+        except CACHE_ERRORS as e:
+            print(f"Cache: could not unlock {key}: {e}")
+
+    def _wait_for(self, key: str):
+        """Poll the shared tier until another process stores the key or its lock ends."""
+        while True:
+            try:
+                entry = self.shared.get_entry(key)
+                if entry is not None:
+                    self._promote(key, *entry)
+                    return entry[0]
+                if not self.shared.is_locked(key):
+                    return None
+            except CACHE_ERRORS:
+                return None
+            time.sleep(LOCK_POLL_SECONDS)
+
+
+# Process-wide cache, created on first use
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def build_cache(backend: str = None) -> TieredCache:
+    """
+    Build a cache for a backend name.
+
+    Args:
+        backend: 'shared', 'memory' or 'off' (defaults to KASSANDRA_CACHE or 'shared')
+
+    Returns:
+        TieredCache
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    backend = (backend or os.environ.get('KASSANDRA_CACHE', 'shared')).strip().lower()
+
+    if backend == 'shared':
+        shared = SQLiteTier()
+        try:
+            shared.purge_expired()
+        except CACHE_ERRORS as e:
+            print(f"Cache: shared tier at {shared.path} unavailable, using memory only: {e}")
+            shared = None
+        return TieredCache(memory=MemoryTier(), shared=shared)
+    if backend == 'memory':
+        return TieredCache(memory=MemoryTier())
+    if backend in ('off', 'none', '0'):
+        return TieredCache()
+
+    raise ValueError(f"Unknown cache backend '{backend}'. Use 'shared', 'memory' or 'off'")
+
+
+def get_cache() -> TieredCache:
+    """
+    Get the process-wide cache, building it on first call.
+
+    Returns:
+        TieredCache configured from the environment
+    """
+    global _cache
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = build_cache()
+
+    return _cache
+
+
+def is_partial(value) -> bool:
+    """Whether a fetch result is flagged incomplete (attrs['partial'], e.g. after a failed feed poll)."""
+    return bool(getattr(value, 'attrs', {}).get('partial'))
+
+
+def _is_cacheable(value) -> bool:
+    """Whether a fetch result holds complete data worth caching."""
+    if is_partial(value):
+        return False
+    try:
+        return len(value) > 0
+    except TypeError:
+        return value is not None
+
+
+def cached_source(source: str):
+    """
+    Decorator caching a (stock, start_date, end_date) fetcher.
+
+    Results are keyed by source, upper-cased ticker and dates, and expire
+    after range_ttl(end_date). Empty results (the fetchers return them on
+    upstream errors) and results flagged partial (see is_partial) are not
+    cached, and exceptions pass through uncached.
+    The wrapper's stale() returns the last cached result even after it has
+    expired (None if there is none), for callers falling back on a timeout,
+    and its cache_key() the key a result is stored under, for code filling
+    the same entries another way (e.g. bulk downloads).
+
+    Args:
+        source: Source name used in the cache key, e.g. 'prices'
+
+    Returns:
+        Decorator
+    """
+    def decorator(fetch):
+        def cache_key(stock: str, start_date: str, end_date: str) -> str:
+            return f"v{CACHE_VERSION}:{source}:{stock.upper()}:{start_date}:{end_date}"
+
+        @functools.wraps(fetch)
+        def wrapper(stock: str, start_date: str, end_date: str):
+            return get_cache().get_or_compute(
+                cache_key(stock, start_date, end_date),
+                lambda: fetch(stock, start_date, end_date),
+                ttl=range_ttl(end_date),
+                should_store=_is_cacheable
+            )
+
+        def stale(stock: str, start_date: str, end_date: str):
+            return get_cache().get_stale(cache_key(stock, start_date, end_date))
+
+        wrapper.uncached = fetch
+        wrapper.stale = stale
+        wrapper.cache_key = cache_key
+        return wrapper
+    return decorator
@@ -1,7 +1,20 @@
 """
 Date utility functions.
+
+Includes the NYSE trading calendar (weekends and exchange holidays) used to
+tell when a session's data is final.
 """
-from datetime import datetime
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+
+# Exchange time zone and regular close (early closes are treated as 16:00)
+MARKET_TZ = ZoneInfo('America/New_York')
+MARKET_CLOSE = time(16, 0)
+
+# Minutes after the close before a session's data counts as final
+SETTLE_MINUTES = 30
 
 
 def validate_and_normalize_dates(start_date: str, end_date: str) -> tuple:
@@ -46,7 +59,88 @@ def validate_date_format(date_str: str) -> bool:
     Returns:
         True if valid, False otherwise
     """
-    pass
+    try:
+        datetime.strptime(date_str, "%Y-%m-%d")
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def _parse_date(value) -> date:
+    """Accept a date or a YYYY-MM-DD string."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th given weekday of a month (n=-1 for the last one)."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(holiday: date) -> date:
+    """Saturday holidays are observed on Friday, Sunday holidays on Monday."""
+    if holiday.weekday() == 5:
+        return holiday - timedelta(days=1)
+    if holiday.weekday() == 6:
+        return holiday + timedelta(days=1)
+    return holiday
+
+
+@lru_cache(maxsize=64)
+def nyse_holidays(year: int) -> frozenset:
+    """
+    Full-day NYSE holidays of a year under the current rules.
+    
+    One-off closures (e.g. national days of mourning) are not included.
+    
+    Args:
+        year: Calendar year
+    
+    Returns:
+        frozenset of dates on which the exchange is closed
+    """
+    holidays = {
+        _nth_weekday(year, 1, 0, 3),                 # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),                 # Washington's Birthday
+        _easter(year) - timedelta(days=2),           # Good Friday
+        _nth_weekday(year, 5, 0, -1),                # Memorial Day
+        _observed(date(year, 7, 4)),                 # Independence Day
+        _nth_weekday(year, 9, 0, 1),                 # Labor Day
+        _nth_weekday(year, 11, 3, 4),                # Thanksgiving
+        _observed(date(year, 12, 25)),               # Christmas
+    }
+    
+    # New Year's Day on a Saturday is not observed on the Friday before
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(_observed(new_year))
+    
+    if year >= 2022:
+        holidays.add(_observed(date(year, 6, 19)))  # Juneteenth
+    
+    return frozenset(holidays)
 
 
 def is_trading_day(date_str: str) -> bool:
@@ -54,12 +148,13 @@ def is_trading_day(date_str: str) -> bool:
     Check if given date is a valid trading day (not weekend/holiday).
     
     Args:
-        date_str: Date string in YYYY-MM-DD format
+        date_str: Date string in YYYY-MM-DD format (or a date)
     
     Returns:
         True if trading day, False otherwise
     """
-    pass
+    day = _parse_date(date_str)
+    return day.weekday() < 5 and day not in nyse_holidays(day.year)
 
 
 def get_next_trading_day(date_str: str) -> str:
@@ -67,9 +162,96 @@ def get_next_trading_day(date_str: str) -> str:
     Get the next trading day after given date.
     
     Args:
-        date_str: Date string in YYYY-MM-DD format
+        date_str: Date string in YYYY-MM-DD format (or a date)
     
     Returns:
         Next trading day in YYYY-MM-DD format
     """
-    pass
+    day = _parse_date(date_str) + timedelta(days=1)
+    while not is_trading_day(day):
+        day += timedelta(days=1)
+    return day.isoformat()
+
+
+def get_previous_trading_day(date_str: str) -> str:
+    """
+    Get the last trading day before given date.
+    
+    Args:
+        date_str: Date string in YYYY-MM-DD format (or a date)
+    
+    Returns:
+        Previous trading day in YYYY-MM-DD format
+    """
+    day = _parse_date(date_str) - timedelta(days=1)
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day.isoformat()
+
+
+def session_settled_at(date_str: str) -> datetime:
+    """
+    Time at which a session's data counts as final.
+    
+    Args:
+        date_str: Trading day in YYYY-MM-DD format (or a date)
+    
+    Returns:
+        Timezone-aware datetime SETTLE_MINUTES after the close
+    """
+    day = _parse_date(date_str)
+    return datetime.combine(day, MARKET_CLOSE, tzinfo=MARKET_TZ) + timedelta(minutes=SETTLE_MINUTES)
+
+
+def last_settled_trading_day(now: datetime = None) -> str:
+    """
+    Most recent trading day whose data is final.
+    
+    Args:
+        now: Current time (optional, timezone-aware; defaults to now)
+    
+    Returns:
+        Trading day in YYYY-MM-DD format
+    """
+    now = now or datetime.now(MARKET_TZ)
+    today = now.astimezone(MARKET_TZ).date()
+    
+    if is_trading_day(today) and now >= session_settled_at(today):
+        return today.isoformat()
+    return get_previous_trading_day(today)
+
+
+def next_settlement(now: datetime = None) -> datetime:
+    """
+    Next time a trading session's data becomes final.
+    
+    Args:
+        now: Current time (optional, timezone-aware; defaults to now)
+    
+    Returns:
+        Timezone-aware datetime
+    """
+    now = now or datetime.now(MARKET_TZ)
+    return session_settled_at(get_next_trading_day(last_settled_trading_day(now)))
+
+
+def is_settled(end_date: str, now: datetime = None) -> bool:
+    """
+    Whether no trading session up to a range's end can still change its data.
+    
+    True once every trading day on or before end_date has settled, so a range
+    ending today is settled after today's close, and one ending on a weekend
+    is settled from the previous session's close on.
+    
+    Args:
+        end_date: End date in YYYY-MM-DD format
+        now: Current time (optional, timezone-aware; defaults to now)
+    
+    Returns:
+        True if the range is settled, False otherwise (or if end_date is invalid)
+    """
+    try:
+        end = _parse_date(end_date)
+    except (TypeError, ValueError):
+        return False
+    return _parse_date(get_next_trading_day(last_settled_trading_day(now))) > end
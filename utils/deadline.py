@@ -0,0 +1,77 @@
+"""
+Request Deadlines
+
+A Deadline is the wall-clock budget of one request. While a deadline is in
+scope (see deadline_scope), time_left() lets code far down the call stack,
+such as an HTTP call in a fetcher or a wait for upstream admission, bound
+its own timeout by what the request has left.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+class Deadline:
+    """
+    Point in time by which a request's work must be done.
+
+    Attributes:
+        seconds: Budget the deadline was created with
+        expires_at: time.monotonic() value at which it expires
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+
+# Deadline of the request running in the current thread or task
+_current = ContextVar('kassandra_deadline', default=None)
+
+
+@contextmanager
+def deadline_scope(deadline: Deadline):
+    """
+    Make a deadline current for the duration of the block.
+
+    Args:
+        deadline: Deadline to apply (None leaves the current one unchanged)
+    """
+    if deadline is None:
+        yield
+        return
+    token = _current.set(deadline)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def current_deadline() -> Deadline:
+    """The deadline in scope, or None."""
+    return _current.get()
+
+
+def time_left(default: float = None) -> float:
+    """
+    Seconds left for the current request, capped at a default.
+
+    Args:
+        default: Value used without a deadline in scope, and upper bound otherwise
+
+    Returns:
+        Remaining seconds (None if there is neither a deadline nor a default)
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return default
+    if default is None:
+        return deadline.remaining()
+    return min(default, deadline.remaining())